@@ -1,9 +1,16 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, Request, Header
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from typing import List, Optional
+from datetime import datetime
 from app.database import get_db
-from app.services import AlertService
+from app.services import AlertService, AlertRuleService
+from app.services.alert_bus import alert_event_bus
+from app.services.alert_rules import RULE_METRICS, RULE_COMPARATORS
+from app.services.anomaly_detector import quality_anomaly_detector
+from app.models import AlertSeverity, AlertStatus, AlertType
 from pydantic import BaseModel
+import asyncio
 import logging
 
 router = APIRouter()
@@ -179,6 +186,36 @@ class AlertConfigurationRequest(BaseModel):
     vendor_id: int
     configurations: List[dict]
 
+class BulkAlertActionRequest(BaseModel):
+    alert_ids: Optional[List[int]] = None
+    vendor_id: Optional[int] = None
+    severity: Optional[AlertSeverity] = None
+    status: Optional[AlertStatus] = None
+    alert_type: Optional[AlertType] = None
+    since: Optional[datetime] = None
+    until: Optional[datetime] = None
+
+class AlertThreshold(BaseModel):
+    vendor_id: int
+    alert_type: AlertType
+    threshold_value: float
+    is_active: bool = True
+
+class BulkThresholdRequest(BaseModel):
+    configurations: List[AlertThreshold]
+
+class AlertRuleRequest(BaseModel):
+    name: str
+    metric: str
+    comparator: str
+    threshold: float
+    severity: AlertSeverity
+    window_days: int = 30
+    vendor_id: Optional[int] = None
+    jurisdiction_id: Optional[int] = None
+    alert_type: Optional[AlertType] = None
+    is_active: bool = True
+
 class AlertResponse(BaseModel):
     id: int
     vendor_id: int
@@ -194,27 +231,40 @@ class AlertResponse(BaseModel):
     triggered_at: str
     acknowledged_at: Optional[str] = None
     resolved_at: Optional[str] = None
+    archived: bool = False
 
 @router.get("/", response_model=List[AlertResponse])
 async def get_alerts(
+    response: Response,
     limit: int = Query(50, ge=1, le=1000),
     vendor_id: Optional[int] = Query(None),
-    severity: Optional[str] = Query(None),
-    status: Optional[str] = Query(None),
+    severity: Optional[AlertSeverity] = Query(None),
+    status: Optional[AlertStatus] = Query(None),
+    alert_type: Optional[AlertType] = Query(None),
+    since: Optional[datetime] = Query(None, description="Alerts triggered at or after this time"),
+    until: Optional[datetime] = Query(None, description="Alerts triggered before this time"),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor from the previous page"),
+    include_archived: bool = Query(False, description="Also list resolved alerts moved to the archive"),
     db: Session = Depends(get_db)
 ):
-    """Get recent alerts with optional filtering"""
+    """
+    Get recent alerts with optional filtering, newest first
+    
+    When more alerts match, the X-Next-Cursor response header holds the
+    cursor for the next page.
+    """
     try:
-        alerts = AlertService.get_recent_alerts(db, limit, vendor_id)
-        
-        # Apply additional filters
-        if severity:
-            alerts = [a for a in alerts if a["severity"] == severity]
-        
-        if status:
-            alerts = [a for a in alerts if a["status"] == status]
+        alerts, next_cursor = AlertService.list_alerts(
+            db, limit, vendor_id=vendor_id, severity=severity, status=status,
+            alert_type=alert_type, since=since, until=until, cursor=cursor,
+            include_archived=include_archived
+        )
+        if next_cursor:
+            response.headers["X-Next-Cursor"] = next_cursor
         
         return [AlertResponse(**alert) for alert in alerts]
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.warning(f"Database error in get_alerts: {e}. Using mock data.")
         mock_alerts = get_mock_alerts()
@@ -223,9 +273,11 @@ async def get_alerts(
         if vendor_id:
             mock_alerts = [a for a in mock_alerts if a["vendor_id"] == vendor_id]
         if severity:
-            mock_alerts = [a for a in mock_alerts if a["severity"] == severity]
+            mock_alerts = [a for a in mock_alerts if a["severity"] == severity.value]
         if status:
-            mock_alerts = [a for a in mock_alerts if a["status"] == status]
+            mock_alerts = [a for a in mock_alerts if a["status"] == status.value]
+        if alert_type:
+            mock_alerts = [a for a in mock_alerts if a["alert_type"] == alert_type.value]
         
         # Apply limit
         mock_alerts = mock_alerts[:limit]
@@ -243,6 +295,89 @@ async def get_alert_summary(
     
     return summary
 
+# Comment lines sent on an idle stream so proxies keep the connection open
+_STREAM_KEEPALIVE_SECONDS = 15
+
+@router.get("/stream")
+async def stream_alerts(
+    request: Request,
+    last_event_id: Optional[str] = Header(None, alias="Last-Event-ID")
+):
+    """
+    Server-Sent Events feed of alert changes in this worker
+    
+    Events are alert.created, alert.updated, alert.acknowledged and
+    alert.resolved, each carrying the alert as listed by GET /api/alerts.
+    Reconnecting with Last-Event-ID replays missed events; a reset event
+    means they are no longer buffered and the client should refetch.
+    """
+    subscription = alert_event_bus.subscribe(last_event_id)
+    
+    async def events():
+        try:
+            yield "retry: 3000\n\n"
+            if subscription.reset:
+                yield "event: reset\ndata: {}\n\n"
+            for event in subscription.replay:
+                yield _format_event(event)
+            
+            while not await request.is_disconnected():
+                try:
+                    event = await asyncio.wait_for(subscription.get(), _STREAM_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                if event is None:
+                    # Fell too far behind; the client reconnects and replays from the buffer
+                    break
+                yield _format_event(event)
+        finally:
+            alert_event_bus.unsubscribe(subscription)
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+def _format_event(event) -> str:
+    event_id, event_type, data = event
+    return f"id: {event_id}\nevent: {event_type}\ndata: {data}\n\n"
+
+@router.get("/sla-check")
+async def check_all_sla(
+    vendor_ids: Optional[List[int]] = Query(None, description="Defaults to every active vendor"),
+    db: Session = Depends(get_db)
+):
+    """Check SLA compliance for every vendor with active alert configurations"""
+    
+    results = AlertService.check_all_sla(db, vendor_ids)
+    
+    vendors = [
+        {
+            "vendor_id": vendor_id,
+            "vendor_name": result["vendor_name"],
+            "sla_compliance": len(result["alerts"]) == 0,
+            "alerts": result["alerts"]
+        }
+        for vendor_id, result in results.items()
+    ]
+    
+    return {
+        "vendors_checked": len(vendors),
+        "vendors_breaching": sum(1 for vendor in vendors if not vendor["sla_compliance"]),
+        "vendors": vendors
+    }
+
+@router.get("/anomalies")
+async def get_quality_anomalies(
+    vendor_ids: Optional[List[int]] = Query(None, description="Defaults to every active vendor"),
+    db: Session = Depends(get_db)
+):
+    """Vendors whose daily quality series have drifted or dropped from their baseline, up to yesterday"""
+    
+    return quality_anomaly_detector.scan(db, vendor_ids)
+
 @router.get("/vendor/{vendor_id}")
 async def get_vendor_alerts(
     vendor_id: int,
@@ -288,6 +423,80 @@ async def configure_alert_thresholds(
     
     return {"message": "Alert thresholds configured successfully"}
 
+@router.post("/bulk/acknowledge")
+async def bulk_acknowledge_alerts(request: BulkAlertActionRequest, db: Session = Depends(get_db)):
+    """Acknowledge every active alert matching the ids and/or filters in one update"""
+    
+    try:
+        updated = AlertService.bulk_set_status(db, AlertStatus.ACKNOWLEDGED, **request.model_dump())
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    return {"acknowledged": updated}
+
+@router.post("/bulk/resolve")
+async def bulk_resolve_alerts(request: BulkAlertActionRequest, db: Session = Depends(get_db)):
+    """Resolve every open alert matching the ids and/or filters in one update"""
+    
+    try:
+        updated = AlertService.bulk_set_status(db, AlertStatus.RESOLVED, **request.model_dump())
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    return {"resolved": updated}
+
+@router.put("/configurations")
+async def upsert_alert_thresholds(request: BulkThresholdRequest, db: Session = Depends(get_db)):
+    """Set thresholds for many vendors at once; only changed configurations are written"""
+    
+    try:
+        result = AlertService.upsert_alert_thresholds(
+            db, [config.model_dump() for config in request.configurations]
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    
+    return result
+
+@router.get("/rules")
+async def get_alert_rules(db: Session = Depends(get_db)):
+    """List alert rules and the metrics and comparators they can use"""
+    
+    return {
+        "metrics": list(RULE_METRICS),
+        "comparators": list(RULE_COMPARATORS),
+        "rules": AlertRuleService.list_rules(db)
+    }
+
+@router.post("/rules")
+async def create_alert_rule(request: AlertRuleRequest, db: Session = Depends(get_db)):
+    """Create an alert rule, checked alongside the thresholds by /sla-check"""
+    
+    try:
+        return AlertRuleService.save_rule(db, request.model_dump())
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.put("/rules/{rule_id}")
+async def update_alert_rule(rule_id: int, request: AlertRuleRequest, db: Session = Depends(get_db)):
+    """Replace an alert rule"""
+    
+    if AlertRuleService.get_rule(db, rule_id) is None:
+        raise HTTPException(status_code=404, detail="Alert rule not found")
+    try:
+        return AlertRuleService.save_rule(db, request.model_dump(), rule_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.delete("/rules/{rule_id}")
+async def delete_alert_rule(rule_id: int, db: Session = Depends(get_db)):
+    """Delete an alert rule"""
+    
+    if not AlertRuleService.delete_rule(db, rule_id):
+        raise HTTPException(status_code=404, detail="Alert rule not found")
+    
+    return {"message": "Alert rule deleted"}
+
 @router.post("/{alert_id}/acknowledge")
 async def acknowledge_alert(alert_id: int, db: Session = Depends(get_db)):
     """Acknowledge an alert"""
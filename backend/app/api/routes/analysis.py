@@ -131,13 +131,20 @@ async def get_performance_metrics(
     
     metrics = []
     
+    vendors = {
+        vendor.id: vendor
+        for vendor in db.query(Vendor).filter(Vendor.id.in_(vendor_ids)).all()
+    }
+    scores = ScoringEngine.score_vendors(db, list(vendors))
+    matrix = ScoringEngine.get_jurisdiction_matrix(db, list(vendors))
+    
     for vendor_id in vendor_ids:
-        vendor = db.query(Vendor).filter(Vendor.id == vendor_id).first()
+        vendor = vendors.get(vendor_id)
         if not vendor:
             continue
         
-        vendor_metrics = ScoringEngine.calculate_vendor_quality_score(db, vendor_id)
-        jurisdiction_performance = ScoringEngine.get_jurisdiction_performance(db, vendor_id)
+        vendor_metrics = scores[vendor_id]
+        jurisdiction_performance = matrix.rows_for_vendor(vendor_id)
         
         # Calculate additional performance indicators
         avg_turnaround = sum(j["avg_turnaround_hours"] for j in jurisdiction_performance) / len(jurisdiction_performance) if jurisdiction_performance else 0
@@ -174,33 +181,28 @@ async def get_vendor_recommendations(
     """Get vendor recommendations based on requirements"""
     
     from app.models import Vendor
-    from app.services import ScoringEngine
+    from app.services import ScoringEngine, ScoringKernel
     
     vendors = db.query(Vendor).filter(Vendor.is_active == True).all()
+    scores = ScoringEngine.score_vendors(db, [vendor.id for vendor in vendors])
     recommendations = []
     
-    for vendor in vendors:
-        metrics = ScoringEngine.calculate_vendor_quality_score(db, vendor.id)
-        value_index = ScoringEngine.calculate_value_index(metrics["quality_score"], vendor.cost_per_record)
-        
-        # Calculate recommendation score based on priority factors
-        recommendation_score = 0.0
-        
-        if not priority_factors or "quality" in priority_factors:
-            recommendation_score += metrics["quality_score"] * 0.4
-        
-        if not priority_factors or "cost" in priority_factors:
-            # Lower cost is better, so invert and normalize
-            cost_score = max(0, 100 - (vendor.cost_per_record / 15 * 100))  # Assuming $15 as max cost
-            recommendation_score += cost_score * 0.3
-        
-        if not priority_factors or "coverage" in priority_factors:
-            recommendation_score += vendor.coverage_percentage * 0.2
-        
-        if not priority_factors or "value" in priority_factors:
-            # Normalize value index (assuming 10 as max)
-            value_score = min(100, value_index * 10)
-            recommendation_score += value_score * 0.1
+    # Score every vendor against the priority factors in one vectorized pass
+    quality_scores = [scores[vendor.id]["quality_score"] for vendor in vendors]
+    costs = [vendor.cost_per_record for vendor in vendors]
+    value_indexes = ScoringKernel.value_indexes(quality_scores, costs)
+    recommendation_scores = ScoringKernel.requirement_scores(
+        quality_scores,
+        costs,
+        [vendor.coverage_percentage for vendor in vendors],
+        value_indexes,
+        priority_factors
+    )
+    
+    for vendor, value_index, recommendation_score in zip(
+        vendors, value_indexes.tolist(), recommendation_scores.tolist()
+    ):
+        metrics = scores[vendor.id]
         
         recommendations.append({
             "vendor_id": vendor.id,
@@ -1,14 +1,22 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import JSONResponse
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import List, Optional, Literal
 from app.database import get_db
 from app.services import AnalysisService
+from app.services.whatif_simulation import DEFAULT_TRIALS, MAX_TRIALS
 from pydantic import BaseModel
 import logging
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
+# Largest vendor set one comparison request may ask for
+MAX_COMPARE_VENDORS = 500
+
+# Largest vendors x volumes x years grid one TCO sweep may return
+MAX_TCO_SWEEP_CELLS = 250000
+
 # Mock data for coverage heatmap
 def get_mock_coverage_heatmap():
     """Return mock coverage heatmap data when database is unavailable"""
@@ -99,6 +107,23 @@ class WhatIfRequest(BaseModel):
     annual_volume: int
     assumptions: Optional[dict] = None
 
+class TCOSweepRequest(BaseModel):
+    vendor_ids: List[int]
+    volume_min: int
+    volume_max: int
+    volume_steps: int = 10
+    volume_scale: Literal["linear", "log"] = "linear"
+    years_min: int = 1
+    years_max: int = 5
+
+class AllocationRequest(BaseModel):
+    vendor_ids: Optional[List[int]] = None
+    jurisdictions: Optional[List[str]] = None
+    min_quality: Optional[float] = None
+    max_turnaround_hours: Optional[float] = None
+    min_average_quality: Optional[float] = None
+    annual_volume: Optional[int] = None
+
 class TCORequest(BaseModel):
     vendor_id: int
     annual_volume: int
@@ -107,6 +132,7 @@ class TCORequest(BaseModel):
 @router.post("/compare")
 async def compare_vendors(
     request: ComparisonRequest,
+    profile: Optional[str] = Query(None, description="Scoring profile name"),
     db: Session = Depends(get_db)
 ):
     """Side-by-side comparison of multiple vendors"""
@@ -114,20 +140,28 @@ async def compare_vendors(
     if len(request.vendor_ids) < 2:
         raise HTTPException(status_code=400, detail="At least 2 vendors required for comparison")
     
-    if len(request.vendor_ids) > 10:
-        raise HTTPException(status_code=400, detail="Maximum 10 vendors allowed for comparison")
+    if len(request.vendor_ids) > MAX_COMPARE_VENDORS:
+        raise HTTPException(status_code=400, detail=f"Maximum {MAX_COMPARE_VENDORS} vendors allowed for comparison")
     
-    comparison_result = AnalysisService.compare_vendors(
-        db, 
-        request.vendor_ids, 
-        request.filters
-    )
+    try:
+        comparison_result = AnalysisService.compare_vendors(
+            db, 
+            request.vendor_ids, 
+            request.filters,
+            profile=profile
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
     
-    return comparison_result
+    # Already plain JSON types; skipping jsonable_encoder matters at hundreds of vendors x jurisdictions
+    return JSONResponse(content=comparison_result)
 
 @router.post("/whatif")
 async def what_if_analysis(
     request: WhatIfRequest,
+    simulate: bool = Query(False, description="Add Monte Carlo confidence intervals"),
+    trials: int = Query(DEFAULT_TRIALS, description=f"Simulation trials, up to {MAX_TRIALS}"),
+    seed: Optional[int] = Query(None, description="Random seed, to reproduce a simulation"),
     db: Session = Depends(get_db)
 ):
     """What-if analysis for switching vendors"""
@@ -138,16 +172,47 @@ async def what_if_analysis(
     if request.annual_volume <= 0:
         raise HTTPException(status_code=400, detail="Annual volume must be greater than 0")
     
-    analysis_result = AnalysisService.what_if_analysis(
-        db,
-        request.current_vendor_id,
-        request.new_vendor_id,
-        request.annual_volume,
-        request.assumptions
-    )
+    try:
+        analysis_result = AnalysisService.what_if_analysis(
+            db,
+            request.current_vendor_id,
+            request.new_vendor_id,
+            request.annual_volume,
+            request.assumptions,
+            simulate=simulate,
+            trials=trials,
+            seed=seed
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
     return analysis_result
 
+@router.post("/optimize-allocation")
+async def optimize_allocation(
+    request: AllocationRequest,
+    profile: Optional[str] = Query(None, description="Scoring profile name"),
+    db: Session = Depends(get_db)
+):
+    """Cheapest routing of each jurisdiction to one vendor within quality and turnaround limits"""
+    
+    if request.annual_volume is not None and request.annual_volume <= 0:
+        raise HTTPException(status_code=400, detail="Annual volume must be greater than 0")
+    
+    try:
+        return AnalysisService.optimize_allocation(
+            db,
+            vendor_ids=request.vendor_ids,
+            jurisdictions=request.jurisdictions,
+            min_quality=request.min_quality,
+            max_turnaround_hours=request.max_turnaround_hours,
+            min_average_quality=request.min_average_quality,
+            annual_volume=request.annual_volume,
+            profile=profile
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
 @router.post("/tco")
 async def calculate_tco(
     request: TCORequest,
@@ -170,6 +235,46 @@ async def calculate_tco(
     
     return tco_result
 
+@router.post("/tco/sweep")
+async def tco_sweep(
+    request: TCOSweepRequest,
+    profile: Optional[str] = Query(None, description="Scoring profile name"),
+    db: Session = Depends(get_db)
+):
+    """TCO of several vendors across a range of annual volumes and contract lengths"""
+    
+    if not request.vendor_ids or len(request.vendor_ids) > MAX_COMPARE_VENDORS:
+        raise HTTPException(status_code=400, detail=f"Between 1 and {MAX_COMPARE_VENDORS} vendors required")
+    
+    if request.volume_min <= 0 or request.volume_max < request.volume_min:
+        raise HTTPException(status_code=400, detail="Volume range must be positive and ascending")
+    
+    if request.volume_steps <= 0:
+        raise HTTPException(status_code=400, detail="Volume steps must be greater than 0")
+    
+    if request.years_min <= 0 or request.years_max > 10 or request.years_max < request.years_min:
+        raise HTTPException(status_code=400, detail="Years must be an ascending range between 1 and 10")
+    
+    # Checked against the requested steps, before the volume axis is allocated
+    years = list(range(request.years_min, request.years_max + 1))
+    if len(request.vendor_ids) * request.volume_steps * len(years) > MAX_TCO_SWEEP_CELLS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Sweep is limited to {MAX_TCO_SWEEP_CELLS} vendor x volume x year cells"
+        )
+    
+    volumes = AnalysisService.volume_range(
+        request.volume_min, request.volume_max, request.volume_steps, request.volume_scale
+    )
+    
+    try:
+        sweep_result = AnalysisService.tco_sweep(db, request.vendor_ids, volumes, years, profile=profile)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    
+    # Plain lists already; skipping jsonable_encoder matters for large tensors
+    return JSONResponse(content=sweep_result)
+
 @router.get("/jurisdictions")
 async def get_jurisdictions(db: Session = Depends(get_db)):
     """Get all available jurisdictions"""
@@ -188,12 +293,39 @@ async def get_jurisdictions(db: Session = Depends(get_db)):
     ]
 
 @router.get("/benchmarks")
-async def get_market_benchmarks(db: Session = Depends(get_db)):
+async def get_market_benchmarks(
+    percentiles: Optional[List[float]] = Query(None, description="Percentiles to report (default 25, 75, 90)"),
+    state: Optional[str] = Query(None, description="Benchmark only vendors with records in this state"),
+    jurisdiction: Optional[str] = Query(None, description="Benchmark only vendors with records in this jurisdiction"),
+    profile: Optional[str] = Query(None, description="Scoring profile name"),
+    db: Session = Depends(get_db)
+):
     """Get market benchmarks for vendor comparison"""
     
-    benchmarks = AnalysisService.get_market_benchmarks(db)
+    try:
+        return AnalysisService.get_market_benchmarks(
+            db, percentiles=percentiles, state=state, jurisdiction=jurisdiction, profile=profile
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/jurisdiction-matrix")
+async def get_jurisdiction_matrix(
+    vendor_ids: Optional[List[int]] = Query(None),
+    jurisdictions: Optional[List[str]] = Query(None),
+    min_coverage: Optional[float] = Query(None, ge=0, le=100),
+    db: Session = Depends(get_db)
+):
+    """Get vendor x jurisdiction performance as dense arrays"""
+    from app.models import Vendor
+    from app.services import ScoringEngine
+    
+    if not vendor_ids:
+        vendor_ids = [row.id for row in db.query(Vendor.id).filter(Vendor.is_active == True)]
+    
+    matrix = ScoringEngine.get_jurisdiction_matrix(db, vendor_ids, jurisdictions, min_coverage)
     
-    return benchmarks
+    return matrix.to_dict()
 
 @router.get("/coverage-heatmap")
 async def get_coverage_heatmap(db: Session = Depends(get_db)):
@@ -1,11 +1,14 @@
 from fastapi import APIRouter, UploadFile, File, HTTPException, Form
 from pydantic import BaseModel, Field
 from typing import List, Optional, Dict, Any
+import numpy as np
 import pandas as pd
 import io
 import uuid
 from datetime import datetime, timedelta
 import pdfplumber
+from app.services.scoring_profiles import BUILTIN_PROFILES, DEFAULT_QUALITY_WEIGHTS
+from app.services.scoring_kernel import ScoringKernel
 
 router = APIRouter()
 
@@ -29,6 +32,8 @@ class QuickComparisonRequest(BaseModel):
     mode: str = Field(default="side-by-side", pattern="^(side-by-side|what-if)$")
     priority: str = Field(default="balanced", pattern="^(quality|cost|balanced|value)$")
     annual_volume: Optional[int] = Field(None, ge=100)
+    # Quick comparisons have no database, so only the built-in profiles apply
+    profile: Optional[str] = None
 
 class ComparisonResult(BaseModel):
     session_id: str
@@ -44,47 +49,46 @@ class UploadResponse(BaseModel):
     columns_detected: List[str]
     message: str
 
-def calculate_quality_score(vendor: VendorInput) -> float:
-    """Calculate quality score from raw metrics or return provided score."""
-    if vendor.quality_score is not None:
-        return vendor.quality_score
-    
-    # Calculate from raw metrics using existing formula
-    if all([vendor.pii_completeness, vendor.disposition_accuracy, 
-            vendor.avg_freshness_days is not None, vendor.coverage_percentage]):
-        freshness_score = max(0, 100 - vendor.avg_freshness_days)
-        return (
-            (vendor.pii_completeness * 0.4) +
-            (vendor.disposition_accuracy * 0.3) +
-            (freshness_score * 0.2) +
-            (vendor.coverage_percentage * 0.1)
+def score_vendor_inputs(vendors: List[VendorInput], priority: str,
+                        weights=DEFAULT_QUALITY_WEIGHTS) -> Dict[str, np.ndarray]:
+    """
+    Quality score, value index and recommendation score for all vendors at once.
+    
+    A provided quality_score is used as-is; otherwise it is calculated from the
+    raw metrics, defaulting to 70 when any of them is missing.
+    """
+    def column(name):
+        return np.array(
+            [np.nan if getattr(v, name) is None else getattr(v, name) for v in vendors],
+            dtype=float
         )
     
-    # Default if insufficient data
-    return 70.0
-
-def calculate_value_index(quality_score: float, cost_per_record: float) -> float:
-    """Calculate value index = quality per dollar."""
-    if cost_per_record <= 0:
-        return 0.0
-    return round(quality_score / cost_per_record, 2)
-
-def get_recommendation_priority(priority: str, vendor: Dict) -> float:
-    """Calculate recommendation score based on user priority."""
-    if priority == "quality":
-        return vendor["quality_score"] * 0.8 + vendor["value_index"] * 0.2
-    elif priority == "cost":
-        # Lower cost is better, so invert
-        cost_score = max(0, 100 - (vendor["cost_per_record"] / 15 * 100))
-        return cost_score * 0.6 + vendor["quality_score"] * 0.4
-    elif priority == "value":
-        return vendor["value_index"] * 0.7 + vendor["quality_score"] * 0.3
-    else:  # balanced
-        return (
-            vendor["quality_score"] * 0.4 +
-            vendor["value_index"] * 0.3 +
-            (100 - vendor["cost_per_record"] / 15 * 100) * 0.3
+    pii = column("pii_completeness")
+    disposition = column("disposition_accuracy")
+    freshness = column("avg_freshness_days")
+    coverage = column("coverage_percentage")
+    provided = column("quality_score")
+    cost = column("cost_per_record")
+    
+    # Zero-valued metrics count as missing (freshness excepted); NaN comparisons are False
+    has_metrics = (pii > 0) & (disposition > 0) & ~np.isnan(freshness) & (coverage > 0)
+    calculated = ScoringKernel.quality_scores(
+        np.nan_to_num(pii), np.nan_to_num(disposition), np.nan_to_num(freshness), np.nan_to_num(coverage),
+        weights
+    )
+    quality_scores = np.where(
+        ~np.isnan(provided), provided, np.where(has_metrics, calculated, 70.0)
+    )
+    value_indexes = ScoringKernel.value_indexes(quality_scores, cost)
+    
+    return {
+        "quality_score": quality_scores,
+        "value_index": value_indexes,
+        # Ranked on the displayed (1 decimal) quality score
+        "recommendation_score": ScoringKernel.priority_scores(
+            priority, np.round(quality_scores, 1), value_indexes, cost
         )
+    }
 
 def parse_pdf_vendor_data(pdf_bytes):
     """
@@ -308,32 +312,36 @@ async def quick_compare(request: QuickComparisonRequest):
             detail="Maximum 20 vendors allowed for quick comparison"
         )
     
+    weights = DEFAULT_QUALITY_WEIGHTS
+    if request.profile is not None:
+        if request.profile not in BUILTIN_PROFILES:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unknown scoring profile: {request.profile}"
+            )
+        weights = BUILTIN_PROFILES[request.profile]["weights"]
+    
+    # Score every vendor in one vectorized pass
+    scores = score_vendor_inputs(request.vendors, request.priority, weights)
+    
     # Process vendors
     processed_vendors = []
-    for v in request.vendors:
-        quality_score = calculate_quality_score(v)
-        value_index = calculate_value_index(quality_score, v.cost_per_record)
-        
+    for i, v in enumerate(request.vendors):
         processed_vendors.append({
             "name": v.name,
             "cost_per_record": round(v.cost_per_record, 2),
-            "quality_score": round(quality_score, 1),
-            "value_index": round(value_index, 2),
+            "quality_score": round(float(scores["quality_score"][i]), 1),
+            "value_index": round(float(scores["value_index"][i]), 2),
             "description": v.description,
             "raw_metrics": {
                 "pii_completeness": v.pii_completeness,
                 "disposition_accuracy": v.disposition_accuracy,
                 "avg_freshness_days": v.avg_freshness_days,
                 "coverage_percentage": v.coverage_percentage,
-            }
+            },
+            "recommendation_score": float(scores["recommendation_score"][i])
         })
     
-    # Calculate rankings based on priority
-    for vendor in processed_vendors:
-        vendor["recommendation_score"] = get_recommendation_priority(
-            request.priority, vendor
-        )
-    
     # Sort by recommendation score
     rankings = sorted(
         processed_vendors, 
@@ -4,7 +4,10 @@ from typing import List, Optional
 from app.database import get_db
 from app.models import Vendor
 from app.services import ScoringEngine
-from pydantic import BaseModel
+from app.services.score_cache import vendor_score_cache
+from app.services.scoring_profiles import ScoringProfileService, QUALITY_COMPONENTS
+from app.services.metrics_history import MetricsHistoryService
+from pydantic import BaseModel, Field
 import logging
 
 router = APIRouter()
@@ -136,6 +139,16 @@ class VendorMetricsResponse(BaseModel):
     geographic_coverage: float
     total_records: int
 
+class ScoringProfileWeights(BaseModel):
+    pii_completeness: float = Field(..., ge=0)
+    disposition_accuracy: float = Field(..., ge=0)
+    freshness_score: float = Field(..., ge=0)
+    geographic_coverage: float = Field(..., ge=0)
+
+class ScoringProfileRequest(BaseModel):
+    description: Optional[str] = None
+    weights: ScoringProfileWeights
+
 class VendorDetailResponse(BaseModel):
     vendor: VendorResponse
     metrics: VendorMetricsResponse
@@ -210,8 +223,56 @@ async def get_vendors_summary(db: Session = Depends(get_db)):
         ]
     }
 
+@router.get("/score-cache/stats")
+async def get_score_cache_stats():
+    """Get hit/miss counters for the in-process vendor score cache"""
+    
+    return vendor_score_cache.stats()
+
+@router.get("/scoring-profiles")
+async def get_scoring_profiles(db: Session = Depends(get_db)):
+    """List the named weight profiles accepted by ?profile="""
+    
+    return {
+        "components": list(QUALITY_COMPONENTS),
+        "profiles": ScoringProfileService.list_profiles(db)
+    }
+
+@router.put("/scoring-profiles/{name}")
+async def save_scoring_profile(name: str, request: ScoringProfileRequest, db: Session = Depends(get_db)):
+    """Create or replace a custom weight profile; built-in profiles are read-only"""
+    
+    weights = request.weights.model_dump()
+    if sum(weights.values()) <= 0:
+        raise HTTPException(status_code=400, detail="At least one weight must be positive")
+    
+    try:
+        return ScoringProfileService.save_profile(db, name, weights, request.description)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/rankings")
+async def get_vendor_rankings(
+    profiles: List[str] = Query(..., description="Profile names to score under"),
+    vendor_ids: Optional[List[int]] = Query(None, description="Defaults to all active vendors"),
+    db: Session = Depends(get_db)
+):
+    """Score and rank vendors under several weight profiles at once"""
+    
+    if vendor_ids is None:
+        vendor_ids = [vendor_id for (vendor_id,) in db.query(Vendor.id).filter(Vendor.is_active == True)]
+    
+    try:
+        return ScoringEngine.score_matrix(db, vendor_ids, profiles)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
 @router.get("/{vendor_id}", response_model=VendorDetailResponse)
-async def get_vendor_detail(vendor_id: int, db: Session = Depends(get_db)):
+async def get_vendor_detail(
+    vendor_id: int,
+    profile: Optional[str] = Query(None, description="Scoring profile name"),
+    db: Session = Depends(get_db)
+):
     """Get detailed information about a specific vendor"""
     
     vendor = db.query(Vendor).filter(Vendor.id == vendor_id).first()
@@ -219,7 +280,10 @@ async def get_vendor_detail(vendor_id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="Vendor not found")
     
     # Get detailed metrics
-    metrics = ScoringEngine.calculate_vendor_quality_score(db, vendor_id)
+    try:
+        metrics = ScoringEngine.calculate_vendor_quality_score(db, vendor_id, profile=profile)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
     
     # Get jurisdiction performance
     jurisdiction_performance = ScoringEngine.get_jurisdiction_performance(db, vendor_id)
@@ -245,14 +309,21 @@ async def get_vendor_detail(vendor_id: int, db: Session = Depends(get_db)):
     )
 
 @router.get("/{vendor_id}/score", response_model=VendorMetricsResponse)
-async def get_vendor_score(vendor_id: int, db: Session = Depends(get_db)):
+async def get_vendor_score(
+    vendor_id: int,
+    profile: Optional[str] = Query(None, description="Scoring profile name"),
+    db: Session = Depends(get_db)
+):
     """Get current quality score and metrics for a vendor"""
     
     vendor = db.query(Vendor).filter(Vendor.id == vendor_id).first()
     if not vendor:
         raise HTTPException(status_code=404, detail="Vendor not found")
     
-    metrics = ScoringEngine.calculate_vendor_quality_score(db, vendor_id)
+    try:
+        metrics = ScoringEngine.calculate_vendor_quality_score(db, vendor_id, profile=profile)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
     
     return VendorMetricsResponse(**metrics)
 
@@ -260,6 +331,7 @@ async def get_vendor_score(vendor_id: int, db: Session = Depends(get_db)):
 async def get_vendor_history(
     vendor_id: int, 
     days: int = Query(30, ge=1, le=365),
+    max_points: Optional[int] = Query(None, ge=3, le=10000, description="Downsample to at most this many points"),
     db: Session = Depends(get_db)
 ):
     """Get historical quality metrics for a vendor"""
@@ -268,12 +340,13 @@ async def get_vendor_history(
     if not vendor:
         raise HTTPException(status_code=404, detail="Vendor not found")
     
-    history = ScoringEngine.get_vendor_metrics_history(db, vendor_id, days)
+    resolution, history = MetricsHistoryService.get_history(db, vendor_id, days, max_points)
     
     return {
         "vendor_id": vendor_id,
         "vendor_name": vendor.name,
         "period_days": days,
+        "resolution": resolution,
         "history": history
     }
 
@@ -294,11 +367,16 @@ async def get_vendor_jurisdictions(vendor_id: int, db: Session = Depends(get_db)
     }
 
 @router.get("/benchmark/all")
-async def benchmark_all_vendors(db: Session = Depends(get_db)):
+async def benchmark_all_vendors(
+    profile: Optional[str] = Query(None, description="Scoring profile name"),
+    db: Session = Depends(get_db)
+):
     """Get benchmark comparison of all vendors"""
     try:
-        benchmark_data = ScoringEngine.benchmark_vendors(db)
+        benchmark_data = ScoringEngine.benchmark_vendors(db, profile=profile)
         return benchmark_data
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
         logger.warning(f"Database error in benchmark_all_vendors: {e}. Using mock data.")
         return get_mock_benchmark_data()
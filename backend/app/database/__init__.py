@@ -1,3 +1,4 @@
 from .db import engine, SessionLocal, Base, get_db
+from .upsert import upsert_counters
 
-__all__ = ["engine", "SessionLocal", "Base", "get_db"]
+__all__ = ["engine", "SessionLocal", "Base", "get_db", "upsert_counters"]
@@ -0,0 +1,33 @@
+import sys
+from app.database.db import SessionLocal, engine, Base
+from app.services.rollup_service import RollupService
+from app.services.metrics_history import MetricsHistoryService
+from app.services.alert_stats import AlertStatsService
+
+def reconcile_rollups():
+    # Create tables first
+    Base.metadata.create_all(bind=engine)
+    
+    db = SessionLocal()
+    
+    try:
+        report = RollupService.reconcile(db)
+        day_rows = RollupService.backfill_daily_quality(db)
+        history_buckets = MetricsHistoryService.rebuild_tiers(db)
+        alert_buckets = AlertStatsService.rebuild(db)
+    finally:
+        db.close()
+    
+    print(f"Checked {report['vendors_checked']} vendors, {report['vendors_drifted']} drifted")
+    for entry in report["drift"]:
+        for name, values in entry["counters"].items():
+            print(f"  vendor {entry['vendor_id']}: {name} stored={values['stored']} actual={values['actual']}")
+    print(f"Rebuilt {day_rows} vendor_daily_quality rows")
+    print(f"Rebuilt {history_buckets} vendor_metrics_rollup buckets")
+    print(f"Rebuilt {alert_buckets} alert_stats buckets")
+    
+    return report
+
+if __name__ == "__main__":
+    report = reconcile_rollups()
+    sys.exit(1 if report["vendors_drifted"] else 0)
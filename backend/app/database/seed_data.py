@@ -145,39 +145,40 @@ def create_sample_data():
         
         # Bulk insert for much better performance
         from sqlalchemy import insert
+        from app.services.rollup_service import RollupService
         db.execute(insert(CriminalRecord), records_to_insert)
+        RollupService.apply_record_rows(db, records_to_insert)
         db.commit()
         
-        # Create vendor metrics based on actual data
-        for vendor in created_vendors:
-            records = db.query(CriminalRecord).filter(CriminalRecord.vendor_id == vendor.id).all()
+        # Create vendor metrics from the rollup counters, scored in one kernel call
+        from app.services.scoring_engine import ScoringEngine
+        from app.services.scoring_kernel import ScoringKernel
+        components = ScoringEngine.get_score_components(db, [vendor.id for vendor in created_vendors])
+        scored_vendors = [vendor for vendor in created_vendors if components[vendor.id]["total_records"]]
+        columns = {
+            name: [components[vendor.id][name] for vendor in scored_vendors]
+            for name in ("pii_completeness", "disposition_accuracy", "avg_freshness_days", "geographic_coverage")
+        }
+        quality_scores = ScoringKernel.quality_scores(
+            columns["pii_completeness"],
+            columns["disposition_accuracy"],
+            columns["avg_freshness_days"],
+            columns["geographic_coverage"]
+        ).tolist()
+        
+        for i, vendor in enumerate(scored_vendors):
+            metrics = VendorMetrics(
+                vendor_id=vendor.id,
+                pii_completeness=columns["pii_completeness"][i],
+                disposition_accuracy=columns["disposition_accuracy"][i],
+                avg_freshness_days=columns["avg_freshness_days"][i],
+                geographic_coverage=columns["geographic_coverage"][i],
+                calculated_score=quality_scores[i]
+            )
+            db.add(metrics)
             
-            if records:
-                pii_completeness = sum(1 for r in records if r.pii_status == PIIStatus.COMPLETE) / len(records) * 100
-                disposition_accuracy = sum(1 for r in records if r.disposition_verified) / len(records) * 100
-                avg_freshness_days = sum(r.freshness_days for r in records) / len(records)
-                geographic_coverage = vendor.coverage_percentage
-                
-                # Calculate quality score
-                quality_score = (
-                    (pii_completeness * 0.4) +
-                    (disposition_accuracy * 0.3) +
-                    ((100 - min(avg_freshness_days, 100)) * 0.2) +
-                    (geographic_coverage * 0.1)
-                )
-                
-                metrics = VendorMetrics(
-                    vendor_id=vendor.id,
-                    pii_completeness=pii_completeness,
-                    disposition_accuracy=disposition_accuracy,
-                    avg_freshness_days=avg_freshness_days,
-                    geographic_coverage=geographic_coverage,
-                    calculated_score=quality_score
-                )
-                db.add(metrics)
-                
-                # Update vendor quality score
-                vendor.quality_score = quality_score
+            # Update vendor quality score
+            vendor.quality_score = quality_scores[i]
         
         db.commit()
         
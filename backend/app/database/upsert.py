@@ -0,0 +1,38 @@
+from typing import Callable, Dict, Iterable, List, Optional
+from sqlalchemy import Table
+from sqlalchemy.dialects import postgresql, sqlite
+
+# Dialects whose INSERT supports ON CONFLICT DO UPDATE
+_INSERTS = {"sqlite": sqlite.insert, "postgresql": postgresql.insert}
+
+def upsert_counters(connection, table: Table, rows: List[Dict], added: Iterable[str],
+                    merged: Optional[Dict[str, Callable]] = None) -> None:
+    """
+    Insert rows, or add each `added` column onto the row already stored
+    under the same primary key
+    
+    merged maps other columns to a function of (stored column, incoming
+    column) giving their new value, e.g. a running minimum. Each row is one
+    INSERT ... ON CONFLICT DO UPDATE, so concurrent writers creating the same
+    row add up instead of one failing on the primary key.
+    """
+    if not rows:
+        return
+    dialect = connection.dialect.name
+    if dialect not in _INSERTS:
+        raise NotImplementedError(f"Counter upserts are not supported on {dialect}")
+    
+    statement = _INSERTS[dialect](table)
+    excluded = statement.excluded
+    values = {name: table.c[name] + excluded[name] for name in added}
+    for name, merge in (merged or {}).items():
+        values[name] = merge(table.c[name], excluded[name])
+    # ON CONFLICT DO UPDATE skips Column.onupdate, so apply SQL-side ones here
+    for column in table.columns:
+        if column.name not in values and column.onupdate is not None and column.onupdate.is_clause_element:
+            values[column.name] = column.onupdate.arg
+    
+    connection.execute(
+        statement.on_conflict_do_update(index_elements=list(table.primary_key.columns), set_=values),
+        rows
+    )
@@ -1,9 +1,12 @@
 from .vendor import Vendor, VendorMetrics, Jurisdiction, VendorCoverage
 from .record import CriminalRecord, SchemaChange, DispositionType, PIIStatus
-from .alert import Alert, AlertConfiguration, AlertType, AlertSeverity, AlertStatus
+from .alert import Alert, AlertArchive, AlertConfiguration, AlertRule, AlertType, AlertSeverity, AlertStatus
+from .rollup import VendorScoreRollup, VendorDailyQuality, VendorMetricsRollup, AlertStats
+from .scoring import ScoringProfile
 
 __all__ = [
     "Vendor", "VendorMetrics", "Jurisdiction", "VendorCoverage",
     "CriminalRecord", "SchemaChange", "DispositionType", "PIIStatus",
-    "Alert", "AlertConfiguration", "AlertType", "AlertSeverity", "AlertStatus"
+    "Alert", "AlertArchive", "AlertConfiguration", "AlertRule", "AlertType", "AlertSeverity", "AlertStatus",
+    "VendorScoreRollup", "VendorDailyQuality", "VendorMetricsRollup", "AlertStats", "ScoringProfile"
 ]
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, Boolean, Text, ForeignKey, Enum
+from sqlalchemy import Column, Integer, String, Float, DateTime, Boolean, Text, ForeignKey, Enum, Index, LargeBinary
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.database.db import Base
@@ -10,6 +10,7 @@ class AlertType(enum.Enum):
     TURNAROUND_TIME = "turnaround_time"
     COVERAGE_DROP = "coverage_drop"
     QUALITY_DROP = "quality_drop"
+    QUALITY_ANOMALY = "quality_anomaly"
 
 class AlertSeverity(enum.Enum):
     LOW = "low"
@@ -45,6 +46,44 @@ class Alert(Base):
     
     # Relationships
     vendor = relationship("Vendor", back_populates="alerts")
+    
+    # Keyset pagination on (triggered_at, id), alone or behind one equality filter
+    __table_args__ = (
+        Index("ix_alerts_triggered_at_id", "triggered_at", "id"),
+        Index("ix_alerts_vendor_triggered_at", "vendor_id", "triggered_at", "id"),
+        Index("ix_alerts_status_triggered_at", "status", "triggered_at", "id"),
+        Index("ix_alerts_severity_triggered_at", "severity", "triggered_at", "id"),
+        Index("ix_alerts_type_triggered_at", "alert_type", "triggered_at", "id"),
+        # Archived alerts keep their ids, so SQLite must not reuse the ids of deleted rows
+        {"sqlite_autoincrement": True},
+    )
+
+class AlertArchive(Base):
+    __tablename__ = "alerts_archive"
+    
+    # Resolved alerts moved out of alerts after the retention window; ids are kept from alerts
+    id = Column(Integer, primary_key=True)
+    vendor_id = Column(Integer, ForeignKey("vendors.id"))
+    alert_type = Column(Enum(AlertType))
+    severity = Column(Enum(AlertSeverity))
+    status = Column(Enum(AlertStatus))
+    
+    # Alert details; title and description are zlib-compressed JSON (AlertArchiveService.pack_details)
+    details = Column(LargeBinary)
+    current_value = Column(Float)
+    threshold_value = Column(Float)
+    variance_percentage = Column(Float)
+    
+    # Timestamps
+    triggered_at = Column(DateTime(timezone=True))
+    acknowledged_at = Column(DateTime(timezone=True))
+    resolved_at = Column(DateTime(timezone=True))
+    archived_at = Column(DateTime(timezone=True))
+    
+    __table_args__ = (
+        Index("ix_alerts_archive_triggered_at_id", "triggered_at", "id"),
+        Index("ix_alerts_archive_vendor_triggered_at", "vendor_id", "triggered_at", "id"),
+    )
 
 class AlertConfiguration(Base):
     __tablename__ = "alert_configurations"
@@ -59,3 +98,25 @@ class AlertConfiguration(Base):
     
     # Relationships
     vendor = relationship("Vendor")
+
+class AlertRule(Base):
+    __tablename__ = "alert_rules"
+    
+    # A threshold on a windowed record metric; vendor_id None applies it to every active vendor
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String, nullable=False)
+    vendor_id = Column(Integer, ForeignKey("vendors.id"))
+    jurisdiction_id = Column(Integer, ForeignKey("jurisdictions.id"))
+    metric = Column(String, nullable=False)
+    window_days = Column(Integer, nullable=False, default=30)
+    comparator = Column(String(2), nullable=False)
+    threshold = Column(Float, nullable=False)
+    severity = Column(Enum(AlertSeverity), nullable=False)
+    alert_type = Column(Enum(AlertType), nullable=False)
+    is_active = Column(Boolean, default=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    
+    # Relationships
+    vendor = relationship("Vendor")
+    jurisdiction = relationship("Jurisdiction")
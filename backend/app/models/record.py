@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, Boolean, Text, ForeignKey, Enum
+from sqlalchemy import Column, Integer, String, Float, DateTime, Boolean, Text, ForeignKey, Enum, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.database.db import Base
@@ -53,6 +53,12 @@ class CriminalRecord(Base):
     # Relationships
     vendor = relationship("Vendor", back_populates="records")
     jurisdiction = relationship("Jurisdiction")
+    
+    # Per-vendor aggregates over a recent delivery window (alert rules) and per vendor and jurisdiction
+    __table_args__ = (
+        Index("ix_criminal_records_vendor_delivery", "vendor_id", "vendor_delivery_date"),
+        Index("ix_criminal_records_vendor_jurisdiction", "vendor_id", "jurisdiction_id"),
+    )
 
 class SchemaChange(Base):
     __tablename__ = "schema_changes"
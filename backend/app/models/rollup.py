@@ -0,0 +1,54 @@
+from sqlalchemy import Column, Integer, Float, Date, DateTime, String, ForeignKey, Enum
+from sqlalchemy.sql import func
+from app.database.db import Base
+from app.models.alert import AlertType, AlertSeverity, AlertStatus
+
+class VendorScoreRollup(Base):
+    __tablename__ = "vendor_score_rollup"
+    
+    # Running counters over criminal_records, maintained by RollupService
+    vendor_id = Column(Integer, ForeignKey("vendors.id"), primary_key=True)
+    total_records = Column(Integer, nullable=False, default=0)
+    pii_complete_count = Column(Integer, nullable=False, default=0)
+    verified_count = Column(Integer, nullable=False, default=0)
+    freshness_sum = Column(Float, nullable=False, default=0.0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+class VendorDailyQuality(Base):
+    __tablename__ = "vendor_daily_quality"
+    
+    # Per-vendor, per-delivery-day counters over criminal_records, maintained by RollupService
+    vendor_id = Column(Integer, ForeignKey("vendors.id"), primary_key=True)
+    day = Column(Date, primary_key=True)
+    record_count = Column(Integer, nullable=False, default=0)
+    pii_complete_count = Column(Integer, nullable=False, default=0)
+    verified_count = Column(Integer, nullable=False, default=0)
+    turnaround_sum = Column(Float, nullable=False, default=0.0)
+    freshness_sum = Column(Float, nullable=False, default=0.0)
+
+class VendorMetricsRollup(Base):
+    __tablename__ = "vendor_metrics_rollup"
+    
+    # Hourly and daily buckets of vendor_metrics snapshots, maintained by MetricsHistoryService
+    vendor_id = Column(Integer, ForeignKey("vendors.id"), primary_key=True)
+    tier = Column(String, primary_key=True)  # "hourly" or "daily"
+    bucket_start = Column(DateTime(timezone=True), primary_key=True)
+    sample_count = Column(Integer, nullable=False, default=0)
+    pii_completeness_sum = Column(Float, nullable=False, default=0.0)
+    disposition_accuracy_sum = Column(Float, nullable=False, default=0.0)
+    avg_freshness_days_sum = Column(Float, nullable=False, default=0.0)
+    geographic_coverage_sum = Column(Float, nullable=False, default=0.0)
+    calculated_score_sum = Column(Float, nullable=False, default=0.0)
+    calculated_score_min = Column(Float)
+    calculated_score_max = Column(Float)
+
+class AlertStats(Base):
+    __tablename__ = "alert_stats"
+    
+    # Alert counts per triggered hour and current status, maintained by AlertStatsService
+    bucket_start = Column(DateTime(timezone=True), primary_key=True)
+    vendor_id = Column(Integer, ForeignKey("vendors.id"), primary_key=True)
+    alert_type = Column(Enum(AlertType), primary_key=True)
+    severity = Column(Enum(AlertSeverity), primary_key=True)
+    status = Column(Enum(AlertStatus), primary_key=True)
+    alert_count = Column(Integer, nullable=False, default=0)
@@ -0,0 +1,17 @@
+from sqlalchemy import Column, Integer, String, Float, DateTime, Text
+from sqlalchemy.sql import func
+from app.database.db import Base
+
+class ScoringProfile(Base):
+    __tablename__ = "scoring_profiles"
+    
+    # Named quality score weightings selectable with ?profile=
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String, unique=True, index=True, nullable=False)
+    description = Column(Text)
+    pii_weight = Column(Float, nullable=False)
+    disposition_weight = Column(Float, nullable=False)
+    freshness_weight = Column(Float, nullable=False)
+    coverage_weight = Column(Float, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
@@ -1,5 +1,10 @@
 from .scoring_engine import ScoringEngine
 from .alert_service import AlertService
 from .analysis_service import AnalysisService
+from .rollup_service import RollupService
+from .scoring_profiles import ScoringProfileService
+from .scoring_kernel import ScoringKernel
+from .alert_stats import AlertStatsService
+from .alert_rules import AlertRuleService
 
-__all__ = ["ScoringEngine", "AlertService", "AnalysisService"]
+__all__ = ["ScoringEngine", "AlertService", "AnalysisService", "RollupService", "ScoringProfileService", "ScoringKernel", "AlertStatsService", "AlertRuleService"]
@@ -0,0 +1,134 @@
+import json
+import logging
+import os
+import zlib
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional
+from sqlalchemy import func, select, insert, delete
+from sqlalchemy.orm import Session
+from app.models import *
+from app.services.leased_scheduler import LeasedScheduler
+
+logger = logging.getLogger(__name__)
+
+# Resolved alerts older than this many days move to alerts_archive; 0 keeps everything in alerts
+ALERT_ARCHIVE_AFTER_DAYS = int(os.getenv("ALERT_ARCHIVE_AFTER_DAYS", "90"))
+
+# Columns shared by alerts and alerts_archive
+ARCHIVED_COLUMNS = (
+    "id", "vendor_id", "alert_type", "severity", "status", "current_value",
+    "threshold_value", "variance_percentage", "triggered_at", "acknowledged_at", "resolved_at"
+)
+
+# Alert text, stored in alerts_archive as one compressed details blob
+COMPRESSED_COLUMNS = ("title", "description")
+
+# Phrases the generated alert texts share; priming zlib with them is what makes short texts compress.
+# Blobs start with a format byte, so a changed dictionary needs a new format, not a rewrite.
+_DETAILS_FORMAT = 1
+_DETAILS_DICTIONARY = (
+    b'{"title": "Quality Anomaly: ", "description": "Vendor  has fallen below threshold for '
+    b'pii_completeness disposition_accuracy turnaround_time  Alert PII Completeness Below Threshold '
+    b'Disposition Accuracy Below Threshold Turnaround Time Above Threshold Coverage Drop Detected '
+    b'Quality Score Drop Detected PII completeness (%) is below threshold (%) Disposition accuracy '
+    b'Average turnaround ( hours) exceeds threshold ( hours) Coverage Quality score over  days '
+    b'has risen above its baseline has fallen below its baseline by  standard deviations '
+    b'(7-day weighted trend) (same weekday in prior weeks)"}'
+)
+
+class AlertArchiveService:
+    """
+    Moves long-resolved alerts out of the alerts table
+    
+    Keeps the alerts table, and with it the alert list and the open-alert
+    index, down to the working set. Archived alerts keep their ids and are
+    still counted in alert_stats, so summaries do not change when alerts are
+    archived; AlertStatsService.rebuild reads both tables. Their title and
+    description are stored as one zlib-compressed details blob.
+    """
+    
+    @staticmethod
+    def archive_resolved(db: Session, now: Optional[datetime] = None, batch_size: int = 5000) -> int:
+        """
+        Move alerts resolved more than ALERT_ARCHIVE_AFTER_DAYS ago into
+        alerts_archive in batches, each copied and deleted in one
+        transaction; returns the number moved
+        
+        Rows pass through Python on the way, since the details blob is
+        compressed here rather than in SQL.
+        """
+        if ALERT_ARCHIVE_AFTER_DAYS <= 0:
+            return 0
+        
+        # Alert timestamps are written in UTC
+        cutoff = (now or datetime.now(timezone.utc)) - timedelta(days=ALERT_ARCHIVE_AFTER_DAYS)
+        archived_at = datetime.now(timezone.utc)
+        # The newest alert stays, so a table without AUTOINCREMENT never hands an archived id out again
+        newest_id = db.query(func.max(Alert.id)).scalar()
+        if newest_id is None:
+            return 0
+        columns = [getattr(Alert, column) for column in (*ARCHIVED_COLUMNS, *COMPRESSED_COLUMNS)]
+        moved = 0
+        while True:
+            rows = db.execute(
+                select(*columns).where(
+                    Alert.status == AlertStatus.RESOLVED,
+                    Alert.resolved_at < cutoff,
+                    Alert.id < newest_id
+                ).order_by(Alert.id).limit(batch_size)
+            ).all()
+            if not rows:
+                break
+            
+            alert_ids = [row.id for row in rows]
+            db.execute(insert(AlertArchive), [
+                {
+                    **{column: getattr(row, column) for column in ARCHIVED_COLUMNS},
+                    "details": AlertArchiveService.pack_details(row.title, row.description),
+                    "archived_at": archived_at
+                }
+                for row in rows
+            ])
+            # A Core delete skips the alert_stats listener, so the archived alerts stay counted
+            db.execute(delete(Alert).where(Alert.id.in_(alert_ids)), execution_options={"synchronize_session": False})
+            db.commit()
+            moved += len(alert_ids)
+        
+        return moved
+    
+    @staticmethod
+    def pack_details(title: Optional[str], description: Optional[str]) -> bytes:
+        """Compress an alert's title and description into one details blob"""
+        compressor = zlib.compressobj(9, zdict=_DETAILS_DICTIONARY)
+        payload = json.dumps({"title": title, "description": description}).encode()
+        return bytes([_DETAILS_FORMAT]) + compressor.compress(payload) + compressor.flush()
+    
+    @staticmethod
+    def unpack_details(blob: bytes) -> Dict[str, Optional[str]]:
+        """{"title", "description"} from a details blob"""
+        if blob[0] != _DETAILS_FORMAT:
+            raise ValueError(f"Unknown alert details format {blob[0]}")
+        decompressor = zlib.decompressobj(zdict=_DETAILS_DICTIONARY)
+        return json.loads(decompressor.decompress(blob[1:]) + decompressor.flush())
+
+class AlertArchiveScheduler(LeasedScheduler):
+    """Archives resolved alerts every interval_seconds, in the worker holding _alert_archive_lease"""
+    
+    lease_table = "_alert_archive_lease"
+    job_name = "Alert archive"
+    
+    @classmethod
+    def from_env(cls) -> "AlertArchiveScheduler":
+        return cls(interval_seconds=float(os.getenv("ALERT_ARCHIVE_INTERVAL_SECONDS", "3600")))
+    
+    @property
+    def enabled(self) -> bool:
+        return super().enabled and ALERT_ARCHIVE_AFTER_DAYS > 0
+    
+    def run_job(self, db: Session, now: float) -> None:
+        # Each batch commits on its own; a crash part way just leaves the rest for the next run
+        archived = AlertArchiveService.archive_resolved(db)
+        self.record_run(db, now)
+        db.commit()
+        if archived:
+            logger.info("Archived %d resolved alerts", archived)
@@ -0,0 +1,123 @@
+import asyncio
+import json
+import os
+import threading
+import uuid
+from collections import deque
+from typing import Any, Dict, List, Optional, Tuple
+
+# (event id, event type, JSON payload)
+AlertEvent = Tuple[str, str, str]
+
+class AlertSubscription:
+    """One subscriber's bounded queue on the event loop that serves its stream"""
+    
+    def __init__(self, loop: asyncio.AbstractEventLoop, queue_size: int):
+        self.loop = loop
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.replay: List[AlertEvent] = []
+        self.reset = False
+        self.overflowed = False
+    
+    def offer(self, event: AlertEvent) -> None:
+        # Called from publisher threads; the queue is only touched on its own loop
+        try:
+            self.loop.call_soon_threadsafe(self._put, event)
+        except RuntimeError:
+            # The loop has closed; the stream is gone
+            pass
+    
+    def _put(self, event: AlertEvent) -> None:
+        if self.overflowed:
+            return
+        if self.queue.full():
+            # A subscriber this far behind is cut off and replays from the ring buffer on reconnect
+            self.overflowed = True
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(None)
+            return
+        self.queue.put_nowait(event)
+    
+    async def get(self) -> Optional[AlertEvent]:
+        """Next event, or None once the subscriber has fallen too far behind"""
+        return await self.queue.get()
+
+class AlertEventBus:
+    """
+    In-process pub/sub for alert changes, feeding /api/alerts/stream
+    
+    Every published event gets an id of the form "<epoch>:<sequence>" and is
+    kept in a ring buffer of the last buffer_size events. A subscriber that
+    reconnects with a Last-Event-ID still in the buffer is replayed what it
+    missed; otherwise it is told to reset and refetch. Each subscriber has a
+    bounded queue, so a slow client is disconnected rather than holding
+    memory. The bus only sees changes made in this worker process.
+    """
+    
+    def __init__(self, buffer_size: int = 1000, queue_size: int = 256):
+        self.queue_size = queue_size
+        self.epoch = uuid.uuid4().hex[:8]
+        self._sequence = 0
+        self._buffer: "deque[Tuple[int, AlertEvent]]" = deque(maxlen=buffer_size)
+        self._subscribers: set = set()
+        self._lock = threading.Lock()
+    
+    @classmethod
+    def from_env(cls) -> "AlertEventBus":
+        return cls(
+            buffer_size=int(os.getenv("ALERT_STREAM_BUFFER_SIZE", "1000")),
+            queue_size=int(os.getenv("ALERT_STREAM_QUEUE_SIZE", "256"))
+        )
+    
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+    
+    def publish(self, event_type: str, payload: Dict[str, Any]) -> str:
+        """Append an event to the ring buffer and fan it out; returns its id"""
+        data = json.dumps(payload, default=str)
+        with self._lock:
+            self._sequence += 1
+            event = (f"{self.epoch}:{self._sequence}", event_type, data)
+            self._buffer.append((self._sequence, event))
+            # Offered under the lock so every subscriber sees events in sequence order
+            for subscription in self._subscribers:
+                subscription.offer(event)
+        return event[0]
+    
+    def subscribe(self, last_event_id: Optional[str] = None) -> AlertSubscription:
+        """
+        Register a subscriber on the running event loop
+        
+        With last_event_id, events after it are placed in replay, or reset is
+        set when it is from another process or no longer buffered.
+        """
+        subscription = AlertSubscription(asyncio.get_running_loop(), self.queue_size)
+        with self._lock:
+            if last_event_id:
+                after = self._sequence_after(last_event_id)
+                if after is None:
+                    subscription.reset = True
+                else:
+                    subscription.replay = [event for sequence, event in self._buffer if sequence > after]
+            # Registered under the same lock as the replay snapshot, so no event falls between them
+            self._subscribers.add(subscription)
+        return subscription
+    
+    def unsubscribe(self, subscription: AlertSubscription) -> None:
+        with self._lock:
+            self._subscribers.discard(subscription)
+    
+    def _sequence_after(self, last_event_id: str) -> Optional[int]:
+        epoch, _, sequence = last_event_id.partition(":")
+        if epoch != self.epoch or not sequence.isdigit():
+            return None
+        sequence = int(sequence)
+        oldest = self._buffer[0][0] if self._buffer else self._sequence + 1
+        # Anything between the client's last event and the oldest buffered one is lost
+        if sequence > self._sequence or sequence < oldest - 1:
+            return None
+        return sequence
+
+alert_event_bus = AlertEventBus.from_env()
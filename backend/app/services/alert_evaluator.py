@@ -0,0 +1,274 @@
+import logging
+import os
+import threading
+import time
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import and_
+from sqlalchemy.orm import Session
+from app.database.db import SessionLocal
+from app.models import *
+from app.services.alert_service import SLA_WINDOWS, AlertService
+from app.services.anomaly_detector import quality_anomaly_detector
+
+logger = logging.getLogger(__name__)
+
+_MAX_WINDOW_DAYS = max(SLA_WINDOWS.values())
+
+class _VendorWindow:
+    """One vendor's vendor_daily_quality counters for the days inside the longest window"""
+    
+    __slots__ = ("days", "read_started", "read_finished")
+    
+    def __init__(self, read_started: float, read_finished: float):
+        self.days: Dict[date, List[float]] = {}
+        self.read_started = read_started
+        self.read_finished = read_finished
+    
+    def add(self, day: date, delta: Iterable[float]) -> None:
+        counters = self.days.setdefault(day, [0, 0, 0, 0.0, 0.0])
+        for i, amount in enumerate(delta):
+            counters[i] += amount
+    
+    def absorb(self, day: date, delta: Iterable[float], commit_started: float, committed_at: float) -> bool:
+        """
+        Fold in a committed delta unless the read already saw it; False when
+        the commit overlapped the read, so the read may or may not hold it
+        """
+        if committed_at < self.read_started:
+            return True
+        if commit_started > self.read_finished:
+            self.add(day, delta)
+            return True
+        return False
+    
+    def current_value(self, alert_type: AlertType, today: date) -> Optional[float]:
+        """Windowed metric for an alert type, or None with no records in the window"""
+        cutoff = today - timedelta(days=SLA_WINDOWS[alert_type])
+        records = pii_complete = verified = turnaround = 0.0
+        for day, counters in self.days.items():
+            if day >= cutoff:
+                records += counters[0]
+                pii_complete += counters[1]
+                verified += counters[2]
+                turnaround += counters[3]
+        
+        if records <= 0:
+            return None
+        return AlertService.window_value(alert_type, records, pii_complete, verified, turnaround)
+    
+    def prune(self, today: date) -> None:
+        cutoff = today - timedelta(days=_MAX_WINDOW_DAYS)
+        for day in [day for day in self.days if day < cutoff]:
+            del self.days[day]
+
+class StreamingAlertEvaluator:
+    """
+    Evaluates alert thresholds as criminal records are committed
+    
+    The rollup listeners hand every committed batch of vendor-day counter
+    deltas to submit(), which folds them into in-memory rolling windows and
+    queues the vendors. A background thread collects the queued vendors for
+    batch_seconds, checks their active AlertConfigurations against the
+    windowed values, runs the quality anomaly detector over their daily
+    history, and hands the results to AlertService.apply_evaluations, which
+    raises, refreshes and resolves alerts against the open-alert index.
+    
+    A vendor's window is read from vendor_daily_quality the first time it is
+    needed and re-read after resync_seconds, which bounds drift from writes
+    made by other worker processes. Reads run outside the lock, so submit()
+    never waits on the database.
+    """
+    
+    def __init__(self, batch_seconds: float = 1.0, resync_seconds: float = 600.0):
+        self.batch_seconds = batch_seconds
+        self.resync_seconds = resync_seconds
+        self._windows: Dict[int, _VendorWindow] = {}
+        # Deltas committed while a vendor's window is being read, settled against it once the read is done
+        self._loading: Dict[int, List[tuple]] = {}
+        self._pending: set = set()
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+    
+    @classmethod
+    def from_env(cls) -> "StreamingAlertEvaluator":
+        return cls(
+            batch_seconds=float(os.getenv("ALERT_STREAM_BATCH_SECONDS", "1")),
+            resync_seconds=float(os.getenv("ALERT_STREAM_RESYNC_SECONDS", "600"))
+        )
+    
+    @property
+    def running(self) -> bool:
+        return self._thread is not None
+    
+    def start(self) -> None:
+        if self.batch_seconds <= 0 or self._thread is not None:
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name="alert-evaluator", daemon=True)
+        self._thread.start()
+    
+    def stop(self) -> None:
+        if self._thread is None:
+            return
+        self._stopping.set()
+        self._wake.set()
+        self._thread.join()
+        self._thread = None
+        with self._lock:
+            self._windows.clear()
+            self._loading.clear()
+            self._pending.clear()
+    
+    def submit(self, daily_deltas: Dict[Tuple[int, date], List[float]], commit_started: float,
+               committed_at: float) -> None:
+        """
+        Fold committed vendor-day deltas into the loaded windows and queue
+        their vendors
+        
+        commit_started and committed_at are time.monotonic() stamps taken
+        before the transaction committed and once it had. A window read
+        entirely before the commit started takes the deltas, one read after
+        it finished already holds them, and one whose read overlapped the
+        commit is dropped and re-read on evaluation.
+        """
+        if self._thread is None or not daily_deltas:
+            return
+        with self._lock:
+            for (vendor_id, day), delta in daily_deltas.items():
+                if vendor_id is None:
+                    continue
+                # Windows not loaded yet will read these counters from the database
+                window = self._windows.get(vendor_id)
+                if window is not None and not window.absorb(day, delta, commit_started, committed_at):
+                    del self._windows[vendor_id]
+                loading = self._loading.get(vendor_id)
+                if loading is not None:
+                    loading.append((day, delta, commit_started, committed_at))
+                self._pending.add(vendor_id)
+        self._wake.set()
+    
+    def _run(self) -> None:
+        while not self._stopping.is_set():
+            self._wake.wait()
+            # Let the rest of the ingest batch arrive before evaluating
+            if self._stopping.wait(self.batch_seconds):
+                break
+            self._wake.clear()
+            with self._lock:
+                vendor_ids, self._pending = self._pending, set()
+            if not vendor_ids:
+                continue
+            
+            db = SessionLocal()
+            try:
+                outcome = self.evaluate(db, vendor_ids)
+                if outcome["created"] or outcome["resolved"]:
+                    logger.info(
+                        "Alert evaluation for %d vendors: %d raised, %d resolved, %d suppressed",
+                        len(vendor_ids), outcome["created"], outcome["resolved"], outcome["suppressed"]
+                    )
+            except Exception:
+                db.rollback()
+                logger.exception("Streaming alert evaluation failed")
+            finally:
+                db.close()
+    
+    def evaluate(self, db: Session, vendor_ids: Iterable[int]) -> Dict[str, int]:
+        """
+        Check the windowed metrics of these vendors and persist the outcome
+        through the open-alert index; returns counts per outcome
+        """
+        vendor_ids = set(vendor_ids)
+        configs = db.query(
+            AlertConfiguration.vendor_id,
+            AlertConfiguration.alert_type,
+            AlertConfiguration.threshold_value
+        ).join(Vendor, Vendor.id == AlertConfiguration.vendor_id).filter(
+            and_(
+                AlertConfiguration.vendor_id.in_(vendor_ids),
+                AlertConfiguration.alert_type.in_(list(SLA_WINDOWS)),
+                AlertConfiguration.is_active == True,
+                Vendor.is_active == True
+            )
+        ).order_by(AlertConfiguration.vendor_id, AlertConfiguration.id).all()
+        
+        today = datetime.now().date()
+        windows = self._load_windows(db, {config.vendor_id for config in configs}, today)
+        with self._lock:
+            current_values = [
+                windows[config.vendor_id].current_value(config.alert_type, today) for config in configs
+            ]
+        
+        evaluations = {}
+        for config, current_value in zip(configs, current_values):
+            # No records in the window is neither a breach nor a recovery
+            if current_value is not None:
+                evaluations[(config.vendor_id, config.alert_type)] = AlertService.evaluate_threshold(
+                    config.alert_type, current_value, config.threshold_value
+                )
+        
+        # Anomalies need the full daily history rather than the windows, so they are read from the database
+        evaluations.update(quality_anomaly_detector.evaluations(db, vendor_ids))
+        
+        return AlertService.apply_evaluations(db, evaluations)
+    
+    def _load_windows(self, db: Session, vendor_ids: Iterable[int], today: date) -> Dict[int, _VendorWindow]:
+        """
+        Windows of these vendors, reading the missing and stale ones with one
+        query made without holding the lock
+        """
+        read_started = time.monotonic()
+        with self._lock:
+            for window in self._windows.values():
+                window.prune(today)
+            windows = {
+                vendor_id: self._windows[vendor_id] for vendor_id in vendor_ids
+                if vendor_id in self._windows
+                and read_started - self._windows[vendor_id].read_started <= self.resync_seconds
+            }
+            stale = [vendor_id for vendor_id in vendor_ids if vendor_id not in windows]
+            for vendor_id in stale:
+                self._loading.setdefault(vendor_id, [])
+        if not stale:
+            return windows
+        
+        try:
+            rows = db.query(
+                VendorDailyQuality.vendor_id,
+                VendorDailyQuality.day,
+                VendorDailyQuality.record_count,
+                VendorDailyQuality.pii_complete_count,
+                VendorDailyQuality.verified_count,
+                VendorDailyQuality.turnaround_sum,
+                VendorDailyQuality.freshness_sum
+            ).filter(
+                and_(
+                    VendorDailyQuality.vendor_id.in_(stale),
+                    VendorDailyQuality.day >= today - timedelta(days=_MAX_WINDOW_DAYS)
+                )
+            ).all()
+        except Exception:
+            with self._lock:
+                for vendor_id in stale:
+                    self._loading.pop(vendor_id, None)
+            raise
+        read_finished = time.monotonic()
+        
+        loaded = {vendor_id: _VendorWindow(read_started, read_finished) for vendor_id in stale}
+        for row in rows:
+            loaded[row.vendor_id].add(row.day, row[2:])
+        with self._lock:
+            for vendor_id, window in loaded.items():
+                settled = [window.absorb(*entry) for entry in self._loading.pop(vendor_id, ())]
+                # A window that may hold a delta twice still serves this evaluation, but is re-read next time
+                if all(settled):
+                    self._windows[vendor_id] = window
+                else:
+                    self._windows.pop(vendor_id, None)
+                windows[vendor_id] = window
+        return windows
+
+streaming_alert_evaluator = StreamingAlertEvaluator.from_env()
@@ -0,0 +1,140 @@
+import os
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional, Tuple
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from app.models import *
+
+AlertKey = Tuple[int, AlertType]
+
+class _OpenAlert:
+    __slots__ = ("id", "current_value")
+    
+    def __init__(self, alert_id: int, current_value: Optional[float]):
+        self.id = alert_id
+        self.current_value = current_value
+
+class OpenAlertIndex:
+    """
+    In-memory index of open (active or acknowledged) alerts keyed by
+    (vendor_id, alert_type), plus the time each key was last resolved
+    
+    Loaded from the alerts table on first use and kept up to date by
+    AlertService as alerts are created and resolved. It is re-read after
+    resync_seconds to pick up changes made by other worker processes. A key
+    resolved less than its cooldown ago does not raise a new alert.
+    """
+    
+    def __init__(self, cooldown_seconds: float = 3600.0, cooldowns: Optional[Dict[AlertType, float]] = None,
+                 resync_seconds: float = 600.0):
+        self.cooldown_seconds = cooldown_seconds
+        self.cooldowns = cooldowns or {}
+        self.resync_seconds = resync_seconds
+        self._open: Dict[AlertKey, _OpenAlert] = {}
+        self._resolved_at: Dict[AlertKey, datetime] = {}
+        self._loaded_at: Optional[float] = None
+        self._lock = threading.Lock()
+    
+    @classmethod
+    def from_env(cls) -> "OpenAlertIndex":
+        # ALERT_COOLDOWN_SECONDS_<TYPE>, e.g. ALERT_COOLDOWN_SECONDS_TURNAROUND_TIME, overrides the default per type
+        cooldowns = {
+            alert_type: float(os.environ[f"ALERT_COOLDOWN_SECONDS_{alert_type.name}"])
+            for alert_type in AlertType
+            if f"ALERT_COOLDOWN_SECONDS_{alert_type.name}" in os.environ
+        }
+        return cls(
+            cooldown_seconds=float(os.getenv("ALERT_COOLDOWN_SECONDS", "3600")),
+            cooldowns=cooldowns,
+            resync_seconds=float(os.getenv("ALERT_INDEX_RESYNC_SECONDS", "600"))
+        )
+    
+    def cooldown_for(self, alert_type: AlertType) -> float:
+        return self.cooldowns.get(alert_type, self.cooldown_seconds)
+    
+    def ensure_loaded(self, db: Session) -> None:
+        """Read open alerts and recent resolutions with two queries when not loaded or stale"""
+        with self._lock:
+            if self._loaded_at is not None and time.monotonic() - self._loaded_at < self.resync_seconds:
+                return
+        
+        open_alerts = {}
+        rows = db.query(Alert.id, Alert.vendor_id, Alert.alert_type, Alert.current_value).filter(
+            Alert.status.in_([AlertStatus.ACTIVE, AlertStatus.ACKNOWLEDGED])
+        ).order_by(Alert.id)
+        for row in rows:
+            # Older duplicates from before the index existed are shadowed by the newest
+            open_alerts[(row.vendor_id, row.alert_type)] = _OpenAlert(row.id, row.current_value)
+        
+        longest = max([self.cooldown_seconds, *self.cooldowns.values()])
+        resolved_at = {
+            (row.vendor_id, row.alert_type): _as_utc(row.resolved_at)
+            for row in db.query(
+                Alert.vendor_id, Alert.alert_type, func.max(Alert.resolved_at).label("resolved_at")
+            ).filter(
+                Alert.status == AlertStatus.RESOLVED,
+                Alert.resolved_at >= datetime.now(timezone.utc) - timedelta(seconds=longest)
+            ).group_by(Alert.vendor_id, Alert.alert_type)
+        }
+        
+        with self._lock:
+            self._open = open_alerts
+            self._resolved_at = resolved_at
+            self._loaded_at = time.monotonic()
+    
+    def plan(self, evaluations: Dict[AlertKey, Optional[Dict]], now: datetime):
+        """
+        Split evaluated keys into alerts to create, open alerts to refresh
+        and open alerts to resolve
+        
+        evaluations maps each checked key to its alert dict when breaching
+        and None when within threshold. Returns (create, refresh, resolve,
+        suppressed): lists of (key, alert dict), (key, alert id, alert dict)
+        and (key, alert id), and the count of breaches held back by a cooldown.
+        now, like every alert timestamp, is UTC-aware.
+        """
+        create, refresh, resolve = [], [], []
+        suppressed = 0
+        with self._lock:
+            for key, alert in evaluations.items():
+                open_alert = self._open.get(key)
+                if alert is None:
+                    if open_alert is not None:
+                        resolve.append((key, open_alert.id))
+                elif open_alert is not None:
+                    if open_alert.current_value != alert["current_value"]:
+                        refresh.append((key, open_alert.id, alert))
+                else:
+                    resolved_at = self._resolved_at.get(key)
+                    if resolved_at is not None and (now - resolved_at).total_seconds() < self.cooldown_for(key[1]):
+                        suppressed += 1
+                    else:
+                        create.append((key, alert))
+        return create, refresh, resolve, suppressed
+    
+    def record_open(self, key: AlertKey, alert_id: int, current_value: Optional[float]) -> None:
+        with self._lock:
+            self._open[key] = _OpenAlert(alert_id, current_value)
+    
+    def record_resolved(self, key: AlertKey, alert_id: int, resolved_at: datetime) -> None:
+        with self._lock:
+            open_alert = self._open.get(key)
+            if open_alert is not None and open_alert.id == alert_id:
+                del self._open[key]
+            self._resolved_at[key] = resolved_at
+    
+    def clear(self) -> None:
+        with self._lock:
+            self._open.clear()
+            self._resolved_at.clear()
+            self._loaded_at = None
+
+def _as_utc(value: datetime) -> datetime:
+    # Alert timestamps are written in UTC; SQLite hands them back naive, PostgreSQL zone-aware
+    if value is not None and value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+open_alert_index = OpenAlertIndex.from_env()
@@ -0,0 +1,294 @@
+import operator
+from sqlalchemy.orm import Session
+from sqlalchemy import and_, case, func, cast, null, select, Integer
+from datetime import datetime, timedelta, time
+from typing import List, Dict, Any, Optional, Tuple
+from app.models import *
+
+# Metric name: (label, unit, alert type raised by default)
+RULE_METRICS = {
+    "avg_turnaround_hours": ("Average turnaround", "hours", AlertType.TURNAROUND_TIME),
+    "p95_turnaround_hours": ("95th percentile turnaround", "hours", AlertType.TURNAROUND_TIME),
+    "pii_completeness": ("PII completeness", "%", AlertType.PII_COMPLETENESS),
+    "disposition_accuracy": ("Disposition accuracy", "%", AlertType.DISPOSITION_ACCURACY),
+    "avg_freshness_days": ("Average freshness", "days", AlertType.QUALITY_DROP),
+    "record_count": ("Record count", "records", AlertType.COVERAGE_DROP)
+}
+
+RULE_COMPARATORS = {
+    "<": (operator.lt, "is below"),
+    "<=": (operator.le, "is at or below"),
+    ">": (operator.gt, "exceeds"),
+    ">=": (operator.ge, "is at or above")
+}
+
+MAX_WINDOW_DAYS = 365
+
+# (metric, window_days, jurisdiction_id): rules sharing one are served by the same aggregate column
+AggregateKey = Tuple[str, int, Optional[int]]
+
+class AlertRuleService:
+    """
+    Declarative alert rules evaluated together in one grouped query
+    
+    Each rule is a comparator and threshold on a metric of the vendor's
+    records delivered in the last window_days whole days, optionally in one
+    jurisdiction. Every distinct (metric, window, jurisdiction) compiles to
+    a conditional aggregate, and all of them are computed in a single pass
+    over criminal_records grouped by vendor, so new rules add columns to that
+    query rather than queries.
+    """
+    
+    @staticmethod
+    def list_rules(db: Session) -> List[Dict[str, Any]]:
+        """All stored rules"""
+        rules = db.query(AlertRule).order_by(AlertRule.id).all()
+        return [AlertRuleService._to_dict(rule) for rule in rules]
+    
+    @staticmethod
+    def get_rule(db: Session, rule_id: int) -> Optional[Dict[str, Any]]:
+        """One rule, or None"""
+        rule = db.get(AlertRule, rule_id)
+        return AlertRuleService._to_dict(rule) if rule else None
+    
+    @staticmethod
+    def save_rule(db: Session, data: Dict[str, Any], rule_id: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Create a rule, or replace rule_id; alert_type defaults to the metric's
+        
+        Raises ValueError for an unknown metric, comparator, vendor or
+        jurisdiction, a window outside 1-365 days, or an unknown rule_id.
+        """
+        if data["metric"] not in RULE_METRICS:
+            raise ValueError(f"Unknown metric: {data['metric']}")
+        if data["comparator"] not in RULE_COMPARATORS:
+            raise ValueError(f"Unknown comparator: {data['comparator']}")
+        window_days = data.get("window_days") or 30
+        if not 1 <= window_days <= MAX_WINDOW_DAYS:
+            raise ValueError(f"window_days must be between 1 and {MAX_WINDOW_DAYS}")
+        if data.get("vendor_id") is not None and db.get(Vendor, data["vendor_id"]) is None:
+            raise ValueError(f"Unknown vendor: {data['vendor_id']}")
+        if data.get("jurisdiction_id") is not None and db.get(Jurisdiction, data["jurisdiction_id"]) is None:
+            raise ValueError(f"Unknown jurisdiction: {data['jurisdiction_id']}")
+        
+        if rule_id is None:
+            rule = AlertRule()
+            db.add(rule)
+        else:
+            rule = db.get(AlertRule, rule_id)
+            if rule is None:
+                raise ValueError(f"Unknown alert rule: {rule_id}")
+        
+        rule.name = data["name"]
+        rule.vendor_id = data.get("vendor_id")
+        rule.jurisdiction_id = data.get("jurisdiction_id")
+        rule.metric = data["metric"]
+        rule.window_days = window_days
+        rule.comparator = data["comparator"]
+        rule.threshold = data["threshold"]
+        rule.severity = AlertSeverity(data["severity"])
+        rule.alert_type = AlertType(data.get("alert_type") or RULE_METRICS[data["metric"]][2])
+        rule.is_active = data.get("is_active", True)
+        db.commit()
+        
+        return AlertRuleService._to_dict(rule)
+    
+    @staticmethod
+    def delete_rule(db: Session, rule_id: int) -> bool:
+        """Delete a rule; False if it does not exist"""
+        rule = db.get(AlertRule, rule_id)
+        if rule is None:
+            return False
+        db.delete(rule)
+        db.commit()
+        return True
+    
+    @staticmethod
+    def evaluate(db: Session, vendor_ids: Optional[List[int]] = None,
+                 now: Optional[datetime] = None) -> Dict[int, Dict[str, Any]]:
+        """
+        Evaluate every active rule for the given vendors, active or not, or
+        for every active vendor it applies to when vendor_ids is None
+        
+        Uses two queries however many rules and vendors there are: the
+        active rules, then one grouped aggregate over the records. On SQLite
+        each distinct 95th percentile window takes one more. Returns
+        {vendor_id: {"vendor_name", "alerts"}} for each vendor in scope of a
+        rule; a metric with no records in its window raises nothing, except
+        record_count, which is then 0.
+        """
+        query = db.query(AlertRule, Jurisdiction.name).outerjoin(
+            Jurisdiction, Jurisdiction.id == AlertRule.jurisdiction_id
+        ).filter(AlertRule.is_active == True)
+        if vendor_ids is not None:
+            query = query.filter((AlertRule.vendor_id == None) | AlertRule.vendor_id.in_(vendor_ids))
+        rules = query.order_by(AlertRule.id).all()
+        if not rules:
+            return {}
+        
+        today = (now or datetime.now()).date()
+        sqlite = db.get_bind().dialect.name == "sqlite"
+        aggregate_keys = sorted(
+            {(rule.metric, rule.window_days, rule.jurisdiction_id) for rule, _ in rules},
+            key=lambda key: (key[0], key[1], key[2] or 0)
+        )
+        cutoffs = {key: datetime.combine(today - timedelta(days=key[1]), time.min) for key in aggregate_keys}
+        
+        # Records outside the widest window never reach the aggregates
+        query = db.query(
+            Vendor.id,
+            Vendor.name,
+            *[
+                AlertRuleService._compile(key, cutoffs[key], sqlite).label(f"m{position}")
+                for position, key in enumerate(aggregate_keys)
+            ]
+        ).outerjoin(
+            CriminalRecord,
+            and_(
+                CriminalRecord.vendor_id == Vendor.id,
+                CriminalRecord.vendor_delivery_date >= min(cutoffs.values())
+            )
+        )
+        if vendor_ids is not None:
+            query = query.filter(Vendor.id.in_(vendor_ids))
+        else:
+            query = query.filter(Vendor.is_active == True)
+        if all(rule.vendor_id is not None for rule, _ in rules):
+            query = query.filter(Vendor.id.in_({rule.vendor_id for rule, _ in rules}))
+        rows = query.group_by(Vendor.id, Vendor.name).all()
+        
+        percentiles = {
+            key: AlertRuleService._sqlite_p95(db, key, cutoffs[key], [row.id for row in rows])
+            for key in aggregate_keys
+            if sqlite and key[0] == "p95_turnaround_hours"
+        }
+        
+        results = {}
+        for row in rows:
+            values = {
+                key: percentiles[key].get(row.id) if key in percentiles
+                else None if row[position + 2] is None else float(row[position + 2])
+                for position, key in enumerate(aggregate_keys)
+            }
+            for rule, jurisdiction_name in rules:
+                if rule.vendor_id is not None and rule.vendor_id != row.id:
+                    continue
+                vendor_result = results.setdefault(row.id, {"vendor_name": row.name, "alerts": []})
+                alert = AlertRuleService._check(
+                    rule, jurisdiction_name, values[(rule.metric, rule.window_days, rule.jurisdiction_id)]
+                )
+                if alert:
+                    vendor_result["alerts"].append(alert)
+        
+        return results
+    
+    @staticmethod
+    def _condition(key: AggregateKey, cutoff: datetime):
+        """Records inside one (metric, window, jurisdiction)"""
+        condition = CriminalRecord.vendor_delivery_date >= cutoff
+        if key[2] is not None:
+            condition = and_(condition, CriminalRecord.jurisdiction_id == key[2])
+        return condition
+    
+    @staticmethod
+    def _compile(key: AggregateKey, cutoff: datetime, sqlite: bool):
+        """SQL aggregate for one (metric, window, jurisdiction) over the grouped records"""
+        metric = key[0]
+        condition = AlertRuleService._condition(key, cutoff)
+        
+        # Rows outside the condition become NULL, which every aggregate below skips
+        if metric == "avg_turnaround_hours":
+            return func.avg(case((condition, CriminalRecord.turnaround_hours)))
+        if metric == "p95_turnaround_hours":
+            if sqlite:
+                # No percentile_cont in SQLite; _sqlite_p95 computes it in a query of its own
+                return null()
+            return func.percentile_cont(0.95).within_group(case((condition, CriminalRecord.turnaround_hours)))
+        if metric == "pii_completeness":
+            return func.avg(case((condition, case((CriminalRecord.pii_status == PIIStatus.COMPLETE, 100.0), else_=0.0))))
+        if metric == "disposition_accuracy":
+            return func.avg(case((condition, case((CriminalRecord.disposition_verified == True, 100.0), else_=0.0))))
+        if metric == "avg_freshness_days":
+            return func.avg(case((condition, CriminalRecord.freshness_days)))
+        if metric == "record_count":
+            return func.count(case((condition, CriminalRecord.id)))
+        raise ValueError(f"Unknown metric: {metric}")
+    
+    @staticmethod
+    def _sqlite_p95(db: Session, key: AggregateKey, cutoff: datetime, vendor_ids: List[int]) -> Dict[int, float]:
+        """
+        95th percentile turnaround per vendor, interpolated as percentile_cont
+        does, from one query that ranks each vendor's values and returns only
+        the two around the percentile, so memory does not grow with the window
+        """
+        if not vendor_ids:
+            return {}
+        turnaround = CriminalRecord.turnaround_hours
+        ranked = select(
+            CriminalRecord.vendor_id,
+            turnaround.label("value"),
+            (func.row_number().over(partition_by=CriminalRecord.vendor_id, order_by=turnaround) - 1).label("rank"),
+            func.count().over(partition_by=CriminalRecord.vendor_id).label("n")
+        ).where(
+            AlertRuleService._condition(key, cutoff),
+            CriminalRecord.vendor_id.in_(vendor_ids),
+            turnaround.isnot(None)
+        ).subquery()
+        lower = cast(0.95 * (ranked.c.n - 1), Integer)  # CAST truncates, which is floor for these
+        rows = db.execute(
+            select(ranked.c.vendor_id, ranked.c.value, ranked.c.rank, ranked.c.n).where(
+                ranked.c.rank.between(lower, lower + 1)
+            ).order_by(ranked.c.vendor_id, ranked.c.rank)
+        )
+        
+        bounds = {}
+        for row in rows:
+            bounds.setdefault(row.vendor_id, (row.n, []))[1].append(row.value)
+        percentiles = {}
+        for vendor_id, (n, values) in bounds.items():
+            position = 0.95 * (n - 1)
+            fraction = position - int(position)
+            upper = values[1] if len(values) > 1 else values[0]
+            percentiles[vendor_id] = values[0] + (upper - values[0]) * fraction
+        return percentiles
+    
+    @staticmethod
+    def _check(rule: AlertRule, jurisdiction_name: Optional[str], current_value: Optional[float]) -> Optional[Dict]:
+        """Alert dict, in the shape of AlertService.evaluate_threshold, if the rule is breached"""
+        if current_value is None:
+            return None
+        compare, verb = RULE_COMPARATORS[rule.comparator]
+        if not compare(current_value, rule.threshold):
+            return None
+        
+        label, unit, _ = RULE_METRICS[rule.metric]
+        scope = f" in {jurisdiction_name}" if jurisdiction_name else ""
+        return {
+            "type": rule.alert_type.value,
+            "severity": rule.severity.value,
+            "title": rule.name,
+            "description": (
+                f"{label}{scope} over {rule.window_days} days ({current_value:.1f} {unit}) "
+                f"{verb} threshold ({rule.threshold} {unit})"
+            ),
+            "current_value": current_value,
+            "threshold_value": rule.threshold,
+            "variance": abs(current_value - rule.threshold),
+            "rule_id": rule.id
+        }
+    
+    @staticmethod
+    def _to_dict(rule: AlertRule) -> Dict[str, Any]:
+        return {
+            "id": rule.id,
+            "name": rule.name,
+            "vendor_id": rule.vendor_id,
+            "jurisdiction_id": rule.jurisdiction_id,
+            "metric": rule.metric,
+            "window_days": rule.window_days,
+            "comparator": rule.comparator,
+            "threshold": rule.threshold,
+            "severity": rule.severity.value,
+            "alert_type": rule.alert_type.value,
+            "is_active": rule.is_active
+        }
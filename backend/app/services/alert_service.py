@@ -1,9 +1,54 @@
+import base64
+import json
+from collections import defaultdict
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, desc, func
-from datetime import datetime, timedelta
-from typing import List, Dict, Any
+from sqlalchemy import and_, case, desc, func, insert, update, select, literal, union_all, bindparam, tuple_, type_coerce, String, Text, LargeBinary
+from datetime import date, datetime, timedelta, timezone
+from typing import List, Dict, Any, Optional, Tuple
 from app.models import *
-from app.services.scoring_engine import ScoringEngine
+from app.services.alert_index import open_alert_index
+from app.services.alert_stats import AlertStatsService
+from app.services.alert_rules import AlertRuleService
+from app.services.alert_bus import alert_event_bus
+from app.services.alert_archive import ARCHIVED_COLUMNS, AlertArchiveService
+
+# Bulk status changes larger than this publish one reset event instead of one event per alert
+_BULK_EVENT_LIMIT = 100
+
+# Alert ids per bulk status UPDATE, well under the bound-parameter limits of SQLite and PostgreSQL
+_UPDATE_CHUNK = 10000
+
+# Rolling window, in whole days up to today, over which each record-driven alert type is judged;
+# the SLA check and the streaming evaluator share it so both reach the same verdict per key
+SLA_WINDOWS = {
+    AlertType.TURNAROUND_TIME: 7,
+    AlertType.PII_COMPLETENESS: 30,
+    AlertType.DISPOSITION_ACCURACY: 30
+}
+
+# Per alert type: severity, title, description template and whether exceeding the threshold is the breach
+_SLA_RULES = {
+    AlertType.PII_COMPLETENESS: (
+        AlertSeverity.HIGH, "PII Completeness Below Threshold",
+        "PII completeness ({current:.1f}%) is below threshold ({threshold}%)", False
+    ),
+    AlertType.DISPOSITION_ACCURACY: (
+        AlertSeverity.HIGH, "Disposition Accuracy Below Threshold",
+        "Disposition accuracy ({current:.1f}%) is below threshold ({threshold}%)", False
+    ),
+    AlertType.TURNAROUND_TIME: (
+        AlertSeverity.MEDIUM, "Turnaround Time Above Threshold",
+        "Average turnaround ({current:.1f} hours) exceeds threshold ({threshold} hours)", True
+    ),
+    AlertType.COVERAGE_DROP: (
+        AlertSeverity.MEDIUM, "Coverage Drop Detected",
+        "Coverage ({current:.1f}%) is below threshold ({threshold}%)", False
+    ),
+    AlertType.QUALITY_DROP: (
+        AlertSeverity.HIGH, "Quality Score Drop Detected",
+        "Quality score ({current:.1f}) is below threshold ({threshold})", False
+    )
+}
 
 class AlertService:
     """Production-level alert monitoring and SLA breach detection"""
@@ -12,155 +57,398 @@ class AlertService:
     def check_sla_compliance(db: Session, vendor_id: int) -> List[Dict]:
         """Check if vendor is meeting SLA thresholds"""
         
-        vendor = db.query(Vendor).filter(Vendor.id == vendor_id).first()
-        if not vendor:
-            return []
+        return AlertService.check_all_sla(db, [vendor_id]).get(vendor_id, {}).get("alerts", [])
+    
+    @staticmethod
+    def check_all_sla(db: Session, vendor_ids: Optional[List[int]] = None) -> Dict[int, Dict[str, Any]]:
+        """
+        Evaluate every active alert configuration for the given vendors,
+        active or not, or for every active vendor when vendor_ids is None
         
-        alerts = []
+        Uses two set-based queries however many vendors there are: active
+        configurations joined to their vendors, and the SLA_WINDOWS metrics
+        from vendor_daily_quality. Active alert rules are then evaluated by
+        AlertRuleService in two more. Returns
+        {vendor_id: {"vendor_name", "alerts"}} for each vendor with a config
+        or rule.
+        """
+        configs = db.query(
+            AlertConfiguration.vendor_id,
+            AlertConfiguration.alert_type,
+            AlertConfiguration.threshold_value,
+            Vendor.name,
+            Vendor.coverage_percentage,
+            Vendor.quality_score
+        ).join(Vendor, Vendor.id == AlertConfiguration.vendor_id).filter(AlertConfiguration.is_active == True)
+        if vendor_ids is not None:
+            configs = configs.filter(AlertConfiguration.vendor_id.in_(vendor_ids))
+        else:
+            configs = configs.filter(Vendor.is_active == True)
+        configs = configs.order_by(AlertConfiguration.vendor_id, AlertConfiguration.id).all()
         
-        # Get current metrics
-        metrics = ScoringEngine.calculate_vendor_quality_score(db, vendor_id)
+        checked_ids = sorted({config.vendor_id for config in configs})
+        windowed = AlertService.windowed_metrics(db, checked_ids) if checked_ids else {}
         
-        # Get alert configurations for this vendor
-        configs = db.query(AlertConfiguration).filter(
+        results = {}
+        for config in configs:
+            vendor_result = results.setdefault(config.vendor_id, {"vendor_name": config.name, "alerts": []})
+            current_values = {
+                **windowed.get(config.vendor_id, {}),
+                AlertType.COVERAGE_DROP: config.coverage_percentage,
+                AlertType.QUALITY_DROP: config.quality_score
+            }
+            alert = AlertService.evaluate_threshold(
+                config.alert_type, current_values.get(config.alert_type), config.threshold_value
+            )
+            if alert:
+                vendor_result["alerts"].append(alert)
+        
+        for vendor_id, rule_result in AlertRuleService.evaluate(db, vendor_ids).items():
+            vendor_result = results.setdefault(vendor_id, {"vendor_name": rule_result["vendor_name"], "alerts": []})
+            vendor_result["alerts"].extend(rule_result["alerts"])
+        
+        return results
+    
+    @staticmethod
+    def windowed_metrics(db: Session, vendor_ids: List[int],
+                         today: Optional[date] = None) -> Dict[int, Dict[AlertType, float]]:
+        """
+        Each vendor's value for every SLA_WINDOWS alert type over its window,
+        from one grouped query; types with no records in their window are
+        left out
+        """
+        today = today or datetime.now().date()
+        table = VendorDailyQuality
+        
+        def windowed_sum(column, days: int):
+            return func.sum(case((table.day >= today - timedelta(days=days), column), else_=0))
+        
+        sums = {
+            days: (
+                windowed_sum(table.record_count, days),
+                windowed_sum(table.pii_complete_count, days),
+                windowed_sum(table.verified_count, days),
+                windowed_sum(table.turnaround_sum, days)
+            )
+            for days in set(SLA_WINDOWS.values())
+        }
+        columns = [column for window_sums in sums.values() for column in window_sums]
+        rows = db.query(table.vendor_id, *columns).filter(
             and_(
-                AlertConfiguration.vendor_id == vendor_id,
-                AlertConfiguration.is_active == True
+                table.vendor_id.in_(vendor_ids),
+                table.day >= today - timedelta(days=max(SLA_WINDOWS.values()))
             )
-        ).all()
+        ).group_by(table.vendor_id).all()
         
-        for config in configs:
-            current_value = 0.0
-            threshold_value = config.threshold_value
-            
-            # Get current value based on alert type
-            if config.alert_type == AlertType.PII_COMPLETENESS:
-                current_value = metrics["pii_completeness"]
-                if current_value < threshold_value:
-                    alerts.append({
-                        "type": config.alert_type.value,
-                        "severity": AlertSeverity.HIGH.value,
-                        "title": "PII Completeness Below Threshold",
-                        "description": f"PII completeness ({current_value:.1f}%) is below threshold ({threshold_value}%)",
-                        "current_value": current_value,
-                        "threshold_value": threshold_value,
-                        "variance": threshold_value - current_value
-                    })
-            
-            elif config.alert_type == AlertType.DISPOSITION_ACCURACY:
-                current_value = metrics["disposition_accuracy"]
-                if current_value < threshold_value:
-                    alerts.append({
-                        "type": config.alert_type.value,
-                        "severity": AlertSeverity.HIGH.value,
-                        "title": "Disposition Accuracy Below Threshold",
-                        "description": f"Disposition accuracy ({current_value:.1f}%) is below threshold ({threshold_value}%)",
-                        "current_value": current_value,
-                        "threshold_value": threshold_value,
-                        "variance": threshold_value - current_value
-                    })
-            
-            elif config.alert_type == AlertType.TURNAROUND_TIME:
-                # Get average turnaround for recent records
-                recent_records = db.query(CriminalRecord).filter(
-                    and_(
-                        CriminalRecord.vendor_id == vendor_id,
-                        CriminalRecord.vendor_delivery_date >= datetime.now() - timedelta(days=7)
-                    )
-                ).all()
-                
-                if recent_records:
-                    avg_turnaround = sum(r.turnaround_hours for r in recent_records) / len(recent_records)
-                    if avg_turnaround > threshold_value:
-                        alerts.append({
-                            "type": config.alert_type.value,
-                            "severity": AlertSeverity.MEDIUM.value,
-                            "title": "Turnaround Time Above Threshold",
-                            "description": f"Average turnaround ({avg_turnaround:.1f} hours) exceeds threshold ({threshold_value} hours)",
-                            "current_value": avg_turnaround,
-                            "threshold_value": threshold_value,
-                            "variance": avg_turnaround - threshold_value
-                        })
-            
-            elif config.alert_type == AlertType.COVERAGE_DROP:
-                current_value = vendor.coverage_percentage
-                if current_value < threshold_value:
-                    alerts.append({
-                        "type": config.alert_type.value,
-                        "severity": AlertSeverity.MEDIUM.value,
-                        "title": "Coverage Drop Detected",
-                        "description": f"Coverage ({current_value:.1f}%) is below threshold ({threshold_value}%)",
-                        "current_value": current_value,
-                        "threshold_value": threshold_value,
-                        "variance": threshold_value - current_value
-                    })
-            
-            elif config.alert_type == AlertType.QUALITY_DROP:
-                current_value = vendor.quality_score
-                if current_value < threshold_value:
-                    alerts.append({
-                        "type": config.alert_type.value,
-                        "severity": AlertSeverity.HIGH.value,
-                        "title": "Quality Score Drop Detected",
-                        "description": f"Quality score ({current_value:.1f}) is below threshold ({threshold_value})",
-                        "current_value": current_value,
-                        "threshold_value": threshold_value,
-                        "variance": threshold_value - current_value
-                    })
-        
-        return alerts
+        offsets = {days: 1 + 4 * i for i, days in enumerate(sums)}
+        metrics = {}
+        for row in rows:
+            values = {}
+            for alert_type, days in SLA_WINDOWS.items():
+                records, pii_complete, verified, turnaround = row[offsets[days]:offsets[days] + 4]
+                if records:
+                    values[alert_type] = AlertService.window_value(alert_type, records, pii_complete, verified, turnaround)
+            metrics[row.vendor_id] = values
+        return metrics
+    
+    @staticmethod
+    def window_value(alert_type: AlertType, records: float, pii_complete: float,
+                     verified: float, turnaround: float) -> float:
+        """Metric an SLA_WINDOWS alert type is judged on, from a window's summed daily counters"""
+        if alert_type == AlertType.TURNAROUND_TIME:
+            return turnaround / records
+        if alert_type == AlertType.PII_COMPLETENESS:
+            return pii_complete / records * 100
+        return verified / records * 100
+    
+    @staticmethod
+    def evaluate_threshold(alert_type: AlertType, current_value: Optional[float],
+                            threshold_value: float) -> Optional[Dict]:
+        """Alert dict if current_value breaches the threshold for this alert type, else None"""
+        rule = _SLA_RULES.get(alert_type)
+        if rule is None or current_value is None or threshold_value is None:
+            return None
+        
+        severity, title, description, higher_is_worse = rule
+        breached = current_value > threshold_value if higher_is_worse else current_value < threshold_value
+        if not breached:
+            return None
+        
+        return {
+            "type": alert_type.value,
+            "severity": severity.value,
+            "title": title,
+            "description": description.format(current=current_value, threshold=threshold_value),
+            "current_value": current_value,
+            "threshold_value": threshold_value,
+            "variance": abs(current_value - threshold_value)
+        }
     
     @staticmethod
     def create_alert(db: Session, vendor_id: int, alert_data: Dict) -> Alert:
         """Create a new alert"""
         
-        alert = Alert(
-            vendor_id=vendor_id,
-            alert_type=AlertType(alert_data["type"]),
-            severity=AlertSeverity(alert_data["severity"]),
-            title=alert_data["title"],
-            description=alert_data["description"],
-            current_value=alert_data["current_value"],
-            threshold_value=alert_data["threshold_value"],
-            variance_percentage=alert_data.get("variance", 0.0)
-        )
+        alert_id = AlertService.create_alerts(db, [(vendor_id, alert_data)])[0]
         
-        db.add(alert)
+        return db.get(Alert, alert_id)
+    
+    @staticmethod
+    def create_alerts(db: Session, alerts: List[Tuple[int, Dict]]) -> List[int]:
+        """Create alerts from (vendor_id, alert dict) pairs with one batched insert and one commit; returns their ids"""
+        
+        opened = AlertService._insert_alerts(db, alerts)
         db.commit()
-        db.refresh(alert)
         
-        return alert
+        for key, alert_id, current_value in opened:
+            open_alert_index.record_open(key, alert_id, current_value)
+        AlertService._publish(db, [("alert.created", alert_id) for _, alert_id, _ in opened])
+        return [alert_id for _, alert_id, _ in opened]
     
     @staticmethod
-    def get_recent_alerts(db: Session, limit: int = 50, vendor_id: int = None) -> List[Dict]:
-        """Get recent alerts with optional vendor filter"""
+    def apply_evaluations(db: Session, evaluations: Dict[Tuple[int, AlertType], Optional[Dict]]) -> Dict[str, int]:
+        """
+        Persist one evaluation cycle against the open-alert index
         
-        query = db.query(Alert).join(Vendor)
+        evaluations maps (vendor_id, alert_type) to the alert dict from
+        evaluate_threshold, or None when the metric is within threshold. New
+        breaches outside their cooldown are inserted, open alerts get their
+        current value refreshed and recovered ones are resolved, using one
+        batched insert, one batched update and one resolve statement in a
+        single commit. Returns counts per outcome.
+        """
+        open_alert_index.ensure_loaded(db)
+        now = datetime.now(timezone.utc)
+        create, refresh, resolve, suppressed = open_alert_index.plan(evaluations, now)
         
-        if vendor_id:
-            query = query.filter(Alert.vendor_id == vendor_id)
+        created = AlertService._insert_alerts(db, [(vendor_id, alert) for (vendor_id, _), alert in create])
+        opened = created + [(key, alert_id, alert["current_value"]) for key, alert_id, alert in refresh]
+        if refresh:
+            table = Alert.__table__
+            # Alerts resolved by another worker since the index was loaded are left alone
+            db.execute(
+                update(table).where(
+                    table.c.id == bindparam("b_id"),
+                    table.c.status != AlertStatus.RESOLVED
+                ).values({
+                    table.c.current_value: bindparam("b_current_value"),
+                    table.c.variance_percentage: bindparam("b_variance"),
+                    table.c.description: bindparam("b_description")
+                }),
+                [
+                    {
+                        "b_id": alert_id,
+                        "b_current_value": alert["current_value"],
+                        "b_variance": alert.get("variance", 0.0),
+                        "b_description": alert["description"]
+                    }
+                    for _, alert_id, alert in refresh
+                ]
+            )
+        resolved_ids = []
+        if resolve:
+            resolved_ids = AlertStatsService.apply_status_change(
+                db, [alert_id for _, alert_id in resolve], AlertStatus.RESOLVED
+            )
+            if resolved_ids:
+                db.execute(
+                    update(Alert).where(Alert.id.in_(resolved_ids)).values(status=AlertStatus.RESOLVED, resolved_at=now)
+                )
+        db.commit()
+        
+        for key, alert_id, current_value in opened:
+            open_alert_index.record_open(key, alert_id, current_value)
+        for key, alert_id in resolve:
+            open_alert_index.record_resolved(key, alert_id, now)
+        AlertService._publish(
+            db,
+            [("alert.created", alert_id) for _, alert_id, _ in created]
+            + [("alert.updated", alert_id) for _, alert_id, _ in refresh]
+            + [("alert.resolved", alert_id) for alert_id in resolved_ids]
+        )
+        
+        return {
+            "created": len(created),
+            "refreshed": len(refresh),
+            "resolved": len(resolve),
+            "suppressed": suppressed
+        }
+    
+    @staticmethod
+    def _publish(db: Session, events: List[Tuple[str, int]]) -> None:
+        # One read per committed batch feeds every /api/alerts/stream subscriber
+        if not events:
+            return
         
-        alerts = query.order_by(desc(Alert.triggered_at)).limit(limit).all()
+        alerts = {
+            alert.id: AlertService._alert_to_dict(alert, vendor_name)
+            for alert, vendor_name in db.query(Alert, Vendor.name).join(Vendor, Vendor.id == Alert.vendor_id).filter(
+                Alert.id.in_({alert_id for _, alert_id in events})
+            )
+        }
+        for event_type, alert_id in events:
+            if alert_id in alerts:
+                alert_event_bus.publish(event_type, alerts[alert_id])
+    
+    @staticmethod
+    def _insert_alerts(db: Session, alerts: List[Tuple[int, Dict]]) -> List[Tuple[Tuple[int, AlertType], int, float]]:
+        # A Core executemany with RETURNING goes out as one multi-row INSERT; the ORM would insert row by row
+        if not alerts:
+            return []
         
-        return [
+        triggered_at = datetime.now(timezone.utc)
+        values = [
             {
-                "id": alert.id,
-                "vendor_id": alert.vendor_id,
-                "vendor_name": alert.vendor.name,
-                "alert_type": alert.alert_type.value,
-                "severity": alert.severity.value,
-                "status": alert.status.value,
-                "title": alert.title,
-                "description": alert.description,
-                "current_value": alert.current_value,
-                "threshold_value": alert.threshold_value,
-                "variance_percentage": alert.variance_percentage,
-                "triggered_at": alert.triggered_at.isoformat(),
-                "acknowledged_at": alert.acknowledged_at.isoformat() if alert.acknowledged_at else None,
-                "resolved_at": alert.resolved_at.isoformat() if alert.resolved_at else None
+                "vendor_id": vendor_id,
+                "alert_type": AlertType(alert_data["type"]),
+                "severity": AlertSeverity(alert_data["severity"]),
+                "status": AlertStatus.ACTIVE,
+                "title": alert_data["title"],
+                "description": alert_data["description"],
+                "current_value": alert_data["current_value"],
+                "threshold_value": alert_data["threshold_value"],
+                "variance_percentage": alert_data.get("variance", 0.0),
+                "triggered_at": triggered_at
             }
-            for alert in alerts
+            for vendor_id, alert_data in alerts
         ]
+        rows = db.execute(
+            insert(Alert.__table__).returning(Alert.id, Alert.vendor_id, Alert.alert_type, Alert.current_value),
+            values
+        )
+        AlertStatsService.apply_inserted(db, values)
+        return [((row.vendor_id, row.alert_type), row.id, row.current_value) for row in rows]
+    
+    @staticmethod
+    def get_recent_alerts(db: Session, limit: int = 50, vendor_id: int = None) -> List[Dict]:
+        """Get recent alerts with optional vendor filter"""
+        
+        return AlertService.list_alerts(db, limit, vendor_id=vendor_id)[0]
+    
+    @staticmethod
+    def list_alerts(db: Session, limit: int = 50, vendor_id: Optional[int] = None,
+                    severity: Optional[AlertSeverity] = None, status: Optional[AlertStatus] = None,
+                    alert_type: Optional[AlertType] = None, since: Optional[datetime] = None,
+                    until: Optional[datetime] = None, cursor: Optional[str] = None,
+                    include_archived: bool = False) -> Tuple[List[Dict], Optional[str]]:
+        """
+        One page of alerts, newest first, filtered in SQL
+        
+        Pages are keyed on (triggered_at, id) and served from the composite
+        indexes on alerts, so a deep page costs the same as the first. Pass
+        the returned cursor back for the next page. With include_archived,
+        the same page is taken from alerts_archive and the two are merged in
+        the same query. Returns (alerts, next_cursor), with next_cursor None
+        on the last page. Raises ValueError for a malformed cursor.
+        """
+        after = AlertService._decode_cursor(db, cursor) if cursor else None
+        filters = (vendor_id, severity, status, alert_type, since, until)
+        
+        pages = [AlertService._alert_page(db, Alert, filters, after, limit)]
+        if include_archived:
+            pages.append(AlertService._alert_page(db, AlertArchive, filters, after, limit))
+        if len(pages) == 1:
+            rows = db.execute(pages[0]).all()
+        else:
+            merged = union_all(*[select(page.subquery()) for page in pages]).subquery()
+            rows = db.execute(
+                select(merged).order_by(desc(merged.c.triggered_key), desc(merged.c.id)).limit(limit + 1)
+            ).all()
+        
+        # One extra row tells whether another page follows
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = AlertService._encode_cursor(rows[-1].triggered_key, rows[-1].id)
+        
+        alerts = []
+        for row in rows:
+            alert = AlertService._alert_to_dict(row, row.vendor_name, row.archived)
+            if row.details is not None:
+                alert.update(AlertArchiveService.unpack_details(row.details))
+            alerts.append(alert)
+        return alerts, next_cursor
+    
+    @staticmethod
+    def _alert_page(db: Session, model, filters: Tuple, after: Optional[Tuple], limit: int):
+        """Select for one page of alerts or archived alerts, as rows shaped for _alert_to_dict"""
+        triggered_key = AlertService._triggered_key(db, model)
+        if model is AlertArchive:
+            # Text comes compressed in details and is unpacked in Python
+            text = [literal(None, String).label("title"), literal(None, Text).label("description"), model.details]
+        else:
+            text = [model.title, model.description, literal(None, LargeBinary).label("details")]
+        query = select(
+            *[getattr(model, column) for column in ARCHIVED_COLUMNS],
+            *text,
+            Vendor.name.label("vendor_name"),
+            literal(model is AlertArchive).label("archived"),
+            triggered_key.label("triggered_key")
+        ).join(Vendor, Vendor.id == model.vendor_id).where(*AlertService._alert_filters(*filters, model=model))
+        if after:
+            query = query.where(tuple_(triggered_key, model.id) < tuple_(*after))
+        return query.order_by(desc(triggered_key), desc(model.id)).limit(limit + 1)
+    
+    @staticmethod
+    def _alert_filters(vendor_id: Optional[int] = None, severity: Optional[AlertSeverity] = None,
+                       status: Optional[AlertStatus] = None, alert_type: Optional[AlertType] = None,
+                       since: Optional[datetime] = None, until: Optional[datetime] = None, model=Alert) -> List:
+        criteria = []
+        if vendor_id:
+            criteria.append(model.vendor_id == vendor_id)
+        if severity:
+            criteria.append(model.severity == severity)
+        if status:
+            criteria.append(model.status == status)
+        if alert_type:
+            criteria.append(model.alert_type == alert_type)
+        if since:
+            criteria.append(model.triggered_at >= since)
+        if until:
+            criteria.append(model.triggered_at < until)
+        return criteria
+    
+    @staticmethod
+    def _triggered_key(db: Session, model=Alert):
+        # SQLite keeps timestamps as text, with and without microseconds, so it pages on the stored text
+        if db.get_bind().dialect.name == "sqlite":
+            return type_coerce(model.triggered_at, String)
+        return model.triggered_at
+    
+    @staticmethod
+    def _encode_cursor(triggered_key, alert_id: int) -> str:
+        if isinstance(triggered_key, datetime):
+            triggered_key = triggered_key.isoformat()
+        return base64.urlsafe_b64encode(json.dumps([triggered_key, alert_id]).encode()).decode()
+    
+    @staticmethod
+    def _decode_cursor(db: Session, cursor: str):
+        try:
+            triggered_key, alert_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            if db.get_bind().dialect.name != "sqlite":
+                triggered_key = datetime.fromisoformat(triggered_key)
+            return triggered_key, int(alert_id)
+        except (ValueError, TypeError):
+            raise ValueError("Invalid alert cursor")
+    
+    @staticmethod
+    def _alert_to_dict(alert: Alert, vendor_name: str, archived: bool = False) -> Dict[str, Any]:
+        return {
+            "id": alert.id,
+            "vendor_id": alert.vendor_id,
+            "vendor_name": vendor_name,
+            "alert_type": alert.alert_type.value,
+            "severity": alert.severity.value,
+            "status": alert.status.value,
+            "title": alert.title,
+            "description": alert.description,
+            "current_value": alert.current_value,
+            "threshold_value": alert.threshold_value,
+            "variance_percentage": alert.variance_percentage,
+            "triggered_at": alert.triggered_at.isoformat(),
+            "acknowledged_at": alert.acknowledged_at.isoformat() if alert.acknowledged_at else None,
+            "resolved_at": alert.resolved_at.isoformat() if alert.resolved_at else None,
+            "archived": bool(archived)
+        }
     
     @staticmethod
     def acknowledge_alert(db: Session, alert_id: int) -> bool:
@@ -171,9 +459,10 @@ class AlertService:
             return False
         
         alert.status = AlertStatus.ACKNOWLEDGED
-        alert.acknowledged_at = datetime.now()
+        alert.acknowledged_at = datetime.now(timezone.utc)
         
         db.commit()
+        AlertService._publish(db, [("alert.acknowledged", alert_id)])
         return True
     
     @staticmethod
@@ -185,11 +474,148 @@ class AlertService:
             return False
         
         alert.status = AlertStatus.RESOLVED
-        alert.resolved_at = datetime.now()
+        alert.resolved_at = datetime.now(timezone.utc)
+        key, resolved_at = (alert.vendor_id, alert.alert_type), alert.resolved_at
         
         db.commit()
+        open_alert_index.record_resolved(key, alert_id, resolved_at)
+        AlertService._publish(db, [("alert.resolved", alert_id)])
         return True
     
+    @staticmethod
+    def bulk_set_status(db: Session, new_status: AlertStatus, alert_ids: Optional[List[int]] = None,
+                        vendor_id: Optional[int] = None, severity: Optional[AlertSeverity] = None,
+                        status: Optional[AlertStatus] = None, alert_type: Optional[AlertType] = None,
+                        since: Optional[datetime] = None, until: Optional[datetime] = None) -> int:
+        """
+        Acknowledge or resolve every alert matching the ids and/or filters
+        with set-based UPDATEs; returns the number of alerts changed
+        
+        Only active alerts are acknowledged and only open ones resolved. The
+        matching rows are read once, locked where the database supports it.
+        The UPDATE targets exactly those ids, still in the status that was
+        read, and only the rows it returns move their alert_stats counts, so
+        an alert changed in between keeps stats and table in step. Raises
+        ValueError when neither ids nor filters are given, so an empty
+        request cannot touch every alert.
+        """
+        criteria = AlertService._alert_filters(vendor_id, severity, status, alert_type, since, until)
+        if alert_ids is not None:
+            criteria.append(Alert.id.in_(alert_ids))
+        if not criteria:
+            raise ValueError("Give alert_ids or at least one filter")
+        
+        if new_status == AlertStatus.ACKNOWLEDGED:
+            criteria.append(Alert.status == AlertStatus.ACTIVE)
+            timestamp_column = "acknowledged_at"
+        elif new_status == AlertStatus.RESOLVED:
+            criteria.append(Alert.status.in_([AlertStatus.ACTIVE, AlertStatus.ACKNOWLEDGED]))
+            timestamp_column = "resolved_at"
+        else:
+            raise ValueError(f"Alerts cannot be bulk set to {new_status.value}")
+        
+        rows = db.query(
+            Alert.id, Alert.triggered_at, Alert.vendor_id, Alert.alert_type, Alert.severity, Alert.status
+        ).filter(*criteria).with_for_update().all()
+        if not rows:
+            return 0
+        
+        now = datetime.now(timezone.utc)
+        ids_by_status = defaultdict(list)
+        for row in rows:
+            ids_by_status[row.status].append(row.id)
+        changed_ids = set()
+        for old_status, ids in ids_by_status.items():
+            for start in range(0, len(ids), _UPDATE_CHUNK):
+                changed_ids.update(db.execute(
+                    update(Alert).where(
+                        Alert.id.in_(ids[start:start + _UPDATE_CHUNK]), Alert.status == old_status
+                    ).values({"status": new_status, timestamp_column: now}).returning(Alert.id),
+                    execution_options={"synchronize_session": False}
+                ).scalars())
+        rows = [row for row in rows if row.id in changed_ids]
+        AlertStatsService.move_status(db, rows, new_status)
+        db.commit()
+        if not rows:
+            return 0
+        
+        if new_status == AlertStatus.RESOLVED:
+            for row in rows:
+                open_alert_index.record_resolved((row.vendor_id, row.alert_type), row.id, now)
+        
+        event_type = "alert.resolved" if new_status == AlertStatus.RESOLVED else "alert.acknowledged"
+        if len(rows) <= _BULK_EVENT_LIMIT:
+            AlertService._publish(db, [(event_type, row.id) for row in rows])
+        else:
+            # Too many to stream one by one; dashboards refetch instead
+            alert_event_bus.publish("reset", {"reason": event_type, "count": len(rows)})
+        
+        return len(rows)
+    
+    @staticmethod
+    def upsert_alert_thresholds(db: Session, configurations: List[Dict]) -> Dict[str, int]:
+        """
+        Set thresholds for many vendors at once, writing only what differs
+        
+        configurations is a list of {vendor_id, alert_type, threshold_value,
+        is_active}. Existing rows for each (vendor, alert type) are updated
+        when their threshold or active flag changes, missing ones are
+        inserted, and configurations not listed are left alone. Uses one read,
+        one batched update and one batched insert. Raises ValueError naming
+        vendors that do not exist.
+        """
+        desired = {}
+        for config in configurations:
+            key = (config["vendor_id"], AlertType(config["alert_type"]))
+            desired[key] = (config["threshold_value"], config.get("is_active", True))
+        if not desired:
+            return {"created": 0, "updated": 0, "unchanged": 0}
+        
+        vendor_ids = {vendor_id for vendor_id, _ in desired}
+        known = {vendor_id for (vendor_id,) in db.query(Vendor.id).filter(Vendor.id.in_(vendor_ids))}
+        missing = sorted(vendor_ids - known)
+        if missing:
+            raise ValueError(f"Unknown vendor: {', '.join(str(vendor_id) for vendor_id in missing)}")
+        
+        existing = defaultdict(list)
+        for row in db.query(
+            AlertConfiguration.id, AlertConfiguration.vendor_id, AlertConfiguration.alert_type,
+            AlertConfiguration.threshold_value, AlertConfiguration.is_active
+        ).filter(AlertConfiguration.vendor_id.in_(vendor_ids)):
+            existing[(row.vendor_id, row.alert_type)].append(row)
+        
+        updates, inserts, unchanged = [], [], 0
+        for (vendor_id, alert_type), (threshold_value, is_active) in desired.items():
+            rows = existing.get((vendor_id, alert_type))
+            if not rows:
+                inserts.append({
+                    "vendor_id": vendor_id, "alert_type": alert_type,
+                    "threshold_value": threshold_value, "is_active": is_active
+                })
+                continue
+            changed = [row for row in rows if row.threshold_value != threshold_value or row.is_active != is_active]
+            updates.extend(
+                {"b_id": row.id, "b_threshold": threshold_value, "b_active": is_active} for row in changed
+            )
+            if not changed:
+                unchanged += 1
+        
+        if updates:
+            table = AlertConfiguration.__table__
+            db.execute(
+                update(table).where(table.c.id == bindparam("b_id")).values({
+                    table.c.threshold_value: bindparam("b_threshold"),
+                    table.c.is_active: bindparam("b_active"),
+                    table.c.updated_at: func.now()
+                }),
+                updates
+            )
+        if inserts:
+            db.execute(insert(AlertConfiguration.__table__), inserts)
+        db.commit()
+        
+        return {"created": len(inserts), "updated": len({row["b_id"] for row in updates}), "unchanged": unchanged}
+    
     @staticmethod
     def configure_alert_thresholds(db: Session, vendor_id: int, configurations: List[Dict]) -> bool:
         """Configure alert thresholds for a vendor"""
@@ -212,71 +638,13 @@ class AlertService:
             
             db.commit()
             return True
-            
+        
         except Exception:
             db.rollback()
             return False
     
     @staticmethod
     def get_alert_summary(db: Session, days: int = 30) -> Dict[str, Any]:
-        """Get alert summary statistics"""
-        
-        cutoff_date = datetime.now() - timedelta(days=days)
-        
-        # Total alerts by severity
-        severity_counts = db.query(
-            Alert.severity,
-            func.count(Alert.id).label('count')
-        ).filter(
-            Alert.triggered_at >= cutoff_date
-        ).group_by(Alert.severity).all()
-        
-        # Total alerts by type
-        type_counts = db.query(
-            Alert.alert_type,
-            func.count(Alert.id).label('count')
-        ).filter(
-            Alert.triggered_at >= cutoff_date
-        ).group_by(Alert.alert_type).all()
-        
-        # Alerts by vendor
-        vendor_alerts = db.query(
-            Vendor.name,
-            func.count(Alert.id).label('alert_count')
-        ).join(Alert).filter(
-            Alert.triggered_at >= cutoff_date
-        ).group_by(Vendor.id, Vendor.name).order_by(
-            desc('alert_count')
-        ).all()
-        
-        # Resolution metrics
-        resolved_alerts = db.query(Alert).filter(
-            and_(
-                Alert.triggered_at >= cutoff_date,
-                Alert.status == AlertStatus.RESOLVED
-            )
-        ).count()
+        """Get alert summary statistics from the hourly alert_stats rollup"""
         
-        total_alerts = db.query(Alert).filter(
-            Alert.triggered_at >= cutoff_date
-        ).count()
-        
-        return {
-            "period_days": days,
-            "total_alerts": total_alerts,
-            "resolved_alerts": resolved_alerts,
-            "resolution_rate": (resolved_alerts / total_alerts * 100) if total_alerts > 0 else 0,
-            "by_severity": {
-                severity.value: count for severity, count in severity_counts
-            },
-            "by_type": {
-                alert_type.value: count for alert_type, count in type_counts
-            },
-            "by_vendor": [
-                {
-                    "vendor_name": vendor_name,
-                    "alert_count": alert_count
-                }
-                for vendor_name, alert_count in vendor_alerts
-            ]
-        }
+        return AlertStatsService.summarize(db, days)
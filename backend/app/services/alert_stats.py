@@ -0,0 +1,209 @@
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import event, func, insert, delete, inspect
+from sqlalchemy.orm import Session
+from app.models import *
+from app.database.upsert import upsert_counters
+
+# (bucket_start, vendor_id, alert_type, severity, status)
+StatsKey = Tuple[datetime, int, AlertType, AlertSeverity, AlertStatus]
+
+class AlertStatsService:
+    """
+    Hourly alert counts in alert_stats, kept in step with the alerts table
+    
+    Every alert, archived ones included, is counted in the hour it was
+    triggered under its current status. ORM changes are picked up by a
+    before_flush listener; Core writes call apply_inserted or
+    apply_status_change in the same transaction.
+    """
+    
+    @staticmethod
+    def apply_deltas(connection, deltas: Dict[StatsKey, int]) -> None:
+        """Add count deltas to bucket rows, creating the buckets not there yet, in one upsert"""
+        upsert_counters(connection, AlertStats.__table__, [
+            {
+                "bucket_start": bucket_start, "vendor_id": vendor_id, "alert_type": alert_type,
+                "severity": severity, "status": status, "alert_count": delta
+            }
+            for (bucket_start, vendor_id, alert_type, severity, status), delta in deltas.items()
+            if vendor_id is not None and delta
+        ], ["alert_count"])
+    
+    @staticmethod
+    def apply_inserted(db: Session, rows: Iterable[Dict]) -> None:
+        """Count alert rows written with a Core insert; each row needs triggered_at set"""
+        deltas = defaultdict(int)
+        for row in rows:
+            deltas[_stats_key(
+                row["triggered_at"], row["vendor_id"], row["alert_type"], row["severity"],
+                row.get("status") or AlertStatus.ACTIVE
+            )] += 1
+        AlertStatsService.apply_deltas(db.connection(), deltas)
+    
+    @staticmethod
+    def apply_status_change(db: Session, alert_ids: Iterable[int], status: AlertStatus) -> List[int]:
+        """
+        Move the counts of these alerts to a new status ahead of a Core
+        UPDATE; returns the ids whose status actually changes
+        """
+        alert_ids = list(alert_ids)
+        if not alert_ids:
+            return []
+        
+        rows = db.query(
+            Alert.id, Alert.triggered_at, Alert.vendor_id, Alert.alert_type, Alert.severity, Alert.status
+        ).filter(Alert.id.in_(alert_ids), Alert.status != status).all()
+        AlertStatsService.move_status(db, rows, status)
+        
+        return [row.id for row in rows]
+    
+    @staticmethod
+    def move_status(db: Session, rows: Iterable, status: AlertStatus) -> None:
+        """Move already-read alert rows (triggered_at, vendor_id, alert_type, severity, status) to a new status"""
+        deltas = defaultdict(int)
+        for row in rows:
+            if row.status == status:
+                continue
+            deltas[_stats_key(row.triggered_at, row.vendor_id, row.alert_type, row.severity, row.status)] -= 1
+            deltas[_stats_key(row.triggered_at, row.vendor_id, row.alert_type, row.severity, status)] += 1
+        AlertStatsService.apply_deltas(db.connection(), deltas)
+    
+    @staticmethod
+    def rebuild(db: Session) -> int:
+        """Rebuild alert_stats from alerts and alerts_archive; returns the number of bucket rows written"""
+        counts = defaultdict(int)
+        for model in (Alert, AlertArchive):
+            rows = db.query(
+                model.triggered_at, model.vendor_id, model.alert_type, model.severity, model.status
+            ).filter(model.vendor_id.isnot(None), model.triggered_at.isnot(None)).yield_per(10000)
+            for row in rows:
+                counts[_stats_key(*row)] += 1
+        
+        db.execute(delete(AlertStats))
+        if counts:
+            db.execute(insert(AlertStats), [
+                {
+                    "bucket_start": bucket_start, "vendor_id": vendor_id, "alert_type": alert_type,
+                    "severity": severity, "status": status, "alert_count": count
+                }
+                for (bucket_start, vendor_id, alert_type, severity, status), count in counts.items()
+            ])
+        db.commit()
+        
+        return len(counts)
+    
+    @staticmethod
+    def backfill_if_empty(db: Session) -> bool:
+        """Build alert_stats once for databases that predate it"""
+        if db.query(Alert.id).first() is None or db.query(AlertStats.vendor_id).first() is not None:
+            return False
+        AlertStatsService.rebuild(db)
+        return True
+    
+    @staticmethod
+    def summarize(db: Session, days: int = 30, now: Optional[datetime] = None) -> Dict[str, Any]:
+        """
+        Alert counts for the last `days` days broken down by severity, type,
+        vendor and resolution
+        
+        Whole hours are summed from alert_stats and only the partial hour at
+        the start of the window is counted from alerts and alerts_archive,
+        so the cost does not grow with the window. Each side is one grouped
+        query on every (vendor, type, severity, status) combination, folded
+        into the breakdowns in a single pass.
+        """
+        now = now or datetime.now(timezone.utc)
+        cutoff = now - timedelta(days=days)
+        first_bucket = _hour_start(cutoff)
+        if first_bucket < cutoff:
+            first_bucket += timedelta(hours=1)
+        
+        bucketed = db.query(
+            AlertStats.vendor_id, Vendor.name, AlertStats.alert_type, AlertStats.severity, AlertStats.status,
+            func.sum(AlertStats.alert_count)
+        ).join(Vendor, Vendor.id == AlertStats.vendor_id).filter(
+            AlertStats.bucket_start >= first_bucket
+        ).group_by(
+            AlertStats.vendor_id, Vendor.name, AlertStats.alert_type, AlertStats.severity, AlertStats.status
+        ).all()
+        
+        # The partial hour may already be archived when the window reaches past the retention period
+        edge = []
+        for model in (Alert, AlertArchive):
+            edge += db.query(
+                model.vendor_id, Vendor.name, model.alert_type, model.severity, model.status,
+                func.count(model.id)
+            ).join(Vendor, Vendor.id == model.vendor_id).filter(
+                model.triggered_at >= cutoff,
+                model.triggered_at < first_bucket
+            ).group_by(
+                model.vendor_id, Vendor.name, model.alert_type, model.severity, model.status
+            ).all()
+        
+        total = resolved = 0
+        by_severity, by_type = defaultdict(int), defaultdict(int)
+        by_vendor = {}
+        for vendor_id, vendor_name, alert_type, severity, status, count in bucketed + edge:
+            if not count:
+                continue
+            total += count
+            if status == AlertStatus.RESOLVED:
+                resolved += count
+            by_severity[severity.value] += count
+            by_type[alert_type.value] += count
+            vendor = by_vendor.setdefault(vendor_id, {"vendor_name": vendor_name, "alert_count": 0})
+            vendor["alert_count"] += count
+        
+        return {
+            "period_days": days,
+            "total_alerts": total,
+            "resolved_alerts": resolved,
+            "resolution_rate": (resolved / total * 100) if total > 0 else 0,
+            "by_severity": dict(by_severity),
+            "by_type": dict(by_type),
+            "by_vendor": sorted(by_vendor.values(), key=lambda vendor: -vendor["alert_count"])
+        }
+
+def _hour_start(value: datetime) -> datetime:
+    # SQLite hands back naive datetimes, which are stored in UTC
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc).replace(minute=0, second=0, microsecond=0)
+
+def _stats_key(triggered_at, vendor_id, alert_type, severity, status) -> StatsKey:
+    return (_hour_start(triggered_at), vendor_id, alert_type, severity, status)
+
+@event.listens_for(Session, "before_flush")
+def _maintain_alert_stats(session, flush_context, instances):
+    deltas = defaultdict(int)
+    
+    for obj in session.new:
+        if isinstance(obj, Alert):
+            # Set here rather than by the server default so the row and its bucket agree on the hour
+            if obj.triggered_at is None:
+                obj.triggered_at = datetime.now(timezone.utc)
+            deltas[_stats_key(
+                obj.triggered_at, obj.vendor_id, obj.alert_type, obj.severity, obj.status or AlertStatus.ACTIVE
+            )] += 1
+    
+    for obj in session.dirty:
+        if not isinstance(obj, Alert) or obj.id is None:
+            continue
+        state = inspect(obj)
+        status = state.attrs.status.history
+        if not status.has_changes() or not status.deleted:
+            continue
+        old_status = status.deleted[0]
+        if old_status == obj.status:
+            continue
+        deltas[_stats_key(obj.triggered_at, obj.vendor_id, obj.alert_type, obj.severity, old_status)] -= 1
+        deltas[_stats_key(obj.triggered_at, obj.vendor_id, obj.alert_type, obj.severity, obj.status)] += 1
+    
+    for obj in session.deleted:
+        if isinstance(obj, Alert) and obj.triggered_at is not None:
+            deltas[_stats_key(obj.triggered_at, obj.vendor_id, obj.alert_type, obj.severity, obj.status)] -= 1
+    
+    if deltas:
+        AlertStatsService.apply_deltas(session.connection(), deltas)
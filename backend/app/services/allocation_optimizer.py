@@ -0,0 +1,111 @@
+import numpy as np
+from typing import Optional, Tuple
+
+# Halvings of the quality price bracket; 60 take it to float precision
+_BISECTION_STEPS = 60
+
+class AllocationOptimizer:
+    """
+    Cost-minimizing assignment of jurisdictions to vendors over dense arrays
+    
+    Arrays are (vendors, jurisdictions), as in JurisdictionMatrix, with the
+    cost per record per vendor and the order volume per jurisdiction. Every
+    jurisdiction goes to one vendor. Per-jurisdiction limits only rule cells
+    out, so on their own the cheapest remaining vendor in each column is
+    optimal.
+    
+    A volume-weighted average quality target ties the columns together (a
+    multiple-choice knapsack). It is solved by Lagrangian relaxation of its
+    linear program: at a price per quality point every column picks the
+    vendor minimizing cost - price * volume * quality on its own, and the
+    price is bisected to the lowest one meeting the target. Columns that
+    changed vendor across the last price step are then handed back to the
+    cheaper vendor, most savings per quality point first, and any slack left
+    goes to single cheaper switches, while the target still holds. With
+    thousands of jurisdictions the result is within a fraction of a percent
+    of the relaxation's lower bound.
+    """
+    
+    @staticmethod
+    def feasible(present: np.ndarray, quality: np.ndarray, turnaround: np.ndarray,
+                 min_quality: Optional[float] = None,
+                 max_turnaround_hours: Optional[float] = None) -> np.ndarray:
+        """Cells a jurisdiction may be routed to; unknown turnaround fails a turnaround limit"""
+        feasible = present.copy()
+        if min_quality is not None:
+            feasible &= quality >= min_quality
+        if max_turnaround_hours is not None:
+            feasible &= turnaround <= max_turnaround_hours
+        return feasible
+    
+    @staticmethod
+    def solve(feasible: np.ndarray, cost_per_record: np.ndarray, quality: np.ndarray, volume: np.ndarray,
+              min_average_quality: Optional[float] = None) -> Tuple[np.ndarray, Optional[float]]:
+        """
+        Vendor row chosen per jurisdiction column, -1 where no vendor is
+        feasible, and the price per quality point the target needed (None
+        without a target)
+        
+        Raises ValueError when the target is above the best reachable
+        average.
+        """
+        columns = np.flatnonzero(feasible.any(axis=0))
+        choice = np.full(feasible.shape[1], -1)
+        if not len(columns):
+            return choice, None
+        
+        feasible = feasible[:, columns]
+        volume = volume[columns]
+        cost = np.where(feasible, cost_per_record[:, None] * volume, np.inf)
+        points = np.where(feasible, quality[:, columns] * volume, 0.0)
+        picked = np.arange(len(columns))
+        required = None if min_average_quality is None else min_average_quality * volume.sum()
+        
+        def choose(price: float) -> np.ndarray:
+            return np.argmin(cost - price * points, axis=0)
+        
+        rows = choose(0.0)
+        price = None
+        if required is not None and points[rows, picked].sum() < required:
+            best = np.argmax(np.where(feasible, points, -np.inf), axis=0)
+            if points[best, picked].sum() < required:
+                raise ValueError(
+                    f"An average quality of {min_average_quality} is not reachable; "
+                    f"the best is {points[best, picked].sum() / volume.sum():.2f}"
+                )
+            
+            low, high = 0.0, 1.0
+            while points[choose(high), picked].sum() < required:
+                low, high = high, high * 2
+            for _ in range(_BISECTION_STEPS):
+                middle = (low + high) / 2
+                if points[choose(middle), picked].sum() < required:
+                    low = middle
+                else:
+                    high = middle
+            
+            rows, cheaper = choose(high), choose(low)
+            changed = np.flatnonzero(rows != cheaper)
+            if len(changed):
+                savings = cost[rows[changed], changed] - cost[cheaper[changed], changed]
+                lost = points[rows[changed], changed] - points[cheaper[changed], changed]
+                order = np.argsort(-savings / np.maximum(lost, 1e-12), kind="stable")
+                slack = points[rows, picked].sum() - required
+                reverted = changed[order[np.cumsum(lost[order]) <= slack]]
+                rows[reverted] = cheaper[reverted]
+            
+            # Spend what slack is left on the single cheaper switch that saves most, until none fits
+            while True:
+                slack = points[rows, picked].sum() - required
+                savings = np.where(
+                    points[rows, picked] - points <= slack, cost[rows, picked] - cost, 0.0
+                )
+                best_switch = np.argmax(savings)
+                if savings.flat[best_switch] <= 0:
+                    break
+                vendor, column = np.unravel_index(best_switch, savings.shape)
+                rows[column] = vendor
+            price = high
+        
+        choice[columns] = rows
+        return choice, price
@@ -1,44 +1,63 @@
+import numpy as np
 from sqlalchemy.orm import Session
 from sqlalchemy import and_, func
 from datetime import datetime, timedelta
 from typing import List, Dict, Any, Optional
 from app.models import *
 from app.services.scoring_engine import ScoringEngine
+from app.services.scoring_kernel import ScoringKernel
+from app.services.scoring_profiles import ScoringProfileService
+from app.services.whatif_simulation import WhatIfSimulator, DEFAULT_TRIALS
+from app.services.allocation_optimizer import AllocationOptimizer
+from app.services.market_benchmarks import MarketBenchmarkService
+
+# TCO penalties as shares of the record cost: quality shortfall (rework, manual review) and coverage gap
+QUALITY_COST_RATE = 0.2
+COVERAGE_COST_RATE = 0.1
 
 class AnalysisService:
     """Production-level vendor analysis and ROI calculations"""
     
     @staticmethod
-    def compare_vendors(db: Session, vendor_ids: List[int], filters: Dict = None) -> Dict[str, Any]:
+    def compare_vendors(db: Session, vendor_ids: List[int], filters: Dict = None,
+                        profile: Optional[str] = None) -> Dict[str, Any]:
         """Side-by-side vendor comparison"""
         
         comparison_data = []
         
+        vendors = {
+            vendor.id: vendor
+            for vendor in db.query(Vendor).filter(Vendor.id.in_(vendor_ids)).all()
+        }
+        scores = ScoringEngine.score_vendors(db, list(vendors), profile=profile)
+        value_indexes = dict(zip(
+            vendors,
+            ScoringKernel.value_indexes(
+                [scores[vendor_id]["quality_score"] for vendor_id in vendors],
+                [vendor.cost_per_record for vendor in vendors.values()]
+            ).tolist()
+        ))
+        
+        # Jurisdiction filters are pushed into the matrix query
+        filters = filters or {}
+        matrix = ScoringEngine.get_jurisdiction_matrix(
+            db,
+            list(vendors),
+            jurisdictions=filters.get("jurisdictions"),
+            min_coverage=filters.get("min_coverage")
+        )
+        
         for vendor_id in vendor_ids:
-            vendor = db.query(Vendor).filter(Vendor.id == vendor_id).first()
+            vendor = vendors.get(vendor_id)
             if not vendor:
                 continue
             
             # Get detailed metrics
-            metrics = ScoringEngine.calculate_vendor_quality_score(db, vendor_id)
-            value_index = ScoringEngine.calculate_value_index(
-                metrics["quality_score"], 
-                vendor.cost_per_record
-            )
+            metrics = scores[vendor_id]
+            value_index = value_indexes[vendor_id]
             
             # Get jurisdiction performance
-            jurisdiction_performance = ScoringEngine.get_jurisdiction_performance(db, vendor_id)
-            
-            # Apply filters if provided
-            if filters:
-                filtered_jurisdictions = []
-                for jur in jurisdiction_performance:
-                    if "jurisdictions" in filters and jur["jurisdiction"] not in filters["jurisdictions"]:
-                        continue
-                    if "min_coverage" in filters and jur["coverage_percentage"] < filters["min_coverage"]:
-                        continue
-                    filtered_jurisdictions.append(jur)
-                jurisdiction_performance = filtered_jurisdictions
+            jurisdiction_performance = matrix.rows_for_vendor(vendor_id)
             
             comparison_data.append({
                 "vendor_id": vendor.id,
@@ -69,13 +88,20 @@ class AnalysisService:
                 "avg_cost_per_record": sum(v["cost_per_record"] for v in comparison_data) / len(comparison_data) if comparison_data else 0,
                 "avg_coverage": sum(v["coverage_percentage"] for v in comparison_data) / len(comparison_data) if comparison_data else 0
             },
-            "filters_applied": filters or {}
+            "filters_applied": filters,
+            "profile": profile
         }
     
     @staticmethod
     def what_if_analysis(db: Session, current_vendor_id: int, new_vendor_id: int, 
-                        annual_volume: int, assumptions: Dict = None) -> Dict[str, Any]:
-        """What-if analysis for vendor switching"""
+                        annual_volume: int, assumptions: Dict = None, simulate: bool = False,
+                        trials: int = DEFAULT_TRIALS, seed: Optional[int] = None) -> Dict[str, Any]:
+        """
+        What-if analysis for vendor switching
+        
+        With simulate, adds Monte Carlo intervals from WhatIfSimulator under
+        "simulation"; that raises ValueError for bad simulation settings.
+        """
         
         current_vendor = db.query(Vendor).filter(Vendor.id == current_vendor_id).first()
         new_vendor = db.query(Vendor).filter(Vendor.id == new_vendor_id).first()
@@ -84,8 +110,9 @@ class AnalysisService:
             return {"error": "Invalid vendor IDs"}
         
         # Get current metrics
-        current_metrics = ScoringEngine.calculate_vendor_quality_score(db, current_vendor_id)
-        new_metrics = ScoringEngine.calculate_vendor_quality_score(db, new_vendor_id)
+        scores = ScoringEngine.score_vendors(db, [current_vendor_id, new_vendor_id])
+        current_metrics = scores[current_vendor_id]
+        new_metrics = scores[new_vendor_id]
         
         # Calculate cost impact
         current_annual_cost = current_vendor.cost_per_record * annual_volume
@@ -99,8 +126,9 @@ class AnalysisService:
         coverage_delta = new_vendor.coverage_percentage - current_vendor.coverage_percentage
         
         # Get jurisdiction comparison
-        current_jurisdictions = ScoringEngine.get_jurisdiction_performance(db, current_vendor_id)
-        new_jurisdictions = ScoringEngine.get_jurisdiction_performance(db, new_vendor_id)
+        matrix = ScoringEngine.get_jurisdiction_matrix(db, [current_vendor_id, new_vendor_id])
+        current_jurisdictions = matrix.rows_for_vendor(current_vendor_id)
+        new_jurisdictions = matrix.rows_for_vendor(new_vendor_id)
         
         # Find coverage differences
         coverage_comparison = []
@@ -136,7 +164,7 @@ class AnalysisService:
         if new_metrics["total_records"] < current_metrics["total_records"] * 0.5:
             risk_factors.append("Limited track record (fewer records)")
         
-        return {
+        result = {
             "scenario": {
                 "current_vendor": {
                     "id": current_vendor.id,
@@ -183,6 +211,144 @@ class AnalysisService:
             },
             "assumptions": assumptions or {}
         }
+        
+        if simulate:
+            result["simulation"] = WhatIfSimulator.simulate(
+                db, current_vendor, new_vendor, annual_volume, assumptions, trials=trials, seed=seed
+            )
+        
+        return result
+    
+    @staticmethod
+    def optimize_allocation(db: Session, vendor_ids: Optional[List[int]] = None,
+                            jurisdictions: Optional[List[str]] = None,
+                            min_quality: Optional[float] = None,
+                            max_turnaround_hours: Optional[float] = None,
+                            min_average_quality: Optional[float] = None,
+                            annual_volume: Optional[int] = None,
+                            profile: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Route each jurisdiction to one vendor at the lowest total cost
+        
+        A cell's quality is the profile's quality score of that vendor's
+        records in that jurisdiction, with its coverage there standing in for
+        geographic coverage; only cells with coverage and records can be
+        chosen. min_quality and max_turnaround_hours apply per jurisdiction,
+        min_average_quality to the volume-weighted whole. Volume is each
+        jurisdiction's share of annual_volume by historical records, or the
+        record count itself without one. Active vendors only; raises
+        ValueError for an unknown profile or an unreachable target.
+        """
+        weights = ScoringProfileService.get_weights(db, profile)
+        query = db.query(Vendor.id, Vendor.name, Vendor.cost_per_record).filter(
+            Vendor.is_active == True,
+            Vendor.cost_per_record != None
+        )
+        if vendor_ids:
+            query = query.filter(Vendor.id.in_(vendor_ids))
+        vendors = query.order_by(Vendor.id).all()
+        
+        matrix = ScoringEngine.get_jurisdiction_matrix(db, [vendor.id for vendor in vendors], jurisdictions)
+        shape = matrix.present.shape
+        quality = ScoringKernel.quality_scores(
+            matrix.pii_rate.ravel(),
+            matrix.disposition_rate.ravel(),
+            matrix.avg_freshness_days.ravel(),
+            matrix.coverage_percentage.ravel(),
+            weights
+        ).reshape(shape)
+        volume = matrix.record_count.sum(axis=0).astype(float)
+        if annual_volume is not None and volume.sum() > 0:
+            volume = volume / volume.sum() * annual_volume
+        cost_per_record = np.array([vendor.cost_per_record for vendor in vendors], dtype=float)
+        
+        feasible = AllocationOptimizer.feasible(
+            matrix.present, quality, matrix.avg_turnaround_hours, min_quality, max_turnaround_hours
+        )
+        choice, quality_price = AllocationOptimizer.solve(
+            feasible, cost_per_record, quality, volume, min_average_quality
+        )
+        
+        assignments, unassigned = [], []
+        vendor_totals = {}
+        for j, i in enumerate(choice.tolist()):
+            jurisdiction = {
+                "jurisdiction_id": matrix.jurisdiction_ids[j],
+                "jurisdiction": matrix.jurisdiction_names[j],
+                "state": matrix.jurisdiction_states[j],
+                "volume": round(float(volume[j]), 2)
+            }
+            if i < 0:
+                unassigned.append(jurisdiction)
+                continue
+            
+            vendor = vendors[i]
+            cost = float(cost_per_record[i] * volume[j])
+            assignments.append({
+                **jurisdiction,
+                "vendor_id": vendor.id,
+                "vendor_name": vendor.name,
+                "cost_per_record": vendor.cost_per_record,
+                "cost": round(cost, 2),
+                "quality_score": round(float(quality[i, j]), 2),
+                "coverage_percentage": round(float(matrix.coverage_percentage[i, j]), 2),
+                "avg_turnaround_hours": (
+                    None if np.isnan(matrix.avg_turnaround_hours[i, j])
+                    else round(float(matrix.avg_turnaround_hours[i, j]), 2)
+                )
+            })
+            totals = vendor_totals.setdefault(vendor.id, {
+                "vendor_id": vendor.id, "vendor_name": vendor.name, "jurisdictions": 0, "volume": 0.0, "cost": 0.0
+            })
+            totals["jurisdictions"] += 1
+            totals["volume"] += float(volume[j])
+            totals["cost"] += cost
+        
+        columns = np.flatnonzero(choice >= 0)
+        rows = choice[columns]
+        assigned_volume = volume[columns]
+        total_volume = float(assigned_volume.sum())
+        total_cost = float((cost_per_record[rows] * assigned_volume).sum())
+        turnaround = matrix.avg_turnaround_hours[rows, columns]
+        known = ~np.isnan(turnaround)
+        
+        return {
+            "assignments": assignments,
+            "unassigned": unassigned,
+            "vendors": sorted(
+                ({**totals, "volume": round(totals["volume"], 2), "cost": round(totals["cost"], 2)}
+                 for totals in vendor_totals.values()),
+                key=lambda totals: totals["cost"],
+                reverse=True
+            ),
+            "summary": {
+                "jurisdictions_assigned": len(assignments),
+                "jurisdictions_unassigned": len(unassigned),
+                "total_volume": round(total_volume, 2),
+                "unassigned_volume": round(float(volume.sum()) - total_volume, 2),
+                "total_cost": round(total_cost, 2),
+                "average_cost_per_record": round(total_cost / total_volume, 4) if total_volume else None,
+                "average_quality_score": (
+                    round(float((quality[rows, columns] * assigned_volume).sum()) / total_volume, 2)
+                    if total_volume else None
+                ),
+                "average_turnaround_hours": (
+                    round(float((turnaround[known] * assigned_volume[known]).sum() / assigned_volume[known].sum()), 2)
+                    if assigned_volume[known].sum() else None
+                ),
+                # Roughly what one more point of average quality would cost; set only when the target binds
+                "marginal_cost_per_quality_point": (
+                    round(quality_price * total_volume, 2) if quality_price is not None else None
+                )
+            },
+            "constraints": {
+                "min_quality": min_quality,
+                "max_turnaround_hours": max_turnaround_hours,
+                "min_average_quality": min_average_quality,
+                "annual_volume": annual_volume
+            },
+            "profile": profile
+        }
     
     @staticmethod
     def get_vendor_change_log(db: Session, vendor_id: int = None, days: int = 90) -> List[Dict]:
@@ -224,23 +390,12 @@ class AnalysisService:
             return {"error": "Vendor not found"}
         
         metrics = ScoringEngine.calculate_vendor_quality_score(db, vendor_id)
-        
-        # Base costs
-        annual_record_cost = vendor.cost_per_record * annual_volume
-        total_record_cost = annual_record_cost * years
-        
-        # Quality-related costs (estimated)
-        # Poor quality leads to rework, manual review, etc.
-        quality_factor = (100 - metrics["quality_score"]) / 100
-        annual_quality_cost = annual_record_cost * quality_factor * 0.2  # 20% of record cost as quality penalty
-        total_quality_cost = annual_quality_cost * years
-        
-        # Coverage-related opportunity costs
-        coverage_gap = 100 - vendor.coverage_percentage
-        annual_coverage_cost = annual_record_cost * (coverage_gap / 100) * 0.1  # 10% opportunity cost
-        total_coverage_cost = annual_coverage_cost * years
-        
-        total_tco = total_record_cost + total_quality_cost + total_coverage_cost
+        costs = {
+            name: float(value)
+            for name, value in AnalysisService._tco_components(
+                vendor.cost_per_record, metrics["quality_score"], vendor.coverage_percentage, annual_volume, years
+            ).items()
+        }
         
         return {
             "vendor_name": vendor.name,
@@ -248,79 +403,127 @@ class AnalysisService:
             "annual_volume": annual_volume,
             "cost_breakdown": {
                 "record_costs": {
-                    "annual": annual_record_cost,
-                    "total": total_record_cost,
+                    "annual": costs["annual_record_cost"],
+                    "total": costs["total_record_cost"],
                     "per_record": vendor.cost_per_record
                 },
                 "quality_costs": {
-                    "annual": annual_quality_cost,
-                    "total": total_quality_cost,
-                    "quality_factor": quality_factor
+                    "annual": costs["annual_quality_cost"],
+                    "total": costs["total_quality_cost"],
+                    "quality_factor": costs["quality_factor"]
                 },
                 "coverage_costs": {
-                    "annual": annual_coverage_cost,
-                    "total": total_coverage_cost,
-                    "coverage_gap": coverage_gap
+                    "annual": costs["annual_coverage_cost"],
+                    "total": costs["total_coverage_cost"],
+                    "coverage_gap": costs["coverage_gap"]
                 }
             },
-            "total_cost_of_ownership": total_tco,
-            "effective_cost_per_record": total_tco / (annual_volume * years),
+            "total_cost_of_ownership": costs["total_cost"],
+            "effective_cost_per_record": costs["total_cost"] / (annual_volume * years),
             "metrics": metrics
         }
     
     @staticmethod
-    def get_market_benchmarks(db: Session) -> Dict[str, Any]:
-        """Get market benchmarks for comparison"""
-        
-        vendors = db.query(Vendor).filter(Vendor.is_active == True).all()
-        
+    def tco_sweep(db: Session, vendor_ids: List[int], volumes: List[int], years: List[int],
+                  profile: Optional[str] = None) -> Dict[str, Any]:
+        """
+        TCO of every vendor at every annual volume over every period length
+        
+        One batched score fetch, then one broadcast of the TCO formula over
+        a (vendors, volumes, years) grid. Tensors are nested lists indexed
+        [vendor][volume][years] in the order of the returned axes. Unknown
+        vendor ids, and vendors without a cost per record, are left out;
+        raises ValueError when none remain or the profile is unknown.
+        """
+        vendors = db.query(Vendor.id, Vendor.name, Vendor.cost_per_record, Vendor.coverage_percentage).filter(
+            Vendor.id.in_(vendor_ids),
+            Vendor.cost_per_record != None
+        ).all()
         if not vendors:
-            return {"error": "No active vendors found"}
+            raise ValueError("No vendors found for the TCO sweep")
+        
+        # Requested order, without repeats
+        by_id = {vendor.id: vendor for vendor in vendors}
+        vendors = [by_id[vendor_id] for vendor_id in dict.fromkeys(vendor_ids) if vendor_id in by_id]
+        scores = ScoringEngine.score_vendors(db, [vendor.id for vendor in vendors], profile=profile)
+        
+        quality_scores = np.array([scores[vendor.id]["quality_score"] for vendor in vendors])
+        costs = AnalysisService._tco_components(
+            np.array([vendor.cost_per_record for vendor in vendors], dtype=float)[:, None, None],
+            quality_scores[:, None, None],
+            np.array([vendor.coverage_percentage or 0.0 for vendor in vendors], dtype=float)[:, None, None],
+            np.array(volumes, dtype=float)[None, :, None],
+            np.array(years, dtype=float)[None, None, :]
+        )
         
-        # Calculate benchmarks
-        quality_scores = []
-        costs = []
-        coverages = []
+        return {
+            "vendor_ids": [vendor.id for vendor in vendors],
+            "vendor_names": [vendor.name for vendor in vendors],
+            "volumes": list(volumes),
+            "years": list(years),
+            "cost_per_record": [vendor.cost_per_record for vendor in vendors],
+            "quality_score": quality_scores.tolist(),
+            "coverage_percentage": [vendor.coverage_percentage or 0.0 for vendor in vendors],
+            # Volume and period cancel out of the cost per record, so it is one value per vendor
+            "effective_cost_per_record": np.round(
+                costs["total_cost"][:, 0, 0] / (volumes[0] * years[0]), 4
+            ).tolist(),
+            "record_cost": np.round(costs["total_record_cost"], 2).tolist(),
+            "quality_cost": np.round(costs["total_quality_cost"], 2).tolist(),
+            "coverage_cost": np.round(costs["total_coverage_cost"], 2).tolist(),
+            "total_cost": np.round(costs["total_cost"], 2).tolist(),
+            "profile": profile
+        }
+    
+    @staticmethod
+    def volume_range(volume_min: int, volume_max: int, steps: int, scale: str = "linear") -> List[int]:
+        """steps annual volumes from volume_min to volume_max, evenly or geometrically spaced, without repeats"""
+        if scale == "log":
+            volumes = np.geomspace(volume_min, volume_max, steps)
+        else:
+            volumes = np.linspace(volume_min, volume_max, steps)
+        return np.unique(np.round(volumes).astype(np.int64)).tolist()
+    
+    @staticmethod
+    def _tco_components(cost_per_record, quality_score, coverage_percentage, annual_volume,
+                        years) -> Dict[str, np.ndarray]:
+        """
+        Annual and total TCO cost components
+        
+        Arguments broadcast against each other, so scalars give one vendor
+        at one volume and axes of vendors, volumes and years give the whole
+        tensor. Poor quality costs rework and manual review, estimated as
+        QUALITY_COST_RATE of the record cost per unit of quality shortfall;
+        coverage gaps cost COVERAGE_COST_RATE of it as opportunity cost.
+        """
+        annual_record_cost = np.asarray(cost_per_record, dtype=float) * annual_volume
+        quality_factor = (100 - np.asarray(quality_score, dtype=float)) / 100
+        annual_quality_cost = annual_record_cost * quality_factor * QUALITY_COST_RATE
+        coverage_gap = 100 - np.asarray(coverage_percentage, dtype=float)
+        annual_coverage_cost = annual_record_cost * (coverage_gap / 100) * COVERAGE_COST_RATE
         
-        for vendor in vendors:
-            metrics = ScoringEngine.calculate_vendor_quality_score(db, vendor.id)
-            quality_scores.append(metrics["quality_score"])
-            costs.append(vendor.cost_per_record)
-            coverages.append(vendor.coverage_percentage)
+        total_record_cost = annual_record_cost * years
+        total_quality_cost = annual_quality_cost * years
+        total_coverage_cost = annual_coverage_cost * years
         
         return {
-            "quality_benchmarks": {
-                "min": min(quality_scores),
-                "max": max(quality_scores),
-                "median": sorted(quality_scores)[len(quality_scores) // 2],
-                "average": sum(quality_scores) / len(quality_scores),
-                "percentiles": {
-                    "25th": sorted(quality_scores)[int(len(quality_scores) * 0.25)],
-                    "75th": sorted(quality_scores)[int(len(quality_scores) * 0.75)],
-                    "90th": sorted(quality_scores)[int(len(quality_scores) * 0.9)]
-                }
-            },
-            "cost_benchmarks": {
-                "min": min(costs),
-                "max": max(costs),
-                "median": sorted(costs)[len(costs) // 2],
-                "average": sum(costs) / len(costs),
-                "percentiles": {
-                    "25th": sorted(costs)[int(len(costs) * 0.25)],
-                    "75th": sorted(costs)[int(len(costs) * 0.75)],
-                    "90th": sorted(costs)[int(len(costs) * 0.9)]
-                }
-            },
-            "coverage_benchmarks": {
-                "min": min(coverages),
-                "max": max(coverages),
-                "median": sorted(coverages)[len(coverages) // 2],
-                "average": sum(coverages) / len(coverages),
-                "percentiles": {
-                    "25th": sorted(coverages)[int(len(coverages) * 0.25)],
-                    "75th": sorted(coverages)[int(len(coverages) * 0.75)],
-                    "90th": sorted(coverages)[int(len(coverages) * 0.9)]
-                }
-            },
-            "market_size": len(vendors)
+            "annual_record_cost": annual_record_cost,
+            "total_record_cost": total_record_cost,
+            "quality_factor": quality_factor,
+            "annual_quality_cost": annual_quality_cost,
+            "total_quality_cost": total_quality_cost,
+            "coverage_gap": coverage_gap,
+            "annual_coverage_cost": annual_coverage_cost,
+            "total_coverage_cost": total_coverage_cost,
+            "total_cost": total_record_cost + total_quality_cost + total_coverage_cost
         }
+    
+    @staticmethod
+    def get_market_benchmarks(db: Session, percentiles: Optional[List[float]] = None,
+                              state: Optional[str] = None, jurisdiction: Optional[str] = None,
+                              profile: Optional[str] = None) -> Dict[str, Any]:
+        """Get market benchmarks for comparison, optionally for one state or jurisdiction"""
+        
+        return MarketBenchmarkService.get_benchmarks(
+            db, percentiles, state=state, jurisdiction=jurisdiction, profile=profile
+        )
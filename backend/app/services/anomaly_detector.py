@@ -0,0 +1,259 @@
+import os
+import warnings
+import numpy as np
+from datetime import date, datetime, timedelta
+from sqlalchemy.orm import Session
+from typing import List, Dict, Any, Optional, Iterable
+from app.models import *
+
+# Series checked per vendor: (label, unit, +1 when a rise is the degradation, -1 when a drop is)
+ANOMALY_METRICS = {
+    "pii_completeness": ("PII completeness", "%", -1),
+    "disposition_accuracy": ("Disposition accuracy", "%", -1),
+    "avg_turnaround_hours": ("Turnaround", " hours", 1)
+}
+
+# Smallest spread a series is scored against, so a perfectly flat baseline does not turn noise into huge scores
+_MIN_SCALE = {"pii_completeness": 1.0, "disposition_accuracy": 1.0, "avg_turnaround_hours": 1.0}
+
+class QualitySeries:
+    """
+    Dense vendor x day quality series from vendor_daily_quality
+    
+    Row i is vendor_ids[i] and column j is start + j days, ending at the
+    as_of day. Days without records have a record_count of 0 and NaN in
+    every metric array.
+    """
+    
+    def __init__(self, vendor_ids: List[int], vendor_names: List[str], start: date, days: int):
+        self.vendor_ids = list(vendor_ids)
+        self.vendor_names = list(vendor_names)
+        self.vendor_index = {vendor_id: i for i, vendor_id in enumerate(self.vendor_ids)}
+        self.start = start
+        self.days = days
+        
+        shape = (len(self.vendor_ids), days)
+        self.record_count = np.zeros(shape, dtype=np.int64)
+        self.metrics = {metric: np.full(shape, np.nan) for metric in ANOMALY_METRICS}
+    
+    @classmethod
+    def build(cls, db: Session, as_of: date, days: int,
+              vendor_ids: Optional[Iterable[int]] = None) -> "QualitySeries":
+        """Load the last `days` days up to as_of for the active vendors with one query"""
+        start = as_of - timedelta(days=days - 1)
+        query = db.query(
+            VendorDailyQuality.vendor_id,
+            Vendor.name,
+            VendorDailyQuality.day,
+            VendorDailyQuality.record_count,
+            VendorDailyQuality.pii_complete_count,
+            VendorDailyQuality.verified_count,
+            VendorDailyQuality.turnaround_sum
+        ).join(Vendor, Vendor.id == VendorDailyQuality.vendor_id).filter(
+            Vendor.is_active == True,
+            VendorDailyQuality.day >= start,
+            VendorDailyQuality.day <= as_of,
+            VendorDailyQuality.record_count > 0
+        )
+        if vendor_ids is not None:
+            query = query.filter(VendorDailyQuality.vendor_id.in_(list(vendor_ids)))
+        rows = query.all()
+        
+        names = {row.vendor_id: row.name for row in rows}
+        series = cls(sorted(names), [names[vendor_id] for vendor_id in sorted(names)], start, days)
+        if not rows:
+            return series
+        
+        vendor_col, _, day_col, count, pii, verified, turnaround = (np.array(column) for column in zip(*rows))
+        i = np.searchsorted(np.array(series.vendor_ids), vendor_col.astype(np.int64))
+        j = (day_col.astype("datetime64[D]") - np.datetime64(start, "D")).astype(np.int64)
+        count = count.astype(float)
+        
+        series.record_count[i, j] = count
+        series.metrics["pii_completeness"][i, j] = pii.astype(float) / count * 100
+        series.metrics["disposition_accuracy"][i, j] = verified.astype(float) / count * 100
+        series.metrics["avg_turnaround_hours"][i, j] = turnaround.astype(float) / count
+        return series
+
+class QualityAnomalyDetector:
+    """
+    Flags gradual and sudden degradation in vendors' daily quality series
+    
+    Each series is split into a baseline and the last recent_days days. Two
+    checks run on every vendor at once with NumPy:
+    
+    - EWMA control chart: an exponentially weighted mean of the recent days,
+      started at the baseline mean, scored in baseline standard deviations.
+      Small sustained shifts add up, so it catches slow drift that a static
+      threshold misses.
+    - Seasonal baseline: the last day against the median of the same
+      weekday in the previous seasonal_weeks weeks, scored in the spread of
+      the series once each weekday's median is taken out, so weekly
+      patterns in delivery mix are not mistaken for anomalies.
+    
+    Only the degrading direction counts: falling completeness or accuracy,
+    rising turnaround. A vendor is flagged when any score reaches
+    z_threshold; the worst one is reported as a QUALITY_ANOMALY alert.
+    """
+    
+    def __init__(self, history_days: int = 365, recent_days: int = 14, z_threshold: float = 3.0,
+                 ewma_lambda: float = 0.2, min_baseline_days: int = 28, seasonal_weeks: int = 8,
+                 min_daily_records: int = 5):
+        self.history_days = history_days
+        self.recent_days = recent_days
+        self.z_threshold = z_threshold
+        self.ewma_lambda = ewma_lambda
+        self.min_baseline_days = min_baseline_days
+        self.seasonal_weeks = seasonal_weeks
+        self.min_daily_records = min_daily_records
+    
+    @classmethod
+    def from_env(cls) -> "QualityAnomalyDetector":
+        return cls(
+            history_days=int(os.getenv("ANOMALY_HISTORY_DAYS", "365")),
+            recent_days=int(os.getenv("ANOMALY_RECENT_DAYS", "14")),
+            z_threshold=float(os.getenv("ANOMALY_Z_THRESHOLD", "3")),
+            min_daily_records=int(os.getenv("ANOMALY_MIN_DAILY_RECORDS", "5"))
+        )
+    
+    def score(self, series: QualitySeries) -> Dict[str, Dict[str, np.ndarray]]:
+        """
+        Per metric, arrays over vendors of the EWMA and seasonal scores
+        (positive when degrading, NaN when there is too little history) with
+        the value and baseline each was computed from
+        """
+        scores = {}
+        with warnings.catch_warnings():
+            # Vendors with no data in a slice give NaN, which is what they should give
+            warnings.simplefilter("ignore", RuntimeWarning)
+            # A day's rate from a handful of records is mostly noise, so such days count as missing
+            thin = series.record_count < self.min_daily_records
+            for metric, (_, _, direction) in ANOMALY_METRICS.items():
+                values = np.where(thin, np.nan, series.metrics[metric])
+                ewma_score, ewma_value, mean = self._ewma(values, _MIN_SCALE[metric])
+                seasonal_score, last_value, median = self._seasonal(values, _MIN_SCALE[metric])
+                scores[metric] = {
+                    "ewma": direction * ewma_score, "ewma_value": ewma_value, "ewma_baseline": mean,
+                    "seasonal": direction * seasonal_score, "seasonal_value": last_value, "seasonal_baseline": median
+                }
+        return scores
+    
+    def _ewma(self, values: np.ndarray, min_scale: float):
+        baseline, recent = values[:, :-self.recent_days], values[:, -self.recent_days:]
+        present = ~np.isnan(baseline)
+        count = present.sum(axis=1)
+        mean = np.where(present, baseline, 0).sum(axis=1) / count
+        std = np.sqrt(np.where(present, (baseline - mean[:, None]) ** 2, 0).sum(axis=1) / (count - 1))
+        scale = np.maximum(std, min_scale)
+        mean = np.where(count >= self.min_baseline_days, mean, np.nan)
+        
+        # Days without records carry the statistic forward; steps counts the days that moved it
+        ewma, steps = mean.copy(), np.zeros(len(values))
+        decay = 1 - self.ewma_lambda
+        for day in recent.T:
+            has = ~np.isnan(day)
+            ewma = np.where(has, self.ewma_lambda * day + decay * ewma, ewma)
+            steps += has
+        
+        spread = scale * np.sqrt(self.ewma_lambda / (2 - self.ewma_lambda) * (1 - decay ** (2 * steps)))
+        score = np.where(steps > 0, (ewma - mean) / spread, np.nan)
+        return score, ewma, mean
+    
+    def _seasonal(self, values: np.ndarray, min_scale: float):
+        last = values[:, -1]
+        weeks = (values.shape[1] - 1) // 7
+        if weeks < 4:
+            nan = np.full(len(values), np.nan)
+            return nan, last, nan
+        
+        # Whole weeks before the last day; column 0 is the last day's weekday
+        history = values[:, -1 - 7 * weeks:-1].reshape(len(values), weeks, 7)
+        residuals = history - np.nanmedian(history, axis=1)[:, None, :]
+        scale = np.maximum(np.nanstd(residuals.reshape(len(values), -1), axis=1, ddof=1), min_scale)
+        
+        same_weekday = history[:, -self.seasonal_weeks:, 0]
+        level = np.nanmedian(same_weekday, axis=1)
+        level = np.where((~np.isnan(same_weekday)).sum(axis=1) >= min(4, same_weekday.shape[1]), level, np.nan)
+        score = (last - level) / scale
+        return score, last, level
+    
+    def detect(self, series: QualitySeries) -> Dict[int, Optional[Dict[str, Any]]]:
+        """
+        {vendor_id: worst finding, or None when every score is within
+        z_threshold}; vendors with too little history to score are left out
+        """
+        scores = self.score(series)
+        findings = {}
+        for i, vendor_id in enumerate(series.vendor_ids):
+            worst, scored = None, False
+            for metric, metric_scores in scores.items():
+                for method in ("ewma", "seasonal"):
+                    value = metric_scores[method][i]
+                    if np.isnan(value):
+                        continue
+                    scored = True
+                    if value >= self.z_threshold and (worst is None or value > worst["score"]):
+                        worst = {
+                            "metric": metric,
+                            "method": method,
+                            "score": float(value),
+                            "current_value": float(metric_scores[f"{method}_value"][i]),
+                            "baseline": float(metric_scores[f"{method}_baseline"][i])
+                        }
+            if scored:
+                findings[vendor_id] = worst
+        return findings
+    
+    def scan(self, db: Session, vendor_ids: Optional[Iterable[int]] = None,
+             as_of: Optional[date] = None) -> Dict[str, Any]:
+        """
+        Anomalies in the series ending at as_of, by default yesterday, the
+        last whole day
+        """
+        as_of = as_of or datetime.now().date() - timedelta(days=1)
+        series = QualitySeries.build(db, as_of, self.history_days, vendor_ids)
+        findings = self.detect(series)
+        return {
+            "as_of": as_of.isoformat(),
+            "vendors_checked": len(findings),
+            "anomalies": [
+                {"vendor_id": vendor_id, "vendor_name": series.vendor_names[series.vendor_index[vendor_id]], **finding}
+                for vendor_id, finding in findings.items()
+                if finding
+            ]
+        }
+    
+    def evaluations(self, db: Session, vendor_ids: Optional[Iterable[int]] = None,
+                    as_of: Optional[date] = None) -> Dict[tuple, Optional[Dict]]:
+        """
+        QUALITY_ANOMALY evaluations in the shape AlertService.apply_evaluations
+        takes; the type is the detector's own, so a vendor scoring clean only
+        resolves the anomaly alert and never a threshold or rule alert
+        """
+        as_of = as_of or datetime.now().date() - timedelta(days=1)
+        series = QualitySeries.build(db, as_of, self.history_days, vendor_ids)
+        return {
+            (vendor_id, AlertType.QUALITY_ANOMALY): self.to_alert(finding) if finding else None
+            for vendor_id, finding in self.detect(series).items()
+        }
+    
+    def to_alert(self, finding: Dict[str, Any]) -> Dict[str, Any]:
+        """Alert dict, in the shape of AlertService.evaluate_threshold, for a finding"""
+        label, unit, direction = ANOMALY_METRICS[finding["metric"]]
+        movement = "risen above" if direction > 0 else "fallen below"
+        method = f"{self.recent_days}-day weighted trend" if finding["method"] == "ewma" else "same weekday in prior weeks"
+        severity = AlertSeverity.CRITICAL if finding["score"] >= 2 * self.z_threshold else AlertSeverity.HIGH
+        return {
+            "type": AlertType.QUALITY_ANOMALY.value,
+            "severity": severity.value,
+            "title": f"Quality Anomaly: {label}",
+            "description": (
+                f"{label} ({finding['current_value']:.1f}{unit}) has {movement} its baseline "
+                f"({finding['baseline']:.1f}{unit}) by {finding['score']:.1f} standard deviations ({method})"
+            ),
+            "current_value": round(finding["current_value"], 4),
+            "threshold_value": round(finding["baseline"], 4),
+            "variance": abs(finding["current_value"] - finding["baseline"])
+        }
+
+quality_anomaly_detector = QualityAnomalyDetector.from_env()
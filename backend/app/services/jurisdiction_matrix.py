@@ -0,0 +1,158 @@
+import numpy as np
+from sqlalchemy.orm import Session
+from sqlalchemy import func, and_, case
+from typing import List, Dict, Any, Optional
+from app.models import *
+
+class JurisdictionMatrix:
+    """
+    Dense vendor x jurisdiction performance arrays
+    
+    Row i is vendor_ids[i] and column j is jurisdiction_ids[j]; use
+    vendor_index / jurisdiction_index to go from ids to positions. Cells the
+    vendor does not cover (or that were filtered out) have present == False,
+    a record_count of 0 and NaN in every float array.
+    """
+    
+    def __init__(self, vendor_ids: List[int], jurisdictions: List[tuple]):
+        self.vendor_ids = list(vendor_ids)
+        self.jurisdiction_ids = [jurisdiction[0] for jurisdiction in jurisdictions]
+        self.jurisdiction_names = [jurisdiction[1] for jurisdiction in jurisdictions]
+        self.jurisdiction_states = [jurisdiction[2] for jurisdiction in jurisdictions]
+        self.vendor_index = {vendor_id: i for i, vendor_id in enumerate(self.vendor_ids)}
+        self.jurisdiction_index = {jurisdiction_id: j for j, jurisdiction_id in enumerate(self.jurisdiction_ids)}
+        
+        shape = (len(self.vendor_ids), len(self.jurisdiction_ids))
+        self.present = np.zeros(shape, dtype=bool)
+        self.record_count = np.zeros(shape, dtype=np.int64)
+        self.pii_rate = np.full(shape, np.nan)
+        self.disposition_rate = np.full(shape, np.nan)
+        self.coverage_percentage = np.full(shape, np.nan)
+        self.avg_turnaround_hours = np.full(shape, np.nan)
+        self.avg_freshness_days = np.full(shape, np.nan)
+    
+    @classmethod
+    def build(cls, db: Session, vendor_ids: List[int], jurisdictions: Optional[List[str]] = None,
+              min_coverage: Optional[float] = None) -> "JurisdictionMatrix":
+        """
+        Load every requested vendor's jurisdiction performance with one query
+        
+        Records are aggregated once per (vendor, jurisdiction) in a subquery
+        and joined to the coverage rows, rather than probed per coverage row,
+        so the cost follows the number of records. Both filters are applied
+        in SQL; the jurisdiction filter also narrows the record scan.
+        """
+        if not vendor_ids:
+            return cls([], [])
+        
+        records = db.query(
+            CriminalRecord.vendor_id,
+            CriminalRecord.jurisdiction_id,
+            func.count(CriminalRecord.id).label('record_count'),
+            func.avg(
+                case((CriminalRecord.pii_status == PIIStatus.COMPLETE, 1), else_=0)
+            ).label('pii_completeness_rate'),
+            func.avg(
+                case((CriminalRecord.disposition_verified == True, 1), else_=0)
+            ).label('disposition_accuracy_rate'),
+            func.avg(CriminalRecord.freshness_days).label('avg_freshness_days')
+        ).filter(CriminalRecord.vendor_id.in_(vendor_ids))
+        if jurisdictions:
+            records = records.filter(CriminalRecord.jurisdiction_id.in_(
+                db.query(Jurisdiction.id).filter(Jurisdiction.name.in_(jurisdictions))
+            ))
+        records = records.group_by(CriminalRecord.vendor_id, CriminalRecord.jurisdiction_id).subquery()
+        
+        query = db.query(
+            VendorCoverage.vendor_id,
+            Jurisdiction.id.label('jurisdiction_id'),
+            Jurisdiction.name,
+            Jurisdiction.state,
+            VendorCoverage.coverage_percentage,
+            VendorCoverage.avg_turnaround_hours,
+            records.c.record_count,
+            records.c.pii_completeness_rate,
+            records.c.disposition_accuracy_rate,
+            records.c.avg_freshness_days
+        ).join(
+            VendorCoverage, Jurisdiction.id == VendorCoverage.jurisdiction_id
+        ).join(
+            records, and_(
+                VendorCoverage.vendor_id == records.c.vendor_id,
+                VendorCoverage.jurisdiction_id == records.c.jurisdiction_id
+            )
+        ).filter(
+            VendorCoverage.vendor_id.in_(vendor_ids)
+        )
+        
+        if jurisdictions:
+            query = query.filter(Jurisdiction.name.in_(jurisdictions))
+        if min_coverage is not None:
+            query = query.filter(VendorCoverage.coverage_percentage >= min_coverage)
+        
+        rows = query.order_by(Jurisdiction.id).all()
+        if not rows:
+            return cls(vendor_ids, [])
+        
+        # Scattered in one assignment per array; float arrays turn None into NaN
+        (vendor_col, jurisdiction_col, names, states, coverage, turnaround,
+         record_count, pii_rate, disposition_rate, freshness) = zip(*rows)
+        jurisdiction_ids, first, j = np.unique(jurisdiction_col, return_index=True, return_inverse=True)
+        matrix = cls(vendor_ids, [
+            (jurisdiction_id, names[k], states[k])
+            for jurisdiction_id, k in zip(jurisdiction_ids.tolist(), first.tolist())
+        ])
+        vendor_array = np.array(matrix.vendor_ids)
+        by_id = np.argsort(vendor_array)
+        i = by_id[np.searchsorted(vendor_array[by_id], vendor_col)]
+        matrix.present[i, j] = True
+        matrix.record_count[i, j] = np.array(record_count, dtype=float)
+        matrix.pii_rate[i, j] = np.array(pii_rate, dtype=float) * 100
+        matrix.disposition_rate[i, j] = np.array(disposition_rate, dtype=float) * 100
+        matrix.coverage_percentage[i, j] = np.array(coverage, dtype=float)
+        matrix.avg_turnaround_hours[i, j] = np.array(turnaround, dtype=float)
+        matrix.avg_freshness_days[i, j] = np.array(freshness, dtype=float)
+        
+        return matrix
+    
+    def rows_for_vendor(self, vendor_id: int) -> List[Dict]:
+        """One vendor's jurisdictions in the get_jurisdiction_performance format"""
+        i = self.vendor_index.get(vendor_id)
+        if i is None:
+            return []
+        
+        return [
+            {
+                "jurisdiction": self.jurisdiction_names[j],
+                "state": self.jurisdiction_states[j],
+                "coverage_percentage": _to_float(self.coverage_percentage[i, j]),
+                "avg_turnaround_hours": _to_float(self.avg_turnaround_hours[i, j]),
+                "record_count": int(self.record_count[i, j]),
+                "pii_completeness_rate": float(self.pii_rate[i, j]),
+                "disposition_accuracy_rate": float(self.disposition_rate[i, j])
+            }
+            for j in np.flatnonzero(self.present[i])
+        ]
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Compact JSON form: index lists plus row-major arrays, null for absent cells"""
+        return {
+            "vendor_ids": self.vendor_ids,
+            "jurisdictions": [
+                {"id": jurisdiction_id, "name": name, "state": state}
+                for jurisdiction_id, name, state in zip(
+                    self.jurisdiction_ids, self.jurisdiction_names, self.jurisdiction_states
+                )
+            ],
+            "record_count": self.record_count.tolist(),
+            "pii_completeness_rate": _to_nullable(self.pii_rate),
+            "disposition_accuracy_rate": _to_nullable(self.disposition_rate),
+            "coverage_percentage": _to_nullable(self.coverage_percentage),
+            "avg_turnaround_hours": _to_nullable(self.avg_turnaround_hours)
+        }
+
+def _to_float(value) -> Optional[float]:
+    return None if np.isnan(value) else float(value)
+
+def _to_nullable(values: np.ndarray) -> List[List[Optional[float]]]:
+    return np.where(np.isnan(values), None, np.round(values, 2)).tolist()
@@ -0,0 +1,127 @@
+import asyncio
+import logging
+import os
+import socket
+import time
+import uuid
+from typing import Optional
+from sqlalchemy import text
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from app.database.db import engine, SessionLocal
+
+logger = logging.getLogger(__name__)
+
+class LeasedScheduler:
+    """
+    In-process background loop that runs a job on an interval in one worker
+    
+    Every uvicorn worker runs the loop, but only the holder of the lease row
+    in lease_table runs the job. The leader renews its lease on every poll;
+    if it dies, another worker takes over once the lease expires. The time
+    of the last run is kept in the same row, so restarts and leader changes
+    do not run early. Subclasses set lease_table and job_name and implement
+    run_job.
+    """
+    
+    lease_table = ""
+    job_name = ""
+    
+    def __init__(self, interval_seconds: float = 3600.0, poll_seconds: Optional[float] = None):
+        self.interval_seconds = interval_seconds
+        self.poll_seconds = poll_seconds or min(interval_seconds, 60.0)
+        self.lease_seconds = self.poll_seconds * 3
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._task: Optional[asyncio.Task] = None
+    
+    @property
+    def enabled(self) -> bool:
+        return self.interval_seconds > 0
+    
+    def start(self) -> None:
+        if not self.enabled or self._task is not None:
+            return
+        with engine.connect() as conn:
+            conn.execute(text(
+                f"CREATE TABLE IF NOT EXISTS {self.lease_table} "
+                "(id INTEGER PRIMARY KEY, holder VARCHAR(255), expires_at FLOAT, last_run_at FLOAT)"
+            ))
+            conn.commit()
+        self._task = asyncio.get_running_loop().create_task(self._run())
+    
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+    
+    async def _run(self) -> None:
+        while True:
+            try:
+                # Database work runs off the event loop so requests are not blocked
+                await asyncio.to_thread(self.run_once)
+            except Exception:
+                logger.exception("%s failed", self.job_name)
+            await asyncio.sleep(self.poll_seconds)
+    
+    def run_once(self) -> bool:
+        """Renew or claim the lease and run the job if due; returns True when it ran"""
+        now = time.time()
+        db = SessionLocal()
+        try:
+            last_run_at = self._acquire_lease(db, now)
+            if last_run_at is False:
+                return False
+            if last_run_at is not None and now - last_run_at < self.interval_seconds:
+                return False
+            
+            self.run_job(db, now)
+            return True
+        finally:
+            db.close()
+    
+    def run_job(self, db: Session, now: float) -> None:
+        """The job; it must call record_run(db, now) and commit"""
+        raise NotImplementedError
+    
+    def record_run(self, db: Session, now: float) -> None:
+        """Stamp the lease row with this run, in the caller's transaction"""
+        db.execute(
+            text(f"UPDATE {self.lease_table} SET last_run_at = :now WHERE id = 1 AND holder = :holder"),
+            {"now": now, "holder": self.worker_id}
+        )
+    
+    def _acquire_lease(self, db: Session, now: float):
+        """
+        Take or extend the lease; returns the last run time (None if never
+        run) when this worker is the leader, False otherwise
+        """
+        result = db.execute(
+            text(
+                f"UPDATE {self.lease_table} SET holder = :holder, expires_at = :expires "
+                "WHERE id = 1 AND (holder = :holder OR expires_at < :now)"
+            ),
+            {"holder": self.worker_id, "expires": now + self.lease_seconds, "now": now}
+        )
+        if result.rowcount == 0:
+            try:
+                db.execute(
+                    text(
+                        f"INSERT INTO {self.lease_table} (id, holder, expires_at, last_run_at) "
+                        "VALUES (1, :holder, :expires, NULL)"
+                    ),
+                    {"holder": self.worker_id, "expires": now + self.lease_seconds}
+                )
+            except IntegrityError:
+                db.rollback()
+                # Another worker holds an unexpired lease
+                return False
+        db.commit()
+        
+        return db.execute(
+            text(f"SELECT last_run_at FROM {self.lease_table} WHERE id = 1")
+        ).scalar()
@@ -0,0 +1,145 @@
+import numpy as np
+from sqlalchemy.orm import Session
+from typing import List, Dict, Any, Optional, Sequence
+from app.models import *
+from app.services.score_cache import market_cache
+from app.services.scoring_engine import ScoringEngine
+from app.services.scoring_kernel import ScoringKernel
+from app.services.scoring_profiles import ScoringProfileService
+
+DEFAULT_PERCENTILES = (25, 75, 90)
+
+# Response key per row of the stacked metric array
+_METRICS = ("quality_benchmarks", "cost_benchmarks", "coverage_benchmarks")
+
+class MarketBenchmarkService:
+    """
+    Market distribution of vendor quality, cost and coverage
+    
+    Every vendor's metrics come from one batch: the score rollups for the
+    whole market, or the jurisdiction matrix for a state or jurisdiction
+    slice. They are stacked into one (metrics x vendors) array and
+    summarized by a single numpy.percentile call, which also yields the
+    minimum, median and maximum. Results are cached in market_cache until
+    a vendor, coverage, record or scoring profile change is committed.
+    """
+    
+    @staticmethod
+    def get_benchmarks(db: Session, percentiles: Optional[Sequence[float]] = None,
+                       state: Optional[str] = None, jurisdiction: Optional[str] = None,
+                       profile: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Benchmarks of the active vendors, or of those with records in one
+        state or jurisdiction
+        
+        In a slice, quality and coverage are the vendor's within it:
+        record-weighted rates, and coverage averaged over the slice's
+        jurisdictions with uncovered ones counting as 0. Raises ValueError for
+        percentiles outside 0-100, a state and a jurisdiction together, or an
+        unknown profile.
+        """
+        percentiles = sorted({float(p) for p in (percentiles or DEFAULT_PERCENTILES)})
+        if any(not 0 <= p <= 100 for p in percentiles):
+            raise ValueError("Percentiles must be between 0 and 100")
+        if state and jurisdiction:
+            raise ValueError("Benchmark either a state or a jurisdiction, not both")
+        
+        key = (profile, tuple(percentiles), state, jurisdiction)
+        cached = market_cache.get(key)
+        if cached is not None:
+            return cached
+        
+        # Read before the data, so a write committed meanwhile keeps this result out of the cache
+        generation = market_cache.generation
+        if state or jurisdiction:
+            values = MarketBenchmarkService._slice_metrics(db, state, jurisdiction, profile)
+        else:
+            values = MarketBenchmarkService._market_metrics(db, profile)
+        
+        if values.shape[1] == 0:
+            result = {"error": "No active vendors found"}
+        else:
+            result = MarketBenchmarkService._summarize(values, percentiles)
+            result["market_size"] = values.shape[1]
+            result["slice"] = {"state": state, "jurisdiction": jurisdiction}
+            result["profile"] = profile
+        
+        market_cache.put(key, generation, result)
+        return result
+    
+    @staticmethod
+    def _market_metrics(db: Session, profile: Optional[str]) -> np.ndarray:
+        """(metrics, vendors) array for every active vendor, scored in one batch"""
+        vendors = db.query(Vendor.id, Vendor.cost_per_record, Vendor.coverage_percentage).filter(
+            Vendor.is_active == True
+        ).all()
+        scores = ScoringEngine.score_vendors(db, [vendor.id for vendor in vendors], profile=profile)
+        
+        return np.array([
+            [scores[vendor.id]["quality_score"] for vendor in vendors],
+            [vendor.cost_per_record for vendor in vendors],
+            [vendor.coverage_percentage for vendor in vendors]
+        ], dtype=float).reshape(len(_METRICS), len(vendors))
+    
+    @staticmethod
+    def _slice_metrics(db: Session, state: Optional[str], jurisdiction: Optional[str],
+                       profile: Optional[str]) -> np.ndarray:
+        """(metrics, vendors) array for the active vendors with records in the slice, from one matrix query"""
+        weights = ScoringProfileService.get_weights(db, profile)
+        if jurisdiction:
+            names = [jurisdiction]
+        else:
+            names = [name for (name,) in db.query(Jurisdiction.name).filter(Jurisdiction.state == state)]
+        vendors = db.query(Vendor.id, Vendor.cost_per_record).filter(Vendor.is_active == True).all()
+        if not names or not vendors:
+            return np.empty((len(_METRICS), 0))
+        
+        matrix = ScoringEngine.get_jurisdiction_matrix(db, [vendor.id for vendor in vendors], names)
+        counts = matrix.record_count.astype(float)
+        records = counts.sum(axis=1)
+        in_slice = records > 0
+        
+        def slice_total(values: np.ndarray) -> np.ndarray:
+            return np.where(matrix.present, np.nan_to_num(values), 0.0).sum(axis=1)[in_slice]
+        
+        def weighted(rates: np.ndarray) -> np.ndarray:
+            return slice_total(rates * counts) / records[in_slice]
+        
+        coverage = slice_total(matrix.coverage_percentage) / len(names)
+        quality = ScoringKernel.quality_scores(
+            weighted(matrix.pii_rate),
+            weighted(matrix.disposition_rate),
+            weighted(matrix.avg_freshness_days),
+            coverage,
+            weights
+        )
+        cost = np.array([vendor.cost_per_record for vendor in vendors], dtype=float)[in_slice]
+        
+        return np.vstack((np.round(quality, 2), cost, coverage))
+    
+    @staticmethod
+    def _summarize(values: np.ndarray, percentiles: List[float]) -> Dict[str, Any]:
+        """Min, max, median, mean and requested percentiles of each metric row, from one percentile call"""
+        quantiles = np.nanpercentile(values, [0, 50, 100, *percentiles], axis=1)
+        averages = np.nanmean(values, axis=1)
+        
+        return {
+            name: {
+                "min": float(quantiles[0, row]),
+                "max": float(quantiles[2, row]),
+                "median": float(quantiles[1, row]),
+                "average": float(averages[row]),
+                "percentiles": {
+                    _ordinal(p): float(quantiles[3 + k, row])
+                    for k, p in enumerate(percentiles)
+                }
+            }
+            for row, name in enumerate(_METRICS)
+        }
+
+def _ordinal(percentile: float) -> str:
+    number = int(percentile) if percentile.is_integer() else percentile
+    suffix = "th"
+    if isinstance(number, int) and number % 100 not in (11, 12, 13):
+        suffix = {1: "st", 2: "nd", 3: "rd"}.get(number % 10, "th")
+    return f"{number}{suffix}"
@@ -0,0 +1,256 @@
+import os
+import numpy as np
+from datetime import datetime, timedelta, timezone
+from typing import List, Dict, Optional, Tuple
+from sqlalchemy import func, delete, case
+from sqlalchemy.orm import Session
+from app.models import *
+from app.database.upsert import upsert_counters
+
+# Finest to coarsest; each tier is kept for its retention window
+HISTORY_TIERS = ("raw", "hourly", "daily")
+HISTORY_RETENTION_DAYS = {
+    "raw": int(os.getenv("METRICS_RAW_RETENTION_DAYS", "7")),
+    "hourly": int(os.getenv("METRICS_HOURLY_RETENTION_DAYS", "90")),
+    "daily": int(os.getenv("METRICS_DAILY_RETENTION_DAYS", "1825"))
+}
+_BUCKETS_PER_DAY = {"hourly": 24, "daily": 1}
+
+# VendorMetrics columns summed into each bucket, in history response order
+_METRICS = ("pii_completeness", "disposition_accuracy", "avg_freshness_days", "geographic_coverage", "calculated_score")
+
+class MetricsHistoryService:
+    """
+    Tiered vendor_metrics history: raw snapshots plus hourly and daily buckets
+    
+    Buckets are updated in the same transaction as the snapshots that feed
+    them, so trimming old raw rows loses nothing already rolled up.
+    """
+    
+    @staticmethod
+    def apply_snapshot_rows(db: Session, rows: List[Dict]) -> None:
+        """Add VendorMetrics rows (dicts with recorded_at set) into their hourly and daily buckets"""
+        deltas = {}
+        for row in rows:
+            recorded_at = _as_utc(row["recorded_at"])
+            values = [row[name] or 0.0 for name in _METRICS]
+            for tier in _BUCKETS_PER_DAY:
+                key = (row["vendor_id"], tier, _bucket_start(recorded_at, tier))
+                bucket = deltas.get(key)
+                if bucket is None:
+                    deltas[key] = [1] + values + [values[-1], values[-1]]
+                else:
+                    bucket[0] += 1
+                    for i, value in enumerate(values, start=1):
+                        bucket[i] += value
+                    bucket[-2] = min(bucket[-2], values[-1])
+                    bucket[-1] = max(bucket[-1], values[-1])
+        
+        upsert_counters(db.connection(), VendorMetricsRollup.__table__, [
+            {
+                "vendor_id": vendor_id,
+                "tier": tier,
+                "bucket_start": start,
+                "sample_count": bucket[0],
+                "calculated_score_min": bucket[-2],
+                "calculated_score_max": bucket[-1],
+                **{f"{name}_sum": value for name, value in zip(_METRICS, bucket[1:-2])}
+            }
+            for (vendor_id, tier, start), bucket in deltas.items()
+        ], ["sample_count", *(f"{name}_sum" for name in _METRICS)], {
+            "calculated_score_min": _least,
+            "calculated_score_max": _greatest
+        })
+    
+    @staticmethod
+    def rebuild_tiers(db: Session) -> int:
+        """
+        Rebuild the hourly and daily buckets covered by the raw snapshots
+        still held; returns the number of buckets rebuilt
+        
+        Buckets older than the raw retention window cannot be recomputed and
+        are left alone. If any exist, raw rows were trimmed and the earliest
+        raw day may be partial, so its buckets are kept as well.
+        """
+        earliest = db.query(func.min(VendorMetrics.recorded_at)).scalar()
+        if earliest is None:
+            return 0
+        
+        since = _bucket_start(earliest, "daily")
+        if db.query(VendorMetricsRollup.vendor_id).filter(VendorMetricsRollup.bucket_start < since).first() is not None:
+            since += timedelta(days=1)
+        
+        db.execute(delete(VendorMetricsRollup).where(VendorMetricsRollup.bucket_start >= since))
+        rows = [
+            {"vendor_id": row.vendor_id, "recorded_at": row.recorded_at, **{name: getattr(row, name) for name in _METRICS}}
+            for row in db.query(VendorMetrics.vendor_id, VendorMetrics.recorded_at, *[
+                getattr(VendorMetrics, name) for name in _METRICS
+            ]).filter(VendorMetrics.recorded_at >= since)
+        ]
+        MetricsHistoryService.apply_snapshot_rows(db, rows)
+        db.commit()
+        
+        return db.query(VendorMetricsRollup).filter(VendorMetricsRollup.bucket_start >= since).count()
+    
+    @staticmethod
+    def backfill_if_empty(db: Session) -> bool:
+        """Build the history buckets once for databases that predate them"""
+        if db.query(VendorMetrics.id).first() is None or db.query(VendorMetricsRollup.vendor_id).first() is not None:
+            return False
+        MetricsHistoryService.rebuild_tiers(db)
+        return True
+    
+    @staticmethod
+    def apply_retention(db: Session, now: Optional[datetime] = None) -> Dict[str, int]:
+        """Delete raw snapshots and buckets older than their tier's retention; returns rows deleted per tier"""
+        now = now or datetime.now(timezone.utc)
+        deleted = {}
+        
+        raw_cutoff = now - timedelta(days=HISTORY_RETENTION_DAYS["raw"])
+        deleted["raw"] = db.execute(
+            delete(VendorMetrics).where(VendorMetrics.recorded_at < raw_cutoff)
+        ).rowcount
+        for tier in _BUCKETS_PER_DAY:
+            cutoff = now - timedelta(days=HISTORY_RETENTION_DAYS[tier])
+            deleted[tier] = db.execute(
+                delete(VendorMetricsRollup).where(
+                    VendorMetricsRollup.tier == tier,
+                    VendorMetricsRollup.bucket_start < cutoff
+                )
+            ).rowcount
+        
+        db.commit()
+        return deleted
+    
+    @staticmethod
+    def choose_tier(days: int, max_points: Optional[int] = None) -> str:
+        """
+        Finest tier still retained over the whole window; with max_points,
+        the coarsest retained tier that still has at least max_points buckets
+        """
+        retained = [tier for tier in HISTORY_TIERS if HISTORY_RETENTION_DAYS[tier] >= days] or ["daily"]
+        if max_points is None:
+            return retained[0]
+        
+        for tier in reversed(retained):
+            if tier == "raw" or days * _BUCKETS_PER_DAY[tier] >= max_points:
+                return tier
+        return retained[0]
+    
+    @staticmethod
+    def get_history(db: Session, vendor_id: int, days: int = 30, max_points: Optional[int] = None,
+                    tier: Optional[str] = None) -> Tuple[str, List[Dict]]:
+        """
+        Vendor metrics over the last `days`, newest first, from the chosen tier
+        
+        Bucketed tiers report per-bucket averages. With max_points the series
+        is thinned with LTTB on the quality score, keeping its visual shape.
+        Returns (tier, points).
+        """
+        tier = tier or MetricsHistoryService.choose_tier(days, max_points)
+        cutoff = datetime.now(timezone.utc) - timedelta(days=days)
+        
+        if tier == "raw":
+            rows = db.query(VendorMetrics.recorded_at, *[getattr(VendorMetrics, name) for name in _METRICS]).filter(
+                VendorMetrics.vendor_id == vendor_id,
+                VendorMetrics.recorded_at >= cutoff
+            ).order_by(VendorMetrics.recorded_at).all()
+            points = [
+                {
+                    "date": row.recorded_at.isoformat(),
+                    "quality_score": row.calculated_score,
+                    "pii_completeness": row.pii_completeness,
+                    "disposition_accuracy": row.disposition_accuracy,
+                    "avg_freshness_days": row.avg_freshness_days,
+                    "geographic_coverage": row.geographic_coverage
+                }
+                for row in rows
+            ]
+            timestamps = [_as_utc(row.recorded_at).timestamp() for row in rows]
+        else:
+            rows = db.query(VendorMetricsRollup).filter(
+                VendorMetricsRollup.vendor_id == vendor_id,
+                VendorMetricsRollup.tier == tier,
+                VendorMetricsRollup.bucket_start >= _bucket_start(cutoff, tier),
+                VendorMetricsRollup.sample_count > 0
+            ).order_by(VendorMetricsRollup.bucket_start).all()
+            points = [
+                {
+                    "date": _as_utc(row.bucket_start).isoformat(),
+                    "quality_score": row.calculated_score_sum / row.sample_count,
+                    "pii_completeness": row.pii_completeness_sum / row.sample_count,
+                    "disposition_accuracy": row.disposition_accuracy_sum / row.sample_count,
+                    "avg_freshness_days": row.avg_freshness_days_sum / row.sample_count,
+                    "geographic_coverage": row.geographic_coverage_sum / row.sample_count,
+                    "quality_score_min": row.calculated_score_min,
+                    "quality_score_max": row.calculated_score_max,
+                    "samples": row.sample_count
+                }
+                for row in rows
+            ]
+            timestamps = [_as_utc(row.bucket_start).timestamp() for row in rows]
+        
+        if max_points is not None and len(points) > max_points:
+            keep = lttb_indices(
+                np.array(timestamps, dtype=float),
+                np.array([point["quality_score"] or 0.0 for point in points], dtype=float),
+                max_points
+            )
+            points = [points[i] for i in keep]
+        
+        points.reverse()
+        return tier, points
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets downsampling: indices of `threshold`
+    points from a series sorted by x that keep its visual shape
+    
+    The first and last points are always kept; every other bucket keeps the
+    point forming the largest triangle with the previously kept point and
+    the mean of the next bucket.
+    """
+    n = len(x)
+    if threshold >= n:
+        return np.arange(n)
+    if threshold < 3:
+        raise ValueError("LTTB needs a threshold of at least 3 points")
+    
+    # Bucket edges over the interior points 1..n-2
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    
+    previous = 0
+    for b in range(threshold - 2):
+        start, end = edges[b], max(edges[b + 1], edges[b] + 1)
+        if b + 2 < len(edges):
+            next_start, next_end = edges[b + 1], max(edges[b + 2], edges[b + 1] + 1)
+            next_x, next_y = x[next_start:next_end].mean(), y[next_start:next_end].mean()
+        else:
+            next_x, next_y = x[-1], y[-1]
+        
+        areas = np.abs(
+            (x[previous] - next_x) * (y[start:end] - y[previous])
+            - (x[previous] - x[start:end]) * (next_y - y[previous])
+        )
+        previous = start + int(np.argmax(areas))
+        selected[b + 1] = previous
+    
+    return selected
+
+def _as_utc(value: datetime) -> datetime:
+    # SQLite hands back naive datetimes, which are stored in UTC
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+def _bucket_start(value: datetime, tier: str) -> datetime:
+    value = _as_utc(value).replace(minute=0, second=0, microsecond=0)
+    return value.replace(hour=0) if tier == "daily" else value
+
+def _least(column, value):
+    return case((column.is_(None), value), (value < column, value), else_=column)
+
+def _greatest(column, value):
+    return case((column.is_(None), value), (value > column, value), else_=column)
@@ -0,0 +1,390 @@
+import time
+from collections import defaultdict
+from datetime import date, datetime
+from typing import Dict, List, Any, Optional, Tuple
+from sqlalchemy import event, func, case, select, insert, delete, inspect
+from sqlalchemy.orm import Session
+from app.models import *
+from app.database.upsert import upsert_counters
+from app.services.score_cache import vendor_score_cache, market_cache
+from app.services.alert_evaluator import streaming_alert_evaluator
+
+# Counter columns on VendorScoreRollup, in the order deltas are accumulated
+_COUNTERS = ("total_records", "pii_complete_count", "verified_count", "freshness_sum")
+
+# Counter columns on VendorDailyQuality, in the order deltas are accumulated
+_DAILY_COUNTERS = ("record_count", "pii_complete_count", "verified_count", "turnaround_sum", "freshness_sum")
+
+# Models whose changes can move market benchmarks
+_MARKET_MODELS = (Vendor, VendorCoverage, Jurisdiction, CriminalRecord, ScoringProfile)
+
+# Record attributes that feed the rollups (vendor moves vendor_id on flush); edits to any other column need no rollup work
+_TRACKED_FIELDS = (
+    "vendor_id", "pii_status", "disposition_verified", "freshness_days",
+    "vendor_delivery_date", "turnaround_hours", "vendor"
+)
+
+class RollupService:
+    """Incrementally maintained per-vendor and per-vendor-day quality counters"""
+    
+    @staticmethod
+    def record_contribution(pii_status, disposition_verified, freshness_days) -> List[float]:
+        """Counter increments contributed by a single criminal record"""
+        return [
+            1,
+            1 if pii_status == PIIStatus.COMPLETE else 0,
+            1 if disposition_verified else 0,
+            freshness_days or 0.0
+        ]
+    
+    @staticmethod
+    def apply_deltas(connection, deltas: Dict[int, List[float]]) -> None:
+        """Add counter deltas to each vendor's rollup row, creating rows as needed, in one upsert"""
+        upsert_counters(connection, VendorScoreRollup.__table__, [
+            {"vendor_id": vendor_id, **dict(zip(_COUNTERS, delta))}
+            for vendor_id, delta in deltas.items()
+            if vendor_id is not None and any(delta)
+        ], _COUNTERS)
+    
+    @staticmethod
+    def apply_daily_deltas(connection, deltas: Dict[Tuple[int, date], List[float]]) -> None:
+        """Add counter deltas to each (vendor, day) row, creating rows as needed, in one upsert"""
+        upsert_counters(connection, VendorDailyQuality.__table__, [
+            {"vendor_id": vendor_id, "day": day, **dict(zip(_DAILY_COUNTERS, delta))}
+            for (vendor_id, day), delta in deltas.items()
+            if vendor_id is not None and day is not None and any(delta)
+        ], _DAILY_COUNTERS)
+    
+    @staticmethod
+    def apply_record_rows(db: Session, rows: List[Dict]) -> None:
+        """
+        Count rows written with a Core bulk insert into the rollups
+        
+        Bulk inserts bypass the ORM flush, so callers using
+        db.execute(insert(CriminalRecord), rows) must call this before committing.
+        Bulk UPDATE and DELETE statements are refused by _guard_bulk_writes;
+        change or delete the records through the ORM instead.
+        """
+        deltas = defaultdict(lambda: [0, 0, 0, 0.0])
+        daily_deltas = defaultdict(lambda: [0, 0, 0, 0.0, 0.0])
+        for row in rows:
+            state = _RecordState(
+                row.get("vendor_id"), row.get("pii_status"), row.get("disposition_verified"),
+                row.get("freshness_days"), row.get("vendor_delivery_date"), row.get("turnaround_hours")
+            )
+            state.add_to(deltas, daily_deltas, 1)
+        
+        RollupService.apply_deltas(db.connection(), deltas)
+        RollupService.apply_daily_deltas(db.connection(), daily_deltas)
+        _mark_vendors_changed(db, deltas.keys())
+        _stage_daily_deltas(db, daily_deltas)
+    
+    @staticmethod
+    def stale_record_deltas(session: Session) -> Tuple[Dict[int, List[float]], Dict[Tuple[int, date], List[float]]]:
+        """
+        Vendor and vendor-day deltas removing what the database holds for the
+        CriminalRecords about to be changed or deleted; run before the flush
+        """
+        deltas = defaultdict(lambda: [0, 0, 0, 0.0])
+        daily_deltas = defaultdict(lambda: [0, 0, 0, 0.0, 0.0])
+        
+        deleted = [obj for obj in session.deleted if isinstance(obj, CriminalRecord)]
+        stale_ids = [obj.id for obj in _changed_records(session) + deleted if obj.id is not None]
+        if stale_ids:
+            previous = session.connection().execute(
+                select(
+                    CriminalRecord.vendor_id,
+                    CriminalRecord.pii_status,
+                    CriminalRecord.disposition_verified,
+                    CriminalRecord.freshness_days,
+                    CriminalRecord.vendor_delivery_date,
+                    CriminalRecord.turnaround_hours
+                ).where(CriminalRecord.id.in_(stale_ids))
+            )
+            for row in previous:
+                _RecordState.of(row).add_to(deltas, daily_deltas, -1)
+        
+        return deltas, daily_deltas
+    
+    @staticmethod
+    def flushed_record_deltas(session: Session) -> Tuple[Dict[int, List[float]], Dict[Tuple[int, date], List[float]]]:
+        """
+        Vendor and vendor-day deltas adding the new and changed CriminalRecords
+        just flushed
+        
+        Run after the flush, once vendor_id is set on records attached through
+        the vendor relationship, including to a vendor created in the same flush.
+        """
+        deltas = defaultdict(lambda: [0, 0, 0, 0.0])
+        daily_deltas = defaultdict(lambda: [0, 0, 0, 0.0, 0.0])
+        
+        added = [obj for obj in session.new if isinstance(obj, CriminalRecord)]
+        for obj in added + _changed_records(session):
+            _RecordState.of(obj).add_to(deltas, daily_deltas, 1)
+        
+        return deltas, daily_deltas
+    
+    @staticmethod
+    def aggregate_from_records(db: Session, vendor_ids: Optional[List[int]] = None) -> Dict[int, List[float]]:
+        """Recompute counters with a full GROUP BY vendor_id scan of criminal_records"""
+        query = db.query(
+            CriminalRecord.vendor_id,
+            func.count(CriminalRecord.id).label('total_records'),
+            func.sum(
+                case((CriminalRecord.pii_status == PIIStatus.COMPLETE, 1), else_=0)
+            ).label('pii_complete_count'),
+            func.sum(
+                case((CriminalRecord.disposition_verified == True, 1), else_=0)
+            ).label('verified_count'),
+            func.sum(CriminalRecord.freshness_days).label('freshness_sum')
+        ).filter(CriminalRecord.vendor_id.isnot(None))
+        
+        if vendor_ids is not None:
+            query = query.filter(CriminalRecord.vendor_id.in_(vendor_ids))
+        
+        return {
+            row.vendor_id: [
+                row.total_records or 0,
+                row.pii_complete_count or 0,
+                row.verified_count or 0,
+                float(row.freshness_sum or 0.0)
+            ]
+            for row in query.group_by(CriminalRecord.vendor_id)
+        }
+    
+    @staticmethod
+    def reconcile(db: Session) -> Dict[str, Any]:
+        """Rebuild every vendor's counters from scratch and report any drift found"""
+        actual = RollupService.aggregate_from_records(db)
+        stored = {row.vendor_id: row for row in db.query(VendorScoreRollup).all()}
+        
+        drift = []
+        for vendor_id in sorted(set(actual) | set(stored)):
+            expected = actual.get(vendor_id, [0, 0, 0, 0.0])
+            rollup = stored.get(vendor_id)
+            current = [getattr(rollup, name) for name in _COUNTERS] if rollup else [0, 0, 0, 0.0]
+            
+            mismatched = {
+                name: {"stored": have, "actual": want}
+                for name, have, want in zip(_COUNTERS, current, expected)
+                if abs(have - want) > 1e-6 * max(1.0, abs(want))
+            }
+            if mismatched:
+                drift.append({"vendor_id": vendor_id, "counters": mismatched})
+            
+            if rollup is None:
+                db.add(VendorScoreRollup(vendor_id=vendor_id, **dict(zip(_COUNTERS, expected))))
+            else:
+                for name, value in zip(_COUNTERS, expected):
+                    setattr(rollup, name, value)
+        
+        db.commit()
+        vendor_score_cache.clear()
+        market_cache.invalidate()
+        
+        return {
+            "vendors_checked": len(set(actual) | set(stored)),
+            "vendors_drifted": len(drift),
+            "drift": drift
+        }
+    
+    @staticmethod
+    def backfill_daily_quality(db: Session, vendor_ids: Optional[List[int]] = None) -> int:
+        """Rebuild vendor_daily_quality from criminal_records; returns the number of day rows written"""
+        day = func.date(CriminalRecord.vendor_delivery_date)
+        query = db.query(
+            CriminalRecord.vendor_id,
+            day.label('day'),
+            func.count(CriminalRecord.id).label('record_count'),
+            func.sum(
+                case((CriminalRecord.pii_status == PIIStatus.COMPLETE, 1), else_=0)
+            ).label('pii_complete_count'),
+            func.sum(
+                case((CriminalRecord.disposition_verified == True, 1), else_=0)
+            ).label('verified_count'),
+            func.sum(CriminalRecord.turnaround_hours).label('turnaround_sum'),
+            func.sum(CriminalRecord.freshness_days).label('freshness_sum')
+        ).filter(
+            CriminalRecord.vendor_id.isnot(None),
+            CriminalRecord.vendor_delivery_date.isnot(None)
+        )
+        
+        stale = delete(VendorDailyQuality)
+        if vendor_ids is not None:
+            query = query.filter(CriminalRecord.vendor_id.in_(vendor_ids))
+            stale = stale.where(VendorDailyQuality.vendor_id.in_(vendor_ids))
+        
+        rows = [
+            {
+                "vendor_id": row.vendor_id,
+                "day": _as_date(row.day),
+                "record_count": row.record_count or 0,
+                "pii_complete_count": row.pii_complete_count or 0,
+                "verified_count": row.verified_count or 0,
+                "turnaround_sum": float(row.turnaround_sum or 0.0),
+                "freshness_sum": float(row.freshness_sum or 0.0)
+            }
+            for row in query.group_by(CriminalRecord.vendor_id, day)
+        ]
+        
+        db.execute(stale)
+        if rows:
+            db.execute(insert(VendorDailyQuality), rows)
+        db.commit()
+        
+        return len(rows)
+    
+    @staticmethod
+    def backfill_if_empty(db: Session) -> bool:
+        """Build the rollups once for databases that predate them"""
+        if db.query(CriminalRecord.id).first() is None:
+            return False
+        
+        built = False
+        if db.query(VendorScoreRollup.vendor_id).first() is None:
+            RollupService.reconcile(db)
+            built = True
+        if db.query(VendorDailyQuality.vendor_id).first() is None:
+            RollupService.backfill_daily_quality(db)
+            built = True
+        
+        return built
+
+class _RecordState:
+    """The rollup-relevant columns of one version of a criminal record"""
+    
+    __slots__ = ("vendor_id", "pii_status", "disposition_verified", "freshness_days",
+                 "vendor_delivery_date", "turnaround_hours")
+    
+    def __init__(self, vendor_id, pii_status, disposition_verified, freshness_days,
+                 vendor_delivery_date, turnaround_hours):
+        self.vendor_id = vendor_id
+        self.pii_status = pii_status
+        self.disposition_verified = disposition_verified
+        self.freshness_days = freshness_days
+        self.vendor_delivery_date = vendor_delivery_date
+        self.turnaround_hours = turnaround_hours
+    
+    @classmethod
+    def of(cls, record) -> "_RecordState":
+        return cls(
+            record.vendor_id, record.pii_status, record.disposition_verified,
+            record.freshness_days, record.vendor_delivery_date, record.turnaround_hours
+        )
+    
+    def add_to(self, deltas: Dict, daily_deltas: Dict, sign: int) -> None:
+        contribution = RollupService.record_contribution(
+            self.pii_status, self.disposition_verified, self.freshness_days
+        )
+        _accumulate(deltas[self.vendor_id], contribution, sign)
+        
+        if self.vendor_delivery_date is not None:
+            daily = contribution[:3] + [self.turnaround_hours or 0.0, contribution[3]]
+            _accumulate(daily_deltas[(self.vendor_id, _as_date(self.vendor_delivery_date))], daily, sign)
+
+def _accumulate(delta: List[float], contribution: List[float], sign: int) -> None:
+    for i, amount in enumerate(contribution):
+        delta[i] += sign * amount
+
+def _as_date(value) -> date:
+    # func.date() comes back as a string on SQLite and a date on PostgreSQL
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value)[:10])
+
+def _changed_records(session: Session) -> List[CriminalRecord]:
+    return [
+        obj for obj in session.dirty
+        if isinstance(obj, CriminalRecord) and any(
+            inspect(obj).attrs[field].history.has_changes() for field in _TRACKED_FIELDS
+        )
+    ]
+
+def _apply_record_deltas(session: Session, deltas: Dict, daily_deltas: Dict) -> None:
+    if deltas:
+        RollupService.apply_deltas(session.connection(), deltas)
+        _mark_vendors_changed(session, deltas.keys())
+    if daily_deltas:
+        RollupService.apply_daily_deltas(session.connection(), daily_deltas)
+        _stage_daily_deltas(session, daily_deltas)
+
+def _mark_vendors_changed(session: Session, vendor_ids) -> None:
+    # Cached scores for these vendors are dropped once the transaction commits
+    session.info.setdefault("score_changed_vendors", set()).update(
+        vendor_id for vendor_id in vendor_ids if vendor_id is not None
+    )
+
+def _stage_daily_deltas(session: Session, daily_deltas: Dict) -> None:
+    # Handed to the streaming alert evaluator once the transaction commits
+    if not streaming_alert_evaluator.running:
+        return
+    staged = session.info.setdefault("staged_daily_deltas", {})
+    for key, delta in daily_deltas.items():
+        _accumulate(staged.setdefault(key, [0, 0, 0, 0.0, 0.0]), delta, 1)
+
+@event.listens_for(Session, "before_flush")
+def _maintain_rollups(session, flush_context, instances):
+    # Runs inside the flush's transaction, so counters commit or roll back with the records.
+    # Old row values are only readable before the flush; new ones are added in _count_flushed_records.
+    _apply_record_deltas(session, *RollupService.stale_record_deltas(session))
+    
+    # Coverage lives on the vendor row and feeds the score too, so it invalidates the cached score
+    coverage_changed = [
+        obj.id for obj in session.dirty
+        if isinstance(obj, Vendor) and obj.id is not None
+        and inspect(obj).attrs.coverage_percentage.history.has_changes()
+    ]
+    if coverage_changed:
+        _mark_vendors_changed(session, coverage_changed)
+    
+    # Cost, activation, coverage rows and profiles feed benchmarks without touching the rollups
+    touched = (obj for changed in (session.new, session.dirty, session.deleted) for obj in changed)
+    if any(isinstance(obj, _MARKET_MODELS) for obj in touched):
+        session.info["market_changed"] = True
+
+@event.listens_for(Session, "after_flush")
+def _count_flushed_records(session, flush_context):
+    # Foreign keys of records attached through relationships are only set by now
+    _apply_record_deltas(session, *RollupService.flushed_record_deltas(session))
+
+@event.listens_for(Session, "do_orm_execute")
+def _guard_bulk_writes(orm_execute_state):
+    # Bulk UPDATE/DELETE never reach the flush listeners, so the rollups would drift silently
+    if not (orm_execute_state.is_update or orm_execute_state.is_delete):
+        return
+    table = getattr(orm_execute_state.statement, "table", None)
+    if getattr(table, "name", None) != CriminalRecord.__tablename__:
+        return
+    if not orm_execute_state.execution_options.get("skip_rollups"):
+        raise RuntimeError(
+            "Bulk UPDATE/DELETE of criminal_records bypasses the score rollups; change the records "
+            "through the ORM, or pass execution_options(skip_rollups=True) and run "
+            "python -m app.database.reconcile afterwards"
+        )
+
+@event.listens_for(Session, "before_commit")
+def _stamp_commit(session):
+    # Taken before the data becomes visible, so windows read after it may already hold this commit's deltas
+    session.info["commit_started"] = time.monotonic()
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_vendor_scores(session):
+    changed = session.info.pop("score_changed_vendors", None)
+    if changed:
+        vendor_score_cache.invalidate(changed)
+    if session.info.pop("market_changed", None) or changed:
+        market_cache.invalidate()
+    
+    commit_started = session.info.pop("commit_started", float("-inf"))
+    daily_deltas = session.info.pop("staged_daily_deltas", None)
+    if daily_deltas:
+        streaming_alert_evaluator.submit(daily_deltas, commit_started, time.monotonic())
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_vendor_changes(session, previous_transaction):
+    session.info.pop("score_changed_vendors", None)
+    session.info.pop("staged_daily_deltas", None)
+    session.info.pop("market_changed", None)
+    session.info.pop("commit_started", None)
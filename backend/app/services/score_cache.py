@@ -0,0 +1,140 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Optional
+
+class ScoreCache:
+    """
+    LRU cache of computed vendor metrics keyed by vendor id
+    
+    Writers call invalidate() after commit, which drops the vendors' entries
+    and bumps a generation counter. Readers take the generation before
+    querying and pass it to put(); a result read before the last
+    invalidation is refused, so a read racing a write cannot repopulate the
+    cache with stale metrics. The TTL bounds staleness for writes made by
+    other worker processes.
+    """
+    
+    def __init__(self, max_entries: int = 10000, ttl_seconds: float = 300.0):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[int, tuple]" = OrderedDict()  # vendor_id -> (expires_at, value)
+        self._lock = threading.Lock()
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    @classmethod
+    def from_env(cls) -> "ScoreCache":
+        return cls(
+            max_entries=int(os.getenv("SCORE_CACHE_MAX_ENTRIES", "10000")),
+            ttl_seconds=float(os.getenv("SCORE_CACHE_TTL_SECONDS", "300"))
+        )
+    
+    def get(self, vendor_id: int) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(vendor_id)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._entries[vendor_id]
+                self.misses += 1
+                return None
+            
+            self._entries.move_to_end(vendor_id)
+            self.hits += 1
+            return entry[1]
+    
+    def put(self, vendor_id: int, generation: int, value: Any) -> None:
+        with self._lock:
+            if generation != self.generation:
+                return
+            
+            self._entries[vendor_id] = (time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(vendor_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+    
+    def invalidate(self, vendor_ids: Iterable[int]) -> None:
+        with self._lock:
+            self.generation += 1
+            for vendor_id in vendor_ids:
+                self._entries.pop(vendor_id, None)
+    
+    def clear(self) -> None:
+        with self._lock:
+            self.generation += 1
+            self._entries.clear()
+    
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": (self.hits / lookups * 100) if lookups else 0.0
+            }
+
+class MarketCache:
+    """
+    Small LRU cache of market-wide results, dropped whole on any vendor data change
+    
+    A market result depends on every vendor, so there is nothing finer to
+    invalidate. Callers read generation before computing and pass it to
+    put(); a result computed before the last invalidation is refused, so a
+    read racing a write cannot store stale results. The TTL bounds staleness
+    for writes made by other worker processes.
+    """
+    
+    def __init__(self, max_entries: int = 256, ttl_seconds: float = 300.0):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Any, tuple]" = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+    
+    @classmethod
+    def from_env(cls) -> "MarketCache":
+        return cls(ttl_seconds=float(os.getenv("MARKET_CACHE_TTL_SECONDS", "300")))
+    
+    def get(self, key: Any) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+    
+    def put(self, key: Any, generation: int, value: Any) -> None:
+        with self._lock:
+            if generation != self.generation:
+                return
+            
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+    
+    def invalidate(self) -> None:
+        with self._lock:
+            self.generation += 1
+            self._entries.clear()
+
+# Process-wide cache shared by ScoringEngine and the write-path invalidation hooks
+vendor_score_cache = ScoreCache.from_env()
+
+# Market benchmarks, dropped by the same hooks on any vendor, coverage, record or profile change
+market_cache = MarketCache.from_env()
@@ -1,29 +1,176 @@
+import numpy as np
 from sqlalchemy.orm import Session
-from sqlalchemy import func, and_
+from sqlalchemy import func, and_, case
 from datetime import datetime, timedelta
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from app.models import *
 from app.database import get_db
+from app.services.score_cache import vendor_score_cache
+from app.services.jurisdiction_matrix import JurisdictionMatrix
+from app.services.scoring_profiles import ScoringProfileService
+from app.services.scoring_kernel import ScoringKernel
+from app.services.metrics_history import MetricsHistoryService
+
+_EMPTY_COMPONENTS = {
+    "total_records": 0,
+    "pii_completeness": 0.0,
+    "disposition_accuracy": 0.0,
+    "avg_freshness_days": 0.0,
+    "geographic_coverage": 0.0
+}
 
 class ScoringEngine:
     """Production-level quality scoring engine for criminal records vendors"""
     
     @staticmethod
-    def calculate_vendor_quality_score(db: Session, vendor_id: int) -> Dict[str, Any]:
+    def calculate_vendor_quality_score(db: Session, vendor_id: int, profile: Optional[str] = None) -> Dict[str, Any]:
         """
         Calculate comprehensive quality score for a vendor
         
-        Formula:
+        Formula (default weights; a named scoring profile replaces them):
         Quality Score = (PII_Completeness * 0.4) + 
                        (Disposition_Accuracy * 0.3) + 
                        ((100 - Avg_Freshness_Days) * 0.2) + 
                        (Coverage_Pct * 0.1)
         """
+        scores = ScoringEngine.score_vendors(db, [vendor_id], profile=profile)
+        return scores.get(vendor_id) or ScoringEngine._build_quality_score(_EMPTY_COMPONENTS, 0.0)
+    
+    @staticmethod
+    def score_vendors(db: Session, vendor_ids: Optional[List[int]] = None,
+                      profile: Optional[str] = None) -> Dict[int, Dict[str, Any]]:
+        """
+        Score many vendors at once, keyed by vendor id
+        
+        Component metrics come from the incrementally maintained
+        vendor_score_rollup counters, so this reads one row per vendor instead
+        of scanning criminal_records. Unknown vendor ids are omitted; an
+        unknown profile raises ValueError.
+        """
+        weights = ScoringProfileService.get_weights(db, profile)
+        components = ScoringEngine.get_score_components(db, vendor_ids)
+        quality_scores = ScoringEngine._quality_scores(list(components.values()), weights)
+        
+        return {
+            vendor_id: ScoringEngine._build_quality_score(values, quality_score)
+            for (vendor_id, values), quality_score in zip(components.items(), quality_scores)
+        }
+    
+    @staticmethod
+    def get_score_components(db: Session, vendor_ids: Optional[List[int]] = None,
+                             active_only: bool = False) -> Dict[int, Dict[str, Any]]:
+        """
+        Unweighted score components per vendor, keyed by vendor id
+        
+        Results are cached per vendor and only vendors missing from the
+        cache are queried, so re-weighting under a
+        different profile never touches the database again. With no
+        vendor_ids every (or every active) vendor is read in one query.
+        """
+        if vendor_ids is not None and not vendor_ids:
+            return {}
+        
+        components = {}
+        if vendor_ids is not None:
+            for vendor_id in vendor_ids:
+                cached = vendor_score_cache.get(vendor_id)
+                if cached is not None:
+                    components[vendor_id] = cached
+            vendor_ids = [vendor_id for vendor_id in vendor_ids if vendor_id not in components]
+            if not vendor_ids:
+                return components
+        
+        # Read before the data, so a write committed meanwhile keeps these rows out of the cache
+        generation = vendor_score_cache.generation
+        query = db.query(
+            Vendor.id,
+            Vendor.coverage_percentage,
+            VendorScoreRollup.total_records,
+            VendorScoreRollup.pii_complete_count,
+            VendorScoreRollup.verified_count,
+            VendorScoreRollup.freshness_sum
+        ).outerjoin(VendorScoreRollup, VendorScoreRollup.vendor_id == Vendor.id)
+        if vendor_ids is not None:
+            query = query.filter(Vendor.id.in_(vendor_ids))
+        if active_only:
+            query = query.filter(Vendor.is_active == True)
+        
+        for row in query:
+            total_records = row.total_records or 0
+            if total_records:
+                components[row.id] = {
+                    "total_records": total_records,
+                    "pii_completeness": (row.pii_complete_count or 0) / total_records * 100,
+                    "disposition_accuracy": (row.verified_count or 0) / total_records * 100,
+                    "avg_freshness_days": row.freshness_sum / total_records,
+                    "geographic_coverage": row.coverage_percentage or 0.0
+                }
+            else:
+                components[row.id] = dict(_EMPTY_COMPONENTS)
+            vendor_score_cache.put(row.id, generation, components[row.id])
+        
+        return components
+    
+    @staticmethod
+    def score_matrix(db: Session, vendor_ids: List[int], profiles: List[str]) -> Dict[str, Any]:
+        """
+        Quality scores of many vendors under many profiles at once
+        
+        The (vendors x 4) component matrix is multiplied by the transposed
+        (profiles x 4) weight matrix; the only queries are the profile lookup
+        and the rollup read for vendors not already cached. Vendors with no
+        records score 0 under every profile, as in score_vendors.
+        """
+        weights = ScoringProfileService.get_weight_matrix(db, profiles)
+        components = ScoringEngine.get_score_components(db, vendor_ids)
+        vendor_ids = [vendor_id for vendor_id in vendor_ids if vendor_id in components]
+        
+        scores = ScoringEngine._quality_scores([components[vendor_id] for vendor_id in vendor_ids], weights)
+        
+        # Per-profile ranking: row r of rankings holds the vendor positions ranked r+1
+        rankings = np.argsort(-scores, axis=0, kind="stable")
+        vendor_array = np.array(vendor_ids, dtype=np.int64)
+        
+        return {
+            "vendor_ids": vendor_ids,
+            "profiles": list(profiles),
+            "scores": np.round(scores, 2).tolist(),
+            "rankings": {
+                name: vendor_array[rankings[:, p]].tolist()
+                for p, name in enumerate(profiles)
+            }
+        }
+    
+    @staticmethod
+    def _quality_scores(components: List[Dict[str, Any]], weights: np.ndarray) -> np.ndarray:
+        """
+        Run the scoring kernel over a list of component dicts
         
-        # Get vendor's records
-        records = db.query(CriminalRecord).filter(CriminalRecord.vendor_id == vendor_id).all()
+        weights is a weight vector or a (profiles x 4) matrix, as accepted by
+        ScoringKernel.quality_scores. Vendors with no records score 0.
+        """
+        weights = np.asarray(weights, dtype=float)
+        if not components:
+            return np.zeros((0,) + weights.shape[:-1])
         
-        if not records:
+        columns = {
+            name: np.fromiter((values[name] for values in components), dtype=float, count=len(components))
+            for name in _EMPTY_COMPONENTS
+        }
+        scores = ScoringKernel.quality_scores(
+            columns["pii_completeness"],
+            columns["disposition_accuracy"],
+            columns["avg_freshness_days"],
+            columns["geographic_coverage"],
+            weights
+        )
+        has_records = (columns["total_records"] > 0).reshape((-1,) + (1,) * (scores.ndim - 1))
+        return np.where(has_records, scores, 0.0)
+    
+    @staticmethod
+    def _build_quality_score(components: Dict[str, Any], quality_score: float) -> Dict[str, Any]:
+        """Turn unweighted score components and their weighted score into the response dict"""
+        if not components["total_records"]:
             return {
                 "quality_score": 0.0,
                 "pii_completeness": 0.0,
@@ -33,37 +180,13 @@ class ScoringEngine:
                 "total_records": 0
             }
         
-        # Calculate PII Completeness (40% weight)
-        complete_records = sum(1 for r in records if r.pii_status == PIIStatus.COMPLETE)
-        pii_completeness = (complete_records / len(records)) * 100
-        
-        # Calculate Disposition Accuracy (30% weight)
-        verified_records = sum(1 for r in records if r.disposition_verified)
-        disposition_accuracy = (verified_records / len(records)) * 100
-        
-        # Calculate Data Freshness (20% weight)
-        avg_freshness_days = sum(r.freshness_days for r in records) / len(records)
-        freshness_score = max(0, 100 - avg_freshness_days)  # Inverse scoring
-        
-        # Calculate Geographic Coverage (10% weight)
-        vendor = db.query(Vendor).filter(Vendor.id == vendor_id).first()
-        geographic_coverage = vendor.coverage_percentage if vendor else 0.0
-        
-        # Calculate final quality score
-        quality_score = (
-            (pii_completeness * 0.4) +
-            (disposition_accuracy * 0.3) +
-            (freshness_score * 0.2) +
-            (geographic_coverage * 0.1)
-        )
-        
         return {
-            "quality_score": round(quality_score, 2),
-            "pii_completeness": round(pii_completeness, 2),
-            "disposition_accuracy": round(disposition_accuracy, 2),
-            "avg_freshness_days": round(avg_freshness_days, 2),
-            "geographic_coverage": round(geographic_coverage, 2),
-            "total_records": len(records)
+            "quality_score": round(float(quality_score), 2),
+            "pii_completeness": round(components["pii_completeness"], 2),
+            "disposition_accuracy": round(components["disposition_accuracy"], 2),
+            "avg_freshness_days": round(components["avg_freshness_days"], 2),
+            "geographic_coverage": round(components["geographic_coverage"], 2),
+            "total_records": components["total_records"]
         }
     
     @staticmethod
@@ -72,97 +195,51 @@ class ScoringEngine:
         Calculate Value Index = Quality_Score / Cost_Per_Record
         Higher is better (more quality per dollar)
         """
-        if cost_per_record <= 0:
-            return 0.0
-        return round(quality_score / cost_per_record, 2)
+        return float(ScoringKernel.value_indexes([quality_score], [cost_per_record])[0])
     
     @staticmethod
-    def get_vendor_metrics_history(db: Session, vendor_id: int, days: int = 30) -> List[Dict]:
-        """Get historical metrics for trend analysis"""
-        cutoff_date = datetime.now() - timedelta(days=days)
+    def get_vendor_metrics_history(db: Session, vendor_id: int, days: int = 30,
+                                   max_points: Optional[int] = None) -> List[Dict]:
+        """
+        Get historical metrics for trend analysis, newest first
         
-        metrics = db.query(VendorMetrics).filter(
-            and_(
-                VendorMetrics.vendor_id == vendor_id,
-                VendorMetrics.recorded_at >= cutoff_date
-            )
-        ).order_by(VendorMetrics.recorded_at.desc()).all()
-        
-        return [
-            {
-                "date": metric.recorded_at.isoformat(),
-                "quality_score": metric.calculated_score,
-                "pii_completeness": metric.pii_completeness,
-                "disposition_accuracy": metric.disposition_accuracy,
-                "avg_freshness_days": metric.avg_freshness_days,
-                "geographic_coverage": metric.geographic_coverage
-            }
-            for metric in metrics
-        ]
+        Long windows are served from the hourly or daily history tiers; pass
+        max_points to bound the number of points returned.
+        """
+        return MetricsHistoryService.get_history(db, vendor_id, days, max_points)[1]
     
     @staticmethod
     def get_jurisdiction_performance(db: Session, vendor_id: int) -> List[Dict]:
         """Analyze vendor performance by jurisdiction"""
         
-        query = db.query(
-            Jurisdiction.name,
-            Jurisdiction.state,
-            VendorCoverage.coverage_percentage,
-            VendorCoverage.avg_turnaround_hours,
-            func.count(CriminalRecord.id).label('record_count'),
-            func.avg(
-                func.case(
-                    (CriminalRecord.pii_status == PIIStatus.COMPLETE, 1),
-                    else_=0
-                )
-            ).label('pii_completeness_rate'),
-            func.avg(
-                func.case(
-                    (CriminalRecord.disposition_verified == True, 1),
-                    else_=0
-                )
-            ).label('disposition_accuracy_rate')
-        ).join(
-            VendorCoverage, Jurisdiction.id == VendorCoverage.jurisdiction_id
-        ).join(
-            CriminalRecord, and_(
-                VendorCoverage.vendor_id == CriminalRecord.vendor_id,
-                VendorCoverage.jurisdiction_id == CriminalRecord.jurisdiction_id
-            )
-        ).filter(
-            VendorCoverage.vendor_id == vendor_id
-        ).group_by(
-            Jurisdiction.id,
-            VendorCoverage.coverage_percentage,
-            VendorCoverage.avg_turnaround_hours
-        ).all()
-        
-        return [
-            {
-                "jurisdiction": row.name,
-                "state": row.state,
-                "coverage_percentage": row.coverage_percentage,
-                "avg_turnaround_hours": row.avg_turnaround_hours,
-                "record_count": row.record_count or 0,
-                "pii_completeness_rate": (row.pii_completeness_rate or 0) * 100,
-                "disposition_accuracy_rate": (row.disposition_accuracy_rate or 0) * 100
-            }
-            for row in query
-        ]
+        matrix = ScoringEngine.get_jurisdiction_matrix(db, [vendor_id])
+        return matrix.rows_for_vendor(vendor_id)
     
     @staticmethod
-    def benchmark_vendors(db: Session) -> Dict[str, Any]:
+    def get_jurisdiction_matrix(db: Session, vendor_ids: List[int], jurisdictions: Optional[List[str]] = None,
+                                min_coverage: Optional[float] = None) -> JurisdictionMatrix:
+        """
+        Per-(vendor, jurisdiction) record counts, PII rate, disposition rate
+        and freshness for a set of vendors from one grouped query
+        
+        Jurisdiction name and minimum coverage filters are applied in SQL.
+        """
+        return JurisdictionMatrix.build(db, vendor_ids, jurisdictions, min_coverage)
+    
+    @staticmethod
+    def benchmark_vendors(db: Session, profile: Optional[str] = None) -> Dict[str, Any]:
         """Compare all vendors across key metrics"""
         
         vendors = db.query(Vendor).filter(Vendor.is_active == True).all()
+        scores = ScoringEngine.score_vendors(db, [vendor.id for vendor in vendors], profile=profile)
+        value_indexes = ScoringKernel.value_indexes(
+            [scores[vendor.id]["quality_score"] for vendor in vendors],
+            [vendor.cost_per_record for vendor in vendors]
+        )
         benchmark_data = []
         
-        for vendor in vendors:
-            metrics = ScoringEngine.calculate_vendor_quality_score(db, vendor.id)
-            value_index = ScoringEngine.calculate_value_index(
-                metrics["quality_score"], 
-                vendor.cost_per_record
-            )
+        for vendor, value_index in zip(vendors, value_indexes.tolist()):
+            metrics = scores[vendor.id]
             
             benchmark_data.append({
                 "vendor_id": vendor.id,
@@ -194,38 +271,21 @@ class ScoringEngine:
     @staticmethod
     def get_quality_trends(db: Session, vendor_id: int, days: int = 90) -> Dict[str, List]:
         """Get quality trend data for charts"""
-        cutoff_date = datetime.now() - timedelta(days=days)
-        
-        # Get daily aggregated metrics
-        daily_metrics = db.query(
-            func.date(CriminalRecord.vendor_delivery_date).label('date'),
-            func.count(CriminalRecord.id).label('total_records'),
-            func.avg(
-                func.case(
-                    (CriminalRecord.pii_status == PIIStatus.COMPLETE, 1),
-                    else_=0
-                )
-            ).label('pii_completeness'),
-            func.avg(
-                func.case(
-                    (CriminalRecord.disposition_verified == True, 1),
-                    else_=0
-                )
-            ).label('disposition_accuracy'),
-            func.avg(CriminalRecord.turnaround_hours).label('avg_turnaround')
-        ).filter(
+        cutoff_date = (datetime.now() - timedelta(days=days)).date()
+        
+        # Daily aggregates are maintained incrementally in vendor_daily_quality
+        daily_metrics = db.query(VendorDailyQuality).filter(
             and_(
-                CriminalRecord.vendor_id == vendor_id,
-                CriminalRecord.vendor_delivery_date >= cutoff_date
+                VendorDailyQuality.vendor_id == vendor_id,
+                VendorDailyQuality.day >= cutoff_date,
+                VendorDailyQuality.record_count > 0
             )
-        ).group_by(
-            func.date(CriminalRecord.vendor_delivery_date)
-        ).order_by('date').all()
+        ).order_by(VendorDailyQuality.day).all()
         
         return {
-            "dates": [str(row.date) for row in daily_metrics],
-            "pii_completeness": [float(row.pii_completeness * 100) for row in daily_metrics],
-            "disposition_accuracy": [float(row.disposition_accuracy * 100) for row in daily_metrics],
-            "avg_turnaround": [float(row.avg_turnaround) for row in daily_metrics],
-            "record_volume": [int(row.total_records) for row in daily_metrics]
+            "dates": [str(row.day) for row in daily_metrics],
+            "pii_completeness": [row.pii_complete_count / row.record_count * 100 for row in daily_metrics],
+            "disposition_accuracy": [row.verified_count / row.record_count * 100 for row in daily_metrics],
+            "avg_turnaround": [row.turnaround_sum / row.record_count for row in daily_metrics],
+            "record_volume": [int(row.record_count) for row in daily_metrics]
         }
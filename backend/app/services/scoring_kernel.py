@@ -0,0 +1,112 @@
+import numpy as np
+from typing import Dict, Optional, Sequence
+from app.services.scoring_profiles import DEFAULT_QUALITY_WEIGHTS
+
+# Cost treated as the top of the market when normalizing cost into a 0-100 score
+MAX_COST_PER_RECORD = 15.0
+
+PRIORITIES = ("quality", "cost", "balanced", "value")
+REQUIREMENT_FACTORS = ("quality", "cost", "coverage", "value")
+
+class ScoringKernel:
+    """
+    Vectorized vendor scoring over columnar arrays
+    
+    Every function takes one array per metric, with element i describing
+    vendor i, and returns arrays of the same length. This is the single
+    implementation of the scoring formulas used by ScoringEngine, the quick
+    comparison and the seeder.
+    """
+    
+    @staticmethod
+    def component_matrix(pii_completeness, disposition_accuracy, avg_freshness_days,
+                         geographic_coverage) -> np.ndarray:
+        """(n, 4) matrix of score components in QUALITY_COMPONENTS order; freshness is inverse-scored"""
+        return np.column_stack((
+            np.asarray(pii_completeness, dtype=float),
+            np.asarray(disposition_accuracy, dtype=float),
+            np.maximum(0.0, 100.0 - np.asarray(avg_freshness_days, dtype=float)),
+            np.asarray(geographic_coverage, dtype=float)
+        ))
+    
+    @staticmethod
+    def quality_scores(pii_completeness, disposition_accuracy, avg_freshness_days, geographic_coverage,
+                       weights=DEFAULT_QUALITY_WEIGHTS) -> np.ndarray:
+        """
+        Quality Score = PII * w0 + Disposition * w1 + (100 - Freshness) * w2 + Coverage * w3
+        
+        weights is a length-4 vector, giving an (n,) result, or a (p, 4)
+        matrix of profiles, giving an (n, p) result.
+        """
+        components = ScoringKernel.component_matrix(
+            pii_completeness, disposition_accuracy, avg_freshness_days, geographic_coverage
+        )
+        return components @ np.asarray(weights, dtype=float).T
+    
+    @staticmethod
+    def value_indexes(quality_scores, cost_per_record) -> np.ndarray:
+        """Value Index = Quality_Score / Cost_Per_Record, rounded to 2 places; 0 where cost <= 0"""
+        quality_scores = np.asarray(quality_scores, dtype=float)
+        cost_per_record = np.asarray(cost_per_record, dtype=float)
+        
+        with np.errstate(divide="ignore", invalid="ignore"):
+            ratio = quality_scores / cost_per_record
+        return np.where(cost_per_record > 0, np.round(ratio, 2), 0.0)
+    
+    @staticmethod
+    def cost_scores(cost_per_record) -> np.ndarray:
+        """Cost inverted onto 0-100 against MAX_COST_PER_RECORD; negative above the maximum"""
+        return 100.0 - np.asarray(cost_per_record, dtype=float) / MAX_COST_PER_RECORD * 100
+    
+    @staticmethod
+    def priority_scores(priority: str, quality_scores, value_indexes, cost_per_record) -> np.ndarray:
+        """Recommendation score for a quick-comparison priority (quality, cost, value or balanced)"""
+        quality_scores = np.asarray(quality_scores, dtype=float)
+        value_indexes = np.asarray(value_indexes, dtype=float)
+        cost_scores = ScoringKernel.cost_scores(cost_per_record)
+        
+        if priority == "quality":
+            return quality_scores * 0.8 + value_indexes * 0.2
+        elif priority == "cost":
+            return np.maximum(0.0, cost_scores) * 0.6 + quality_scores * 0.4
+        elif priority == "value":
+            return value_indexes * 0.7 + quality_scores * 0.3
+        else:  # balanced
+            return quality_scores * 0.4 + value_indexes * 0.3 + cost_scores * 0.3
+    
+    @staticmethod
+    def requirement_scores(quality_scores, cost_per_record, coverage_percentage, value_indexes,
+                           factors: Optional[Sequence[str]] = None) -> np.ndarray:
+        """Recommendation score summed over the requested factors; all four when factors is empty"""
+        factors = set(factors or REQUIREMENT_FACTORS)
+        scores = np.zeros(np.shape(quality_scores), dtype=float)
+        
+        if "quality" in factors:
+            scores += np.asarray(quality_scores, dtype=float) * 0.4
+        if "cost" in factors:
+            scores += np.maximum(0.0, ScoringKernel.cost_scores(cost_per_record)) * 0.3
+        if "coverage" in factors:
+            scores += np.asarray(coverage_percentage, dtype=float) * 0.2
+        if "value" in factors:
+            # Value index normalized assuming 10 as the maximum
+            scores += np.minimum(100.0, np.asarray(value_indexes, dtype=float) * 10) * 0.1
+        
+        return scores
+    
+    @staticmethod
+    def score(pii_completeness, disposition_accuracy, avg_freshness_days, geographic_coverage,
+              cost_per_record, priority: str = "balanced",
+              weights=DEFAULT_QUALITY_WEIGHTS) -> Dict[str, np.ndarray]:
+        """Quality score, value index and priority recommendation score for every vendor in one call"""
+        quality_scores = ScoringKernel.quality_scores(
+            pii_completeness, disposition_accuracy, avg_freshness_days, geographic_coverage, weights
+        )
+        value_indexes = ScoringKernel.value_indexes(quality_scores, cost_per_record)
+        
+        return {
+            "quality_score": quality_scores,
+            "value_index": value_indexes,
+            "recommendation_score": ScoringKernel.priority_scores(
+                priority, quality_scores, value_indexes, cost_per_record
+            )
+        }
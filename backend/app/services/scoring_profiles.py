@@ -0,0 +1,134 @@
+import numpy as np
+from sqlalchemy.orm import Session
+from typing import List, Dict, Any, Optional, Sequence
+from app.models import *
+
+# Score components in weight-vector order; freshness_score is max(0, 100 - avg_freshness_days)
+QUALITY_COMPONENTS = ("pii_completeness", "disposition_accuracy", "freshness_score", "geographic_coverage")
+
+# The documented formula, used when no profile is requested
+DEFAULT_QUALITY_WEIGHTS = (0.4, 0.3, 0.2, 0.1)
+
+# Profiles created on startup and read-only through the API; "standard" is the documented default formula
+BUILTIN_PROFILES = {
+    "standard": {
+        "description": "Default weighting: PII 40%, disposition 30%, freshness 20%, coverage 10%",
+        "weights": DEFAULT_QUALITY_WEIGHTS
+    },
+    "compliance": {
+        "description": "Favors complete identifiers and verified dispositions for FCRA-sensitive screening",
+        "weights": (0.45, 0.4, 0.05, 0.1)
+    },
+    "speed": {
+        "description": "Favors fresh data for high-volume hiring",
+        "weights": (0.25, 0.2, 0.45, 0.1)
+    },
+    "coverage": {
+        "description": "Favors broad geographic coverage for national programs",
+        "weights": (0.3, 0.2, 0.1, 0.4)
+    }
+}
+
+_WEIGHT_COLUMNS = ("pii_weight", "disposition_weight", "freshness_weight", "coverage_weight")
+
+class ScoringProfileService:
+    """Named weightings of the quality score components"""
+    
+    @staticmethod
+    def list_profiles(db: Session) -> List[Dict[str, Any]]:
+        """All stored profiles with their weights"""
+        profiles = db.query(ScoringProfile).order_by(ScoringProfile.name).all()
+        return [ScoringProfileService._to_dict(profile) for profile in profiles]
+    
+    @staticmethod
+    def get_weight_matrix(db: Session, names: Sequence[str]) -> np.ndarray:
+        """
+        Weights for the named profiles as a (len(names), 4) array, in the
+        given order, loaded with one query
+        
+        Raises ValueError naming any profile that does not exist.
+        """
+        rows = {
+            profile.name: profile
+            for profile in db.query(ScoringProfile).filter(ScoringProfile.name.in_(list(names))).all()
+        }
+        missing = [name for name in names if name not in rows]
+        if missing:
+            raise ValueError(f"Unknown scoring profile: {', '.join(missing)}")
+        
+        return np.array(
+            [[getattr(rows[name], column) for column in _WEIGHT_COLUMNS] for name in names],
+            dtype=float
+        ).reshape(len(names), len(_WEIGHT_COLUMNS))
+    
+    @staticmethod
+    def get_weights(db: Session, name: Optional[str] = None) -> np.ndarray:
+        """Weight vector for one profile, or the default weights when name is None"""
+        if name is None:
+            return np.array(DEFAULT_QUALITY_WEIGHTS, dtype=float)
+        return ScoringProfileService.get_weight_matrix(db, [name])[0]
+    
+    @staticmethod
+    def save_profile(db: Session, name: str, weights: Dict[str, float],
+                     description: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Create or replace a custom profile; weights are keyed by
+        QUALITY_COMPONENTS
+        
+        Raises ValueError for a built-in profile name: unnamed scores, SLA
+        checks and metrics snapshots all use the standard weights, so editing
+        the stored rows would only move some of them.
+        """
+        if name in BUILTIN_PROFILES:
+            raise ValueError(f"Built-in scoring profile {name} cannot be changed; save it under another name")
+        
+        profile = db.query(ScoringProfile).filter(ScoringProfile.name == name).first()
+        if profile is None:
+            profile = ScoringProfile(name=name)
+            db.add(profile)
+        
+        for component, column in zip(QUALITY_COMPONENTS, _WEIGHT_COLUMNS):
+            setattr(profile, column, weights[component])
+        if description is not None:
+            profile.description = description
+        
+        db.commit()
+        db.refresh(profile)
+        return ScoringProfileService._to_dict(profile)
+    
+    @staticmethod
+    def ensure_builtin_profiles(db: Session) -> int:
+        """
+        Insert any missing built-in profiles and restore edited ones; returns
+        how many were created
+        """
+        existing = {
+            profile.name: profile
+            for profile in db.query(ScoringProfile).filter(ScoringProfile.name.in_(list(BUILTIN_PROFILES))).all()
+        }
+        created = 0
+        for name, profile in BUILTIN_PROFILES.items():
+            columns = dict(zip(_WEIGHT_COLUMNS, profile["weights"]))
+            stored = existing.get(name)
+            if stored is None:
+                db.add(ScoringProfile(name=name, description=profile["description"], **columns))
+                created += 1
+                continue
+            for column, weight in columns.items():
+                if getattr(stored, column) != weight:
+                    setattr(stored, column, weight)
+        
+        if created or db.dirty:
+            db.commit()
+        return created
+    
+    @staticmethod
+    def _to_dict(profile: ScoringProfile) -> Dict[str, Any]:
+        return {
+            "name": profile.name,
+            "description": profile.description,
+            "weights": {
+                component: getattr(profile, column)
+                for component, column in zip(QUALITY_COMPONENTS, _WEIGHT_COLUMNS)
+            }
+        }
@@ -0,0 +1,279 @@
+import numpy as np
+from math import ceil
+from statistics import NormalDist
+from sqlalchemy.orm import Session
+from sqlalchemy import case, func
+from typing import List, Dict, Any, Optional
+from app.models import *
+from app.services.scoring_kernel import ScoringKernel
+from app.services.scoring_profiles import ScoringProfileService
+
+DEFAULT_TRIALS = 10000
+MAX_TRIALS = 100000
+
+# Most recent records per vendor forming the empirical distribution the trials resample
+HISTORY_RECORDS = 5000
+
+# Records drawn per trial; means over larger volumes are rescaled from these (see _volume_means)
+DRAWS_PER_TRIAL = 200
+
+# Resampled record gathers per chunk of trials, bounding memory to a few MB whatever the trial count
+_CHUNK_ELEMENTS = 250000
+
+# Per-record columns, resampled together so a record's outcomes stay correlated
+_COLUMNS = ("pii_complete", "disposition_verified", "needs_rework", "freshness_days", "turnaround_hours")
+
+# SLA checks per period: alert type -> (simulated metric, True when exceeding the threshold is the breach)
+_SLA_CHECKS = {
+    AlertType.PII_COMPLETENESS: ("pii_completeness", False),
+    AlertType.DISPOSITION_ACCURACY: ("disposition_accuracy", False),
+    AlertType.TURNAROUND_TIME: ("avg_turnaround_hours", True)
+}
+
+class WhatIfSimulator:
+    """
+    Monte Carlo mode of the vendor switching what-if
+    
+    Each vendor's most recent records are its empirical distribution. A
+    trial resamples whole records from it, with replacement, and takes
+    their mean outcomes: PII completeness, disposition accuracy, freshness,
+    turnaround and the share needing rework. All trials run as NumPy array
+    operations in chunks, drawing DRAWS_PER_TRIAL records each; the spread
+    of a mean over a larger volume is the spread over the draws scaled by
+    sqrt(draws / volume), as for any mean of independent records.
+    
+    From the same trials come an annual cost (records plus rework), a
+    quality score and, per SLA period, whether the vendor's configured PII,
+    disposition or turnaround threshold would be breached.
+    """
+    
+    @staticmethod
+    def simulate(db: Session, current_vendor: Vendor, new_vendor: Vendor, annual_volume: int,
+                 assumptions: Optional[Dict] = None, trials: int = DEFAULT_TRIALS,
+                 seed: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Intervals for annual cost, quality delta and SLA breach probability
+        
+        The result echoes the seed; passing it back with the same data
+        reproduces the run. Assumptions read: sla_period_days (30),
+        confidence_level (0.95), rework_cost_per_record (each vendor's cost
+        per record, i.e. ordering the search again) and sla_thresholds
+        ({alert type: threshold}, overriding the vendors' configurations).
+        Raises ValueError for a trial count outside 1-MAX_TRIALS, an
+        assumption that is not a number or names an unknown alert type, or a
+        vendor with no records to resample.
+        """
+        if not 1 <= trials <= MAX_TRIALS:
+            raise ValueError(f"trials must be between 1 and {MAX_TRIALS}")
+        assumptions = assumptions or {}
+        period_days = _number(assumptions, "sla_period_days", 30, int)
+        confidence = _number(assumptions, "confidence_level", 0.95, float)
+        if not 1 <= period_days <= 365:
+            raise ValueError("sla_period_days must be between 1 and 365")
+        if not 0 < confidence < 1:
+            raise ValueError("confidence_level must be between 0 and 1")
+        
+        vendors = {"current": current_vendor, "new": new_vendor}
+        histories = WhatIfSimulator.load_history(db, [vendor.id for vendor in vendors.values()])
+        for vendor in vendors.values():
+            if vendor.id not in histories:
+                raise ValueError(f"No records to simulate for vendor {vendor.id}")
+        thresholds = WhatIfSimulator._sla_thresholds(db, [vendor.id for vendor in vendors.values()], assumptions)
+        weights = ScoringProfileService.get_weights(db, None)
+        
+        if seed is None:
+            seed = int(np.random.SeedSequence().entropy % 2 ** 32)
+        rng = np.random.default_rng(seed)
+        period_volume = max(1, ceil(annual_volume * period_days / 365))
+        
+        outcomes = {}
+        for role, vendor in vendors.items():
+            history = histories[vendor.id]
+            annual, period = WhatIfSimulator._volume_means(rng, history, trials, [annual_volume, period_volume])
+            rework_cost = _number(assumptions, "rework_cost_per_record", vendor.cost_per_record, float)
+            quality = ScoringKernel.quality_scores(
+                annual[:, 0] * 100,
+                annual[:, 1] * 100,
+                annual[:, 3],
+                np.full(trials, vendor.coverage_percentage or 0.0),
+                weights
+            )
+            outcomes[role] = {
+                "history_records": len(history),
+                "annual_cost": annual_volume * (vendor.cost_per_record + annual[:, 2] * rework_cost),
+                "quality_score": quality,
+                "sla": WhatIfSimulator._breaches(period, thresholds.get(vendor.id, {}))
+            }
+        
+        current, new = outcomes["current"], outcomes["new"]
+        quality_delta = new["quality_score"] - current["quality_score"]
+        savings = current["annual_cost"] - new["annual_cost"]
+        
+        return {
+            "trials": trials,
+            "seed": seed,
+            "confidence_level": confidence,
+            "history_records": {role: outcome["history_records"] for role, outcome in outcomes.items()},
+            "annual_cost": {
+                "current": WhatIfSimulator._interval(current["annual_cost"], confidence),
+                "new": WhatIfSimulator._interval(new["annual_cost"], confidence),
+                "savings": WhatIfSimulator._interval(savings, confidence),
+                "probability_of_savings": float((savings > 0).mean())
+            },
+            "quality_delta": {
+                **WhatIfSimulator._interval(quality_delta, confidence),
+                "probability_of_improvement": float((quality_delta > 0).mean())
+            },
+            "quality_score": {
+                "current": WhatIfSimulator._interval(current["quality_score"], confidence),
+                "new": WhatIfSimulator._interval(new["quality_score"], confidence)
+            },
+            "sla_breach_probability": {
+                "period_days": period_days,
+                "records_per_period": period_volume,
+                "current": WhatIfSimulator._breach_summary(current["sla"], trials, period_days, confidence),
+                "new": WhatIfSimulator._breach_summary(new["sla"], trials, period_days, confidence)
+            }
+        }
+    
+    @staticmethod
+    def load_history(db: Session, vendor_ids: List[int], limit: int = HISTORY_RECORDS) -> Dict[int, np.ndarray]:
+        """
+        {vendor_id: (records, len(_COLUMNS)) array} of each vendor's most
+        recent deliveries, from one windowed query; vendors without records
+        with freshness and turnaround are left out
+        """
+        complete = case((CriminalRecord.pii_status == PIIStatus.COMPLETE, 1.0), else_=0.0)
+        verified = case((CriminalRecord.disposition_verified == True, 1.0), else_=0.0)
+        recent = db.query(
+            CriminalRecord.vendor_id,
+            complete.label("pii_complete"),
+            verified.label("disposition_verified"),
+            (1.0 - complete * verified).label("needs_rework"),
+            CriminalRecord.freshness_days,
+            CriminalRecord.turnaround_hours,
+            func.row_number().over(
+                partition_by=CriminalRecord.vendor_id,
+                order_by=(CriminalRecord.vendor_delivery_date.desc(), CriminalRecord.id.desc())
+            ).label("position")
+        ).filter(
+            CriminalRecord.vendor_id.in_(vendor_ids),
+            CriminalRecord.freshness_days != None,
+            CriminalRecord.turnaround_hours != None
+        ).subquery()
+        rows = db.query(recent.c.vendor_id, *[recent.c[column] for column in _COLUMNS]).filter(
+            recent.c.position <= limit
+        ).all()
+        if not rows:
+            return {}
+        
+        vendor_col = np.array([row[0] for row in rows])
+        values = np.array([row[1:] for row in rows], dtype=float)
+        return {int(vendor_id): values[vendor_col == vendor_id] for vendor_id in np.unique(vendor_col)}
+    
+    @staticmethod
+    def _volume_means(rng: np.random.Generator, history: np.ndarray, trials: int,
+                      volumes: List[int]) -> List[np.ndarray]:
+        """
+        Per volume, a (trials, columns) array of mean outcomes over that many
+        resampled records, all derived from one set of draws
+        """
+        draws = min(DRAWS_PER_TRIAL, min(volumes))
+        # Gathering column by column keeps each sum over contiguous memory
+        columns = np.ascontiguousarray(history.T)
+        means = np.empty((trials, len(columns)))
+        chunk = max(1, _CHUNK_ELEMENTS // draws)
+        for start in range(0, trials, chunk):
+            stop = min(trials, start + chunk)
+            positions = rng.integers(0, len(history), size=(stop - start, draws), dtype=np.int32)
+            for c, column in enumerate(columns):
+                means[start:stop, c] = np.take(column, positions).sum(axis=1)
+        means /= draws
+        
+        expected = history.mean(axis=0)
+        deviations = means - expected
+        return [expected + deviations * np.sqrt(draws / volume) for volume in volumes]
+    
+    @staticmethod
+    def _breaches(period: np.ndarray, thresholds: Dict[AlertType, float]) -> Dict[str, np.ndarray]:
+        """Per checked SLA metric, a boolean array of the trials whose period breaches it"""
+        simulated = {
+            "pii_completeness": period[:, 0] * 100,
+            "disposition_accuracy": period[:, 1] * 100,
+            "avg_turnaround_hours": period[:, 4]
+        }
+        breaches = {}
+        for alert_type, threshold in thresholds.items():
+            metric, higher_is_worse = _SLA_CHECKS[alert_type]
+            values = simulated[metric]
+            breaches[alert_type.value] = values > threshold if higher_is_worse else values < threshold
+        return breaches
+    
+    @staticmethod
+    def _breach_summary(breaches: Dict[str, np.ndarray], trials: int, period_days: int,
+                        confidence: float) -> Dict[str, Any]:
+        """
+        Share of trial periods breaching any SLA, with its Monte Carlo
+        interval and the chance of at least one breach over a year of periods
+        """
+        if not breaches:
+            return {"probability": None, "by_metric": {}}
+        
+        probability = float(np.logical_or.reduce(list(breaches.values())).mean())
+        margin = WhatIfSimulator._z(confidence) * np.sqrt(probability * (1 - probability) / trials)
+        return {
+            "probability": probability,
+            "lower": max(0.0, probability - margin),
+            "upper": min(1.0, probability + margin),
+            "annual_probability": 1 - (1 - probability) ** (365 / period_days),
+            "by_metric": {metric: float(breached.mean()) for metric, breached in breaches.items()}
+        }
+    
+    @staticmethod
+    def _sla_thresholds(db: Session, vendor_ids: List[int], assumptions: Dict) -> Dict[int, Dict[AlertType, float]]:
+        """Active SLA thresholds per vendor; assumptions["sla_thresholds"] replaces them for both"""
+        overrides = assumptions.get("sla_thresholds")
+        if overrides:
+            if not isinstance(overrides, dict):
+                raise ValueError("sla_thresholds must map alert types to thresholds")
+            known = {alert_type.value for alert_type in AlertType}
+            unknown = sorted(str(alert_type) for alert_type in overrides if alert_type not in known)
+            if unknown:
+                raise ValueError(f"Unknown alert types in sla_thresholds: {unknown}")
+            thresholds = {
+                AlertType(alert_type): _number(overrides, alert_type, None, float) for alert_type in overrides
+            }
+            unsupported = set(thresholds) - set(_SLA_CHECKS)
+            if unsupported:
+                raise ValueError(f"Cannot simulate SLA thresholds for: {sorted(t.value for t in unsupported)}")
+            return {vendor_id: thresholds for vendor_id in vendor_ids}
+        
+        thresholds = {}
+        for config in db.query(AlertConfiguration).filter(
+            AlertConfiguration.vendor_id.in_(vendor_ids),
+            AlertConfiguration.alert_type.in_(list(_SLA_CHECKS)),
+            AlertConfiguration.is_active == True
+        ).order_by(AlertConfiguration.id):
+            if config.threshold_value is not None:
+                thresholds.setdefault(config.vendor_id, {})[config.alert_type] = config.threshold_value
+        return thresholds
+    
+    @staticmethod
+    def _interval(values: np.ndarray, confidence: float) -> Dict[str, float]:
+        """Mean and central confidence interval of simulated values"""
+        tail = (1 - confidence) / 2 * 100
+        lower, upper = np.percentile(values, [tail, 100 - tail])
+        return {"mean": float(values.mean()), "lower": float(lower), "upper": float(upper)}
+    
+    @staticmethod
+    def _z(confidence: float) -> float:
+        """Two-sided standard normal quantile for a confidence level"""
+        return NormalDist().inv_cdf(0.5 + confidence / 2)
+
+def _number(values: Dict, name: str, default, kind):
+    # Assumptions arrive as untyped JSON, so "30" and 30 both work and anything else is a ValueError
+    value = values.get(name, default)
+    try:
+        return kind(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"{name} must be a number, got {value!r}") from None
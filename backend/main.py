@@ -1,5 +1,5 @@
 from contextlib import asynccontextmanager
-from sqlalchemy import text
+from sqlalchemy import inspect, text
 from sqlalchemy.exc import IntegrityError
 
 from fastapi import FastAPI, HTTPException
@@ -8,7 +8,12 @@ from fastapi.staticfiles import StaticFiles
 from fastapi.responses import FileResponse
 from app.api.routes import vendors, comparison, alerts, analysis, quick
 from app.database.db import engine, Base, SessionLocal
-from app.models import Vendor
+from app.models import Vendor, Alert, AlertType, CriminalRecord
+from app.services import RollupService, ScoringProfileService, AlertStatsService
+from app.services.metrics_snapshot import MetricsSnapshotScheduler
+from app.services.alert_archive import AlertArchiveScheduler
+from app.services.metrics_history import MetricsHistoryService
+from app.services.alert_evaluator import streaming_alert_evaluator
 
 # One-row table: first worker to insert wins the right to seed; others skip.
 _SEED_CLAIM_TABLE = "_seed_claim"
@@ -18,6 +23,21 @@ _SEED_CLAIM_TABLE = "_seed_claim"
 async def lifespan(app: FastAPI):
     # Create tables (deferred from import time for serverless compatibility)
     Base.metadata.create_all(bind=engine)
+    # create_all skips existing tables, so indexes added to them later are created here
+    for index in [*Alert.__table__.indexes, *CriminalRecord.__table__.indexes]:
+        index.create(bind=engine, checkfirst=True)
+    # vendor_score_rollup.version is no longer written and, being NOT NULL, would reject new rollup rows
+    if "version" in {column["name"] for column in inspect(engine).get_columns("vendor_score_rollup")}:
+        try:
+            with engine.begin() as conn:
+                conn.execute(text("ALTER TABLE vendor_score_rollup DROP COLUMN version"))
+        except Exception:
+            pass  # Another worker dropped it first
+    # A native PostgreSQL enum created before a member was added lacks its label
+    if engine.dialect.name == "postgresql":
+        with engine.begin() as conn:
+            for member in AlertType:
+                conn.execute(text(f"ALTER TYPE alerttype ADD VALUE IF NOT EXISTS '{member.name}'"))
     # Startup: run seeding in one worker only, no import-time side effects
     db = SessionLocal()
     try:
@@ -36,10 +56,34 @@ async def lifespan(app: FastAPI):
             if db.query(Vendor).count() == 0:
                 from app.database.seed_data import create_sample_data
                 create_sample_data()
+        # Databases created before the rollup tables existed need one full build
+        try:
+            RollupService.backfill_if_empty(db)
+            MetricsHistoryService.backfill_if_empty(db)
+            AlertStatsService.backfill_if_empty(db)
+        except Exception:
+            db.rollback()
+            # Another worker is building it concurrently
+        try:
+            ScoringProfileService.ensure_builtin_profiles(db)
+        except Exception:
+            db.rollback()
+            # Another worker inserted them first
     finally:
         db.close()
+    # Periodic VendorMetrics snapshots; only the worker holding the lease writes them
+    snapshot_scheduler = MetricsSnapshotScheduler.from_env()
+    snapshot_scheduler.start()
+    # Moves long-resolved alerts to alerts_archive on its own lease and interval
+    archive_scheduler = AlertArchiveScheduler.from_env()
+    archive_scheduler.start()
+    # Evaluate alert thresholds as records are committed
+    streaming_alert_evaluator.start()
     yield
-    # Shutdown: nothing to do
+    # Shutdown: stop the snapshot and archive loops and the alert evaluator
+    await snapshot_scheduler.stop()
+    await archive_scheduler.stop()
+    streaming_alert_evaluator.stop()
 
 
 app = FastAPI(
@@ -59,6 +103,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
 app.include_router(vendors.router, prefix="/api/vendors", tags=["vendors"])
@@ -0,0 +1,28 @@
+import os
+import sys
+import tempfile
+import pytest
+
+# app.database reads DATABASE_URL at import; tests always get their own SQLite file, never the configured database
+os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(tempfile.gettempdir(), f"vendor_quality_test_{os.getpid()}.db")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+@pytest.fixture
+def db():
+    """Session on freshly created tables, with the process-wide caches emptied"""
+    from app.database.db import engine, Base, SessionLocal
+    from app.services.alert_index import open_alert_index
+    from app.services.score_cache import vendor_score_cache, market_cache
+    import app.services  # registers the rollup listeners
+    
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    open_alert_index.clear()
+    vendor_score_cache.clear()
+    market_cache.invalidate()
+    
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
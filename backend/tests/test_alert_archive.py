@@ -0,0 +1,65 @@
+from datetime import datetime, timedelta, timezone
+from app.models import Alert, AlertArchive, AlertSeverity, AlertStatus, AlertType, Vendor
+from app.services.alert_archive import AlertArchiveService
+from app.services.alert_service import AlertService
+
+def _alert(vendor_id: int, n: int, resolved_days_ago=None) -> Alert:
+    now = datetime.now(timezone.utc)
+    return Alert(
+        vendor_id=vendor_id, alert_type=AlertType.PII_COMPLETENESS, severity=AlertSeverity.HIGH,
+        status=AlertStatus.RESOLVED if resolved_days_ago is not None else AlertStatus.ACTIVE,
+        title="PII Completeness Below Threshold",
+        description=f"PII completeness ({80 + n:.1f}%) is below threshold (90.0%)",
+        current_value=80.0 + n, threshold_value=90.0,
+        triggered_at=now - timedelta(days=300 - n),
+        resolved_at=now - timedelta(days=resolved_days_ago) if resolved_days_ago is not None else None
+    )
+
+def test_archived_alerts_round_trip_through_the_compressed_details(db):
+    vendor = Vendor(name="Acme", is_active=True)
+    db.add(vendor)
+    db.flush()
+    db.add_all([_alert(vendor.id, n, resolved_days_ago=200) for n in range(5)])
+    db.add(_alert(vendor.id, 5, resolved_days_ago=1))
+    db.add(_alert(vendor.id, 6))
+    db.commit()
+    before, _ = AlertService.list_alerts(db, limit=100)
+    
+    assert AlertArchiveService.archive_resolved(db, batch_size=2) == 5
+    
+    archived = db.query(AlertArchive).order_by(AlertArchive.id).all()
+    assert [row.current_value for row in archived] == [80.0, 81.0, 82.0, 83.0, 84.0]
+    assert archived[0].details[0] == 1
+    assert AlertArchiveService.unpack_details(archived[0].details) == {
+        "title": "PII Completeness Below Threshold",
+        "description": "PII completeness (80.0%) is below threshold (90.0%)"
+    }
+    
+    hot, _ = AlertService.list_alerts(db, limit=100)
+    assert [alert["id"] for alert in hot] == [before[0]["id"], before[1]["id"]]
+    
+    first, cursor = AlertService.list_alerts(db, limit=4, include_archived=True)
+    rest, last_cursor = AlertService.list_alerts(db, limit=4, include_archived=True, cursor=cursor)
+    merged = first + rest
+    assert last_cursor is None
+    assert [alert["id"] for alert in merged] == [alert["id"] for alert in before]
+    assert [(alert["title"], alert["description"]) for alert in merged] == [
+        (alert["title"], alert["description"]) for alert in before
+    ]
+
+def test_new_alerts_never_reuse_an_archived_id(db):
+    vendor = Vendor(name="Acme", is_active=True)
+    db.add(vendor)
+    db.flush()
+    db.add_all([_alert(vendor.id, n, resolved_days_ago=200) for n in range(3)])
+    db.commit()
+    
+    # The newest alert is held back even though it is due
+    assert AlertArchiveService.archive_resolved(db) == 2
+    db.query(Alert).delete()
+    db.commit()
+    db.add(_alert(vendor.id, 3))
+    db.commit()
+    
+    archived_ids = {row.id for row in db.query(AlertArchive.id)}
+    assert db.query(Alert.id).scalar() > max(archived_ids)
@@ -0,0 +1,59 @@
+from datetime import datetime, timedelta
+from app.models import Alert, AlertConfiguration, AlertStatus, AlertType, Vendor, VendorDailyQuality
+from app.services.alert_evaluator import StreamingAlertEvaluator, _VendorWindow
+from app.services.alert_service import AlertService
+
+def _vendor_with_pii_config(db, threshold: float = 90.0) -> Vendor:
+    vendor = Vendor(name="Acme", is_active=True, quality_score=90, coverage_percentage=90)
+    db.add(vendor)
+    db.flush()
+    db.add(AlertConfiguration(vendor_id=vendor.id, alert_type=AlertType.PII_COMPLETENESS,
+                              threshold_value=threshold, is_active=True))
+    return vendor
+
+def _set_day(db, vendor_id: int, days_ago: int, records: int, pii_complete: int) -> None:
+    day = datetime.now().date() - timedelta(days=days_ago)
+    row = db.get(VendorDailyQuality, (vendor_id, day))
+    if row is None:
+        row = VendorDailyQuality(vendor_id=vendor_id, day=day, verified_count=0, turnaround_sum=0.0, freshness_sum=0.0)
+        db.add(row)
+    row.record_count = records
+    row.pii_complete_count = pii_complete
+    db.commit()
+
+def test_breach_opens_an_alert_and_recovery_resolves_it(db):
+    vendor = _vendor_with_pii_config(db)
+    _set_day(db, vendor.id, 1, records=100, pii_complete=80)
+    evaluator = StreamingAlertEvaluator(resync_seconds=0)
+    
+    assert evaluator.evaluate(db, [vendor.id])["created"] == 1
+    alert = db.query(Alert).filter(Alert.vendor_id == vendor.id).one()
+    assert alert.alert_type == AlertType.PII_COMPLETENESS
+    assert alert.current_value == 80.0
+    
+    _set_day(db, vendor.id, 1, records=100, pii_complete=97)
+    assert evaluator.evaluate(db, [vendor.id])["resolved"] == 1
+    db.refresh(alert)
+    assert alert.status == AlertStatus.RESOLVED
+
+def test_sla_check_judges_the_same_window_as_the_evaluator(db):
+    vendor = _vendor_with_pii_config(db)
+    # Perfect history outside the 30-day window would hide the recent breach from an all-time rate
+    _set_day(db, vendor.id, 90, records=10000, pii_complete=10000)
+    _set_day(db, vendor.id, 2, records=100, pii_complete=70)
+    
+    StreamingAlertEvaluator().evaluate(db, [vendor.id])
+    alerts = AlertService.check_sla_compliance(db, vendor.id)
+    
+    assert db.query(Alert).filter(Alert.status == AlertStatus.ACTIVE).count() == 1
+    assert [alert["current_value"] for alert in alerts] == [70.0]
+
+def test_delta_committed_during_the_read_drops_the_window():
+    window = _VendorWindow(read_started=10.0, read_finished=20.0)
+    day = datetime.now().date()
+    
+    assert window.absorb(day, [1, 1, 0, 0.0, 0.0], commit_started=5.0, committed_at=8.0)
+    assert window.days == {}  # visible before the read began, so already read
+    assert window.absorb(day, [1, 1, 0, 0.0, 0.0], commit_started=25.0, committed_at=26.0)
+    assert window.days[day][:2] == [1, 1]
+    assert not window.absorb(day, [1, 1, 0, 0.0, 0.0], commit_started=15.0, committed_at=21.0)
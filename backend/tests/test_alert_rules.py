@@ -0,0 +1,53 @@
+from datetime import datetime, timedelta
+import numpy as np
+import pytest
+from app.models import CriminalRecord, PIIStatus, Vendor
+from app.services.alert_rules import AlertRuleService
+
+def _rule(name: str, metric: str, comparator: str, threshold: float, window_days: int = 30) -> dict:
+    return {"name": name, "metric": metric, "comparator": comparator, "threshold": threshold,
+            "window_days": window_days, "severity": "high"}
+
+def _records(vendor_id: int, turnarounds, days_ago: int):
+    delivered = datetime.now() - timedelta(days=days_ago)
+    return [
+        CriminalRecord(vendor_id=vendor_id, case_number=f"{days_ago}-{n}", vendor_delivery_date=delivered,
+                       pii_status=PIIStatus.COMPLETE if n % 4 else PIIStatus.MISSING,
+                       disposition_verified=True, freshness_days=3, turnaround_hours=value)
+        for n, value in enumerate(turnarounds)
+    ]
+
+def test_rules_evaluate_windowed_metrics_including_p95(db):
+    slow, fast = Vendor(name="Slow", is_active=True), Vendor(name="Fast", is_active=True)
+    db.add_all([slow, fast])
+    db.flush()
+    recent = list(np.random.default_rng(3).gamma(2.0, 20.0, 203).round(2))
+    db.add_all(_records(slow.id, recent, days_ago=2))
+    # Outside every window below, so it must not move any metric
+    db.add_all(_records(slow.id, [5000.0] * 50, days_ago=60))
+    db.add_all(_records(fast.id, [4.0, 6.0, 8.0], days_ago=1))
+    for rule in (
+        _rule("Slow tail", "p95_turnaround_hours", ">", 48.0),
+        _rule("Slow average", "avg_turnaround_hours", ">", 10.0),
+        _rule("Incomplete PII", "pii_completeness", "<", 90.0, window_days=7)
+    ):
+        AlertRuleService.save_rule(db, rule)
+    db.commit()
+    
+    results = AlertRuleService.evaluate(db)
+    
+    slow_alerts = {alert["title"]: alert["current_value"] for alert in results[slow.id]["alerts"]}
+    assert slow_alerts["Slow tail"] == pytest.approx(np.percentile(recent, 95))
+    assert slow_alerts["Slow average"] == pytest.approx(np.mean(recent))
+    assert slow_alerts["Incomplete PII"] == pytest.approx(np.mean([0 if n % 4 == 0 else 100 for n in range(203)]))
+    assert [alert["title"] for alert in results[fast.id]["alerts"]] == ["Incomplete PII"]
+
+def test_p95_of_a_single_record_is_that_record(db):
+    vendor = Vendor(name="Solo", is_active=True)
+    db.add(vendor)
+    db.flush()
+    db.add_all(_records(vendor.id, [70.0], days_ago=1))
+    AlertRuleService.save_rule(db, _rule("Tail", "p95_turnaround_hours", ">=", 70.0))
+    db.commit()
+    
+    assert AlertRuleService.evaluate(db, [vendor.id])[vendor.id]["alerts"][0]["current_value"] == 70.0
@@ -0,0 +1,46 @@
+from collections import Counter
+from app.models import Alert, AlertSeverity, AlertStats, AlertStatus, AlertType, Vendor
+from app.services.alert_service import AlertService
+from app.services.alert_stats import _stats_key
+
+def _alert(alert_type: AlertType, severity: AlertSeverity, value: float) -> dict:
+    return {
+        "type": alert_type.value, "severity": severity.value, "title": "Check", "description": "Check",
+        "current_value": value, "threshold_value": 90.0, "variance": 90.0 - value
+    }
+
+def _stored_counts(db) -> Counter:
+    return Counter({
+        _stats_key(row.bucket_start, row.vendor_id, row.alert_type, row.severity, row.status): row.alert_count
+        for row in db.query(AlertStats) if row.alert_count
+    })
+
+def _recount(db) -> Counter:
+    return Counter(
+        _stats_key(row.triggered_at, row.vendor_id, row.alert_type, row.severity, row.status)
+        for row in db.query(Alert.triggered_at, Alert.vendor_id, Alert.alert_type, Alert.severity, Alert.status)
+    )
+
+def test_buckets_match_a_recount_through_inserts_and_status_changes(db):
+    vendors = [Vendor(name=f"V{n}", is_active=True) for n in range(2)]
+    db.add_all(vendors)
+    db.commit()
+    
+    ids = AlertService.create_alerts(db, [
+        (vendors[n % 2].id, _alert(alert_type, severity, 80.0 + n))
+        for n, (alert_type, severity) in enumerate([
+            (AlertType.PII_COMPLETENESS, AlertSeverity.HIGH),
+            (AlertType.TURNAROUND_TIME, AlertSeverity.MEDIUM),
+            (AlertType.PII_COMPLETENESS, AlertSeverity.HIGH),
+            (AlertType.COVERAGE_DROP, AlertSeverity.LOW)
+        ])
+    ])
+    AlertService.acknowledge_alert(db, ids[0])
+    AlertService.resolve_alert(db, ids[1])
+    AlertService.bulk_set_status(db, AlertStatus.RESOLVED, vendor_id=vendors[0].id, status=AlertStatus.ACTIVE)
+    db.add(Alert(vendor_id=vendors[1].id, alert_type=AlertType.QUALITY_DROP, severity=AlertSeverity.CRITICAL,
+                 status=AlertStatus.ACTIVE, title="Manual"))
+    db.commit()
+    
+    assert _stored_counts(db) == _recount(db)
+    assert sum(_stored_counts(db).values()) == 5
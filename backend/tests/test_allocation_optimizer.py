@@ -0,0 +1,69 @@
+import itertools
+import numpy as np
+import pytest
+from app.services.allocation_optimizer import AllocationOptimizer
+
+def _instance(seed: int, vendors: int = 3, jurisdictions: int = 6):
+    rng = np.random.default_rng(seed)
+    feasible = rng.random((vendors, jurisdictions)) < 0.8
+    cost = rng.uniform(5, 15, vendors)
+    quality = rng.uniform(60, 100, (vendors, jurisdictions))
+    volume = rng.integers(10, 200, jurisdictions).astype(float)
+    return feasible, cost, quality, volume
+
+def _assignments(feasible: np.ndarray):
+    """Every full assignment of the routable columns, as (columns, rows) pairs"""
+    columns = np.flatnonzero(feasible.any(axis=0))
+    for rows in itertools.product(*[np.flatnonzero(feasible[:, column]) for column in columns]):
+        yield columns, np.array(rows)
+
+def _brute_force(feasible, cost, quality, volume, target):
+    best = None
+    for columns, rows in _assignments(feasible):
+        average = (quality[rows, columns] * volume[columns]).sum() / volume[columns].sum()
+        total = (cost[rows] * volume[columns]).sum()
+        if (target is None or average >= target - 1e-9) and (best is None or total < best):
+            best = total
+    return best
+
+def _best_average(feasible, quality, volume):
+    columns = np.flatnonzero(feasible.any(axis=0))
+    best = np.where(feasible, quality, -np.inf)[:, columns].max(axis=0)
+    return (best * volume[columns]).sum() / volume[columns].sum()
+
+def _cost(choice, cost, volume):
+    routed = choice >= 0
+    return (cost[choice[routed]] * volume[routed]).sum()
+
+def test_without_a_target_each_column_gets_its_cheapest_feasible_vendor():
+    for seed in range(50):
+        feasible, cost, quality, volume = _instance(seed)
+        choice, price = AllocationOptimizer.solve(feasible, cost, quality, volume)
+        
+        assert price is None
+        assert _cost(choice, cost, volume) == pytest.approx(_brute_force(feasible, cost, quality, volume, None))
+        assert all(choice[column] == -1 for column in np.flatnonzero(~feasible.any(axis=0)))
+
+def test_quality_target_is_met_at_close_to_the_brute_force_cost():
+    gaps = []
+    for seed in range(100):
+        feasible, cost, quality, volume = _instance(seed)
+        target = _best_average(feasible, quality, volume) - np.random.default_rng(seed).uniform(0, 8)
+        choice, price = AllocationOptimizer.solve(feasible, cost, quality, volume, target)
+        
+        routed = np.flatnonzero(choice >= 0)
+        average = (quality[choice[routed], routed] * volume[routed]).sum() / volume[routed].sum()
+        optimum = _brute_force(feasible, cost, quality, volume, target)
+        assert average >= target - 1e-6
+        assert _cost(choice, cost, volume) >= optimum - 1e-6
+        gaps.append(_cost(choice, cost, volume) / optimum - 1)
+    
+    # The relaxation is a heuristic on instances this small; it is mostly exact and close on average
+    assert np.mean(np.array(gaps) < 1e-9) >= 0.9
+    assert np.mean(gaps) < 0.01
+
+def test_unreachable_target_raises_value_error():
+    feasible, cost, quality, volume = _instance(0)
+    
+    with pytest.raises(ValueError):
+        AllocationOptimizer.solve(feasible, cost, quality, volume, _best_average(feasible, quality, volume) + 1)
@@ -0,0 +1,59 @@
+from datetime import date, datetime, timedelta
+import numpy as np
+from app.models import Alert, AlertSeverity, AlertStatus, AlertType, Vendor, VendorDailyQuality
+from app.services.alert_service import AlertService
+from app.services.anomaly_detector import QualityAnomalyDetector, QualitySeries
+
+def _stable_series(vendor_count: int, days: int = 120) -> QualitySeries:
+    rng = np.random.default_rng(7)
+    series = QualitySeries(list(range(1, vendor_count + 1)), [f"V{i}" for i in range(vendor_count)], date(2026, 1, 1), days)
+    series.record_count[:] = 50
+    series.metrics["pii_completeness"][:] = 95 + rng.normal(0, 1, (vendor_count, days))
+    series.metrics["disposition_accuracy"][:] = 97 + rng.normal(0, 1, (vendor_count, days))
+    series.metrics["avg_turnaround_hours"][:] = 24 + rng.normal(0, 1, (vendor_count, days))
+    return series
+
+def test_slow_drift_is_flagged_and_stable_vendor_is_not():
+    series = _stable_series(2)
+    # Vendor 2 loses half a point of completeness a day over the last two weeks: never a sudden drop
+    series.metrics["pii_completeness"][1, -14:] -= 0.5 * np.arange(1, 15)
+    
+    findings = QualityAnomalyDetector().detect(series)
+    
+    assert findings[1] is None
+    assert findings[2]["metric"] == "pii_completeness"
+    assert findings[2]["current_value"] < findings[2]["baseline"]
+
+def test_rising_turnaround_is_flagged_but_falling_turnaround_is_not():
+    series = _stable_series(2)
+    series.metrics["avg_turnaround_hours"][0, -14:] += 6
+    series.metrics["avg_turnaround_hours"][1, -14:] -= 6
+    
+    findings = QualityAnomalyDetector().detect(series)
+    
+    assert findings[1]["metric"] == "avg_turnaround_hours"
+    assert findings[2] is None
+
+def test_clean_vendor_does_not_resolve_other_quality_alerts(db):
+    vendor = Vendor(name="Steady", is_active=True, quality_score=90, coverage_percentage=90)
+    db.add(vendor)
+    db.flush()
+    yesterday = datetime.now().date() - timedelta(days=1)
+    db.add_all([
+        VendorDailyQuality(vendor_id=vendor.id, day=yesterday - timedelta(days=n), record_count=50,
+                           pii_complete_count=47 + n % 2, verified_count=48 + n % 3,
+                           turnaround_sum=50 * (24 + n % 2), freshness_sum=50 * 5.0)
+        for n in range(90)
+    ])
+    # Raised by a threshold configuration or a rule, not by the detector
+    rule_alert = Alert(vendor_id=vendor.id, alert_type=AlertType.QUALITY_DROP, severity=AlertSeverity.HIGH,
+                       status=AlertStatus.ACTIVE, title="Rule: Average freshness", current_value=12.0)
+    db.add(rule_alert)
+    db.commit()
+    
+    evaluations = QualityAnomalyDetector().evaluations(db, [vendor.id])
+    AlertService.apply_evaluations(db, evaluations)
+    
+    assert evaluations == {(vendor.id, AlertType.QUALITY_ANOMALY): None}
+    db.refresh(rule_alert)
+    assert rule_alert.status == AlertStatus.ACTIVE
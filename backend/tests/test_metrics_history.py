@@ -0,0 +1,27 @@
+from datetime import datetime, timezone
+from app.models import Vendor, VendorMetricsRollup
+from app.services.metrics_history import MetricsHistoryService
+
+def _snapshot(vendor_id: int, minute: int, score: float) -> dict:
+    return {
+        "vendor_id": vendor_id, "recorded_at": datetime(2026, 3, 2, 10, minute, tzinfo=timezone.utc),
+        "pii_completeness": 90.0, "disposition_accuracy": 95.0, "avg_freshness_days": 4.0,
+        "geographic_coverage": 80.0, "calculated_score": score
+    }
+
+def test_snapshots_in_one_hour_accumulate_into_one_bucket(db):
+    vendor = Vendor(name="Acme", is_active=True)
+    db.add(vendor)
+    db.commit()
+    
+    MetricsHistoryService.apply_snapshot_rows(db, [_snapshot(vendor.id, 5, 82.0), _snapshot(vendor.id, 20, 88.0)])
+    MetricsHistoryService.apply_snapshot_rows(db, [_snapshot(vendor.id, 40, 79.0)])
+    db.commit()
+    
+    hourly = db.query(VendorMetricsRollup).filter(VendorMetricsRollup.tier == "hourly").one()
+    daily = db.query(VendorMetricsRollup).filter(VendorMetricsRollup.tier == "daily").one()
+    for bucket in (hourly, daily):
+        assert bucket.sample_count == 3
+        assert bucket.calculated_score_sum == 249.0
+        assert (bucket.calculated_score_min, bucket.calculated_score_max) == (79.0, 88.0)
+        assert bucket.pii_completeness_sum == 270.0
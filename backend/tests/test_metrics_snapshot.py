@@ -0,0 +1,40 @@
+from datetime import datetime
+import pytest
+from sqlalchemy import text
+from app.models import CriminalRecord, PIIStatus, Vendor, VendorMetrics, VendorMetricsRollup
+from app.services.metrics_snapshot import MetricsSnapshotScheduler
+
+@pytest.fixture
+def scheduler(db):
+    vendor = Vendor(name="Acme", is_active=True, coverage_percentage=80)
+    db.add(vendor)
+    db.flush()
+    db.add(CriminalRecord(vendor_id=vendor.id, case_number="C1", vendor_delivery_date=datetime.now(),
+                          pii_status=PIIStatus.COMPLETE, disposition_verified=True, freshness_days=2))
+    # The lease table is created by start(), outside the models, so it outlives the db fixture's drop_all
+    db.execute(text(f"DROP TABLE IF EXISTS {MetricsSnapshotScheduler.lease_table}"))
+    db.execute(text(
+        f"CREATE TABLE {MetricsSnapshotScheduler.lease_table} "
+        "(id INTEGER PRIMARY KEY, holder VARCHAR(255), expires_at FLOAT, last_run_at FLOAT)"
+    ))
+    db.commit()
+    return MetricsSnapshotScheduler(interval_seconds=3600)
+
+def test_failed_run_leaves_neither_snapshot_nor_run_time(db, scheduler, monkeypatch):
+    def crash(self, db, now):
+        raise RuntimeError("worker died")
+    monkeypatch.setattr(MetricsSnapshotScheduler, "record_run", crash)
+    
+    with pytest.raises(RuntimeError):
+        scheduler.run_once()
+    
+    assert db.query(VendorMetrics).count() == 0
+    assert db.query(VendorMetricsRollup).count() == 0
+
+def test_run_writes_snapshot_and_run_time_then_waits_for_the_interval(db, scheduler):
+    assert scheduler.run_once()
+    db.commit()
+    assert not scheduler.run_once()
+    
+    assert db.query(VendorMetrics).count() == 1
+    assert db.execute(text(f"SELECT last_run_at FROM {scheduler.lease_table}")).scalar() is not None
@@ -0,0 +1,38 @@
+from datetime import datetime, timedelta
+from app.models import CriminalRecord, PIIStatus, Vendor, VendorDailyQuality, VendorScoreRollup
+from app.services.rollup_service import RollupService
+
+def test_rollups_follow_orm_inserts_and_deletes(db):
+    vendor = Vendor(name="Acme", is_active=True, coverage_percentage=80)
+    db.add(vendor)
+    db.flush()
+    delivered = datetime.now() - timedelta(days=1)
+    records = [
+        CriminalRecord(vendor_id=vendor.id, case_number=f"C{n}", vendor_delivery_date=delivered,
+                       pii_status=PIIStatus.COMPLETE if n % 2 else PIIStatus.INCOMPLETE,
+                       disposition_verified=n % 3 == 0, freshness_days=n, turnaround_hours=10)
+        for n in range(6)
+    ]
+    db.add_all(records)
+    db.commit()
+    db.delete(records[1])
+    db.commit()
+    
+    rollup = db.get(VendorScoreRollup, vendor.id)
+    daily = db.get(VendorDailyQuality, (vendor.id, delivered.date()))
+    assert (rollup.total_records, rollup.pii_complete_count, rollup.verified_count, rollup.freshness_sum) == (5, 2, 2, 14.0)
+    assert (daily.record_count, daily.pii_complete_count, daily.turnaround_sum) == (5, 2, 50.0)
+    assert RollupService.reconcile(db)["vendors_drifted"] == 0
+
+def test_deltas_for_a_new_row_add_up_instead_of_colliding(db):
+    vendor = Vendor(name="Acme", is_active=True)
+    db.add(vendor)
+    db.commit()
+    
+    # Two writers that both found no row yet: the second insert lands on the first's row
+    RollupService.apply_deltas(db.connection(), {vendor.id: [2, 1, 1, 6.0]})
+    RollupService.apply_deltas(db.connection(), {vendor.id: [3, 3, 0, 4.0]})
+    db.commit()
+    
+    rollup = db.get(VendorScoreRollup, vendor.id)
+    assert (rollup.total_records, rollup.pii_complete_count, rollup.verified_count, rollup.freshness_sum) == (5, 4, 1, 10.0)
@@ -0,0 +1,31 @@
+from app.services.score_cache import ScoreCache
+
+def test_put_after_invalidate_of_uncached_vendor_is_refused():
+    cache = ScoreCache()
+    generation = cache.generation  # reader takes the generation, then queries
+    cache.invalidate([5])  # writer commits before the reader stores its result
+    cache.put(5, generation, "stale")
+    
+    assert cache.get(5) is None
+
+def test_put_after_clear_is_refused():
+    cache = ScoreCache()
+    generation = cache.generation
+    cache.clear()
+    cache.put(5, generation, "stale")
+    
+    assert cache.get(5) is None
+
+def test_put_with_current_generation_is_served():
+    cache = ScoreCache()
+    cache.invalidate([5])
+    cache.put(5, cache.generation, "fresh")
+    
+    assert cache.get(5) == "fresh"
+
+def test_invalidate_drops_entry():
+    cache = ScoreCache()
+    cache.put(5, cache.generation, "old")
+    cache.invalidate([5])
+    
+    assert cache.get(5) is None
@@ -0,0 +1,48 @@
+from datetime import datetime, timedelta
+import pytest
+from app.models import CriminalRecord, PIIStatus, Vendor
+from app.services.whatif_simulation import WhatIfSimulator
+
+@pytest.fixture
+def vendors(db):
+    current = Vendor(name="Current", is_active=True, cost_per_record=10.0, coverage_percentage=80)
+    new = Vendor(name="New", is_active=True, cost_per_record=8.0, coverage_percentage=90)
+    db.add_all([current, new])
+    db.flush()
+    for vendor, miss_every in ((current, 5), (new, 3)):
+        db.add_all([
+            CriminalRecord(vendor_id=vendor.id, case_number=f"{vendor.id}-{n}",
+                           vendor_delivery_date=datetime.now() - timedelta(hours=n),
+                           pii_status=PIIStatus.MISSING if n % miss_every == 0 else PIIStatus.COMPLETE,
+                           disposition_verified=n % 7 != 0, freshness_days=2 + n % 4, turnaround_hours=12 + n % 30)
+            for n in range(300)
+        ])
+    db.commit()
+    return current, new
+
+def _simulate(db, vendors, assumptions=None, seed=7):
+    current, new = vendors
+    return WhatIfSimulator.simulate(db, current, new, 50000, assumptions, trials=2000, seed=seed)
+
+def test_same_seed_reproduces_the_run(db, vendors):
+    assumptions = {"sla_thresholds": {"pii_completeness": 75}}
+    first = _simulate(db, vendors, assumptions)
+    
+    assert _simulate(db, vendors, assumptions) == first
+    assert _simulate(db, vendors, assumptions, seed=8) != first
+    assert first["seed"] == 7
+
+def test_numeric_strings_are_accepted_as_assumptions(db, vendors):
+    assert _simulate(db, vendors, {"sla_period_days": "30", "confidence_level": "0.95"}) == _simulate(db, vendors)
+
+@pytest.mark.parametrize("assumptions", [
+    {"sla_period_days": "monthly"},
+    {"confidence_level": [0.9]},
+    {"rework_cost_per_record": "free"},
+    {"sla_thresholds": {"uptime": 99}},
+    {"sla_thresholds": {"pii_completeness": "high"}},
+    {"sla_thresholds": ["pii_completeness"]}
+])
+def test_malformed_assumptions_raise_value_error(db, vendors, assumptions):
+    with pytest.raises(ValueError):
+        _simulate(db, vendors, assumptions)
@@ -56,6 +56,28 @@ const getSampleAlertSummary = () => ({
   },
 });
 
+// Fold a streamed alert change into the 30-day summary without refetching it
+const applyEventToSummary = (summary, type, alert) => {
+  if (!summary) return summary;
+  let { total_alerts: total, resolved_alerts: resolved } = summary;
+  let bySeverity = summary.by_severity;
+  if (type === 'alert.created') {
+    total += 1;
+    bySeverity = { ...bySeverity, [alert.severity]: (bySeverity?.[alert.severity] || 0) + 1 };
+  } else if (type === 'alert.resolved') {
+    resolved += 1;
+  } else {
+    return summary;
+  }
+  return {
+    ...summary,
+    total_alerts: total,
+    resolved_alerts: resolved,
+    resolution_rate: total > 0 ? (resolved / total) * 100 : 0,
+    by_severity: bySeverity,
+  };
+};
+
 const AlertDashboard = ({ vendorId = null, limit = 10 }) => {
   const [alerts, setAlerts] = useState([]);
   const [summary, setSummary] = useState(null);
@@ -68,6 +90,27 @@ const AlertDashboard = ({ vendorId = null, limit = 10 }) => {
     fetchSummary();
   }, [vendorId]);
 
+  // Live updates replace polling; a reset means missed events, so refetch once
+  useEffect(() => {
+    const source = alertAPI.streamAlerts({
+      onAlert: (type, alert) => {
+        setSummary((current) => applyEventToSummary(current, type, alert));
+        if (vendorId && alert.vendor_id !== Number(vendorId)) return;
+        setAlerts((current) => {
+          if (type === 'alert.created') {
+            return [alert, ...current.filter((a) => a.id !== alert.id)].slice(0, limit);
+          }
+          return current.map((a) => (a.id === alert.id ? alert : a));
+        });
+      },
+      onReset: () => {
+        fetchAlerts();
+        fetchSummary();
+      },
+    });
+    return () => source.close();
+  }, [vendorId, limit]);
+
   const fetchAlerts = async () => {
     try {
       setLoading(true);
@@ -39,11 +39,14 @@ api.interceptors.response.use(
 // Vendor API endpoints
 export const vendorAPI = {
   getVendors: (params = {}) => api.get('/api/vendors/', { params }),
-  getVendor: (id) => api.get(`/api/vendors/${id}`),
-  getVendorScore: (id) => api.get(`/api/vendors/${id}/score`),
-  getVendorHistory: (id, days = 30) => api.get(`/api/vendors/${id}/history`, { params: { days } }),
+  getVendor: (id, profile) => api.get(`/api/vendors/${id}`, { params: { profile } }),
+  getVendorScore: (id, profile) => api.get(`/api/vendors/${id}/score`, { params: { profile } }),
+  getVendorHistory: (id, days = 30, maxPoints) => api.get(`/api/vendors/${id}/history`, { params: { days, max_points: maxPoints } }),
   getVendorJurisdictions: (id) => api.get(`/api/vendors/${id}/jurisdictions`),
-  getBenchmark: () => api.get('/api/vendors/benchmark/all'),
+  getBenchmark: (profile) => api.get('/api/vendors/benchmark/all', { params: { profile } }),
+  getScoringProfiles: () => api.get('/api/vendors/scoring-profiles'),
+  saveScoringProfile: (name, data) => api.put(`/api/vendors/scoring-profiles/${name}`, data),
+  getRankings: (params = {}) => api.get('/api/vendors/rankings', { params, paramsSerializer: { indexes: null } }),
 };
 
 // Comparison API endpoints
@@ -62,11 +65,21 @@ export const alertAPI = {
   getAlertSummary: (days = 30) => api.get('/api/alerts/summary/', { params: { days } }),
   getVendorAlerts: (vendorId, params = {}) => api.get(`/api/alerts/vendor/${vendorId}/`, { params }),
   checkSLA: (vendorId) => api.get(`/api/alerts/vendor/${vendorId}/sla-check/`),
+  checkAllSLA: (params = {}) => api.get('/api/alerts/sla-check/', { params, paramsSerializer: { indexes: null } }),
   configureAlerts: (data) => api.post('/api/alerts/configure/', data),
   acknowledgeAlert: (id) => api.post(`/api/alerts/${id}/acknowledge/`),
   resolveAlert: (id) => api.post(`/api/alerts/${id}/resolve/`),
   getAlertConfigurations: (vendorId) => api.get(`/api/alerts/configurations/${vendorId}/`),
   getAlertTypes: () => api.get('/api/alerts/types/'),
+  // Live alert changes over Server-Sent Events; the browser reconnects and resumes from the last event on its own
+  streamAlerts: ({ onAlert, onReset } = {}) => {
+    const source = new EventSource(`${API_BASE_URL}/api/alerts/stream`);
+    ['alert.created', 'alert.updated', 'alert.acknowledged', 'alert.resolved'].forEach((type) => {
+      source.addEventListener(type, (event) => onAlert?.(type, JSON.parse(event.data)));
+    });
+    source.addEventListener('reset', () => onReset?.());
+    return source;
+  },
 };
 
 // Analysis API endpoints
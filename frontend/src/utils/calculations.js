@@ -1,6 +1,14 @@
 // Client-side calculations for vendor quality scoring
 
-export const calculateQualityScore = (metrics) => {
+// Mirrors the server's "standard" scoring profile; pass a profile's weights to override
+export const DEFAULT_QUALITY_WEIGHTS = {
+  pii_completeness: 0.4,
+  disposition_accuracy: 0.3,
+  freshness_score: 0.2,
+  geographic_coverage: 0.1
+};
+
+export const calculateQualityScore = (metrics, weights = DEFAULT_QUALITY_WEIGHTS) => {
   const {
     pii_completeness = 0,
     disposition_accuracy = 0,
@@ -11,10 +19,10 @@ export const calculateQualityScore = (metrics) => {
   const freshness_score = Math.max(0, 100 - avg_freshness_days);
   
   const quality_score = (
-    (pii_completeness * 0.4) +
-    (disposition_accuracy * 0.3) +
-    (freshness_score * 0.2) +
-    (geographic_coverage * 0.1)
+    (pii_completeness * weights.pii_completeness) +
+    (disposition_accuracy * weights.disposition_accuracy) +
+    (freshness_score * weights.freshness_score) +
+    (geographic_coverage * weights.geographic_coverage)
   );
 
   return Math.round(quality_score * 100) / 100;